@@ -0,0 +1,34 @@
+"""Python电子错题本
+
+存储层可以单独使用，不依赖 tkinter：
+
+    from mistakebook import MistakeBook
+    book = MistakeBook("mistakes.db")
+
+图形界面在 mistakebook.gui 中，命令行入口为 python -m mistakebook。
+"""
+from .grading import AnswerGrader, check_answer, register_grader
+from .models import LIST_COLUMNS, Mistake
+from .scheduler import MAX_REVIEW_INTERVAL, schedule_review
+from .storage import DEFAULT_DB_PATH, MistakeBook
+
+__all__ = [
+    "AnswerGrader",
+    "AsyncMistakeBook",
+    "DEFAULT_DB_PATH",
+    "LIST_COLUMNS",
+    "MAX_REVIEW_INTERVAL",
+    "Mistake",
+    "MistakeBook",
+    "check_answer",
+    "register_grader",
+    "schedule_review",
+]
+
+
+def __getattr__(name):
+    # 后台线程代理依赖 concurrent.futures，按需导入以加快命令行启动
+    if name == "AsyncMistakeBook":
+        from .worker import AsyncMistakeBook
+        return AsyncMistakeBook
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
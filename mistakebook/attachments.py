@@ -0,0 +1,188 @@
+"""题目图片等附件的存储
+
+附件按内容的 SHA-256 保存在数据库旁边的 <文件名>.attachments 目录中，内容相同的
+文件只保存一份，数据库的 attachments 表记录哪道题引用了哪个文件：
+
+    数学.attachments/objects/ab/cdef...          原始文件
+    数学.attachments/thumbs/ab/cdef...-160.png   缩略图，第一次需要时生成
+
+文件不再被引用时会被删除，而引用只记录在所属错题本中，所以每个错题本
+必须使用自己的目录，不能与其他错题本共用。
+
+读取时用 mmap 映射文件，不把整个文件读入内存。缩放和格式转换需要 Pillow，
+未安装时不生成缩略图，只能直接显示 PNG 和 GIF。
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 是可选依赖
+    Image = None
+
+THUMBNAIL_SIZE = 160
+CHUNK_SIZE = 1 << 20
+
+# 文件头 -> 图片格式
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+)
+# Tk 不借助 Pillow 就能显示的格式
+TK_FORMATS = ("png", "gif")
+
+
+def image_format(header):
+    """根据文件头判断图片格式，不是常见图片格式时返回None"""
+    header = bytes(header[:16])
+    for signature, name in _SIGNATURES:
+        if header.startswith(signature):
+            return name
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+class AttachmentStore:
+    """按内容哈希保存附件文件的目录"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest[2:])
+
+    def thumbnail_path(self, digest, size=THUMBNAIL_SIZE):
+        return os.path.join(self.root, "thumbs", digest[:2], f"{digest[2:]}-{size}.png")
+
+    def exists(self, digest):
+        return os.path.exists(self.object_path(digest))
+
+    def put(self, source):
+        """保存文件（路径或 bytes），返回 (哈希, 字节数, 图片格式)；已有相同内容时不再写入"""
+        objects = os.path.join(self.root, "objects")
+        os.makedirs(objects, exist_ok=True)
+        # 先写入临时文件，边写边计算哈希，最后改名到哈希对应的路径
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            f = io.BytesIO(source)
+        else:
+            f = open(source, "rb")
+        fd, temp_path = tempfile.mkstemp(dir=objects, prefix=".tmp-")
+        try:
+            sha = hashlib.sha256()
+            size = 0
+            header = b""
+            with f, os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if not header:
+                        header = chunk[:16]
+                    sha.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            digest = sha.hexdigest()
+            path = self.object_path(digest)
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest, size, image_format(header)
+
+    @contextmanager
+    def open(self, digest):
+        """只读映射附件内容，得到的对象支持切片和 read/seek（空文件为 b""）"""
+        with open(self.object_path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield io.BytesIO(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
+
+    def tk_image_data(self, digest, max_size=None):
+        """Tk 可以直接显示的图片数据（PNG 或 GIF），大图缩小到 max_size 以内
+
+        无法转换（未安装 Pillow 且不是 PNG/GIF，或不是图片）时返回None。
+        """
+        if not self.exists(digest):
+            return None
+        with self.open(digest) as data:
+            fmt = image_format(data[:16])
+            if Image is None:
+                return bytes(data) if fmt in TK_FORMATS else None
+            return self._convert(data, max_size)
+
+    @staticmethod
+    def _convert(data, max_size):
+        try:
+            with Image.open(data) as image:
+                if max_size:
+                    image.thumbnail((max_size, max_size))
+                else:
+                    image.load()
+                out = io.BytesIO()
+                image.save(out, "PNG")
+                return out.getvalue()
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
+
+    def thumbnail(self, digest, size=THUMBNAIL_SIZE):
+        """缩略图文件路径（PNG，长边不超过 size），第一次调用时生成并保存
+
+        未安装 Pillow 或文件不是图片时返回None。
+        """
+        path = self.thumbnail_path(digest, size)
+        if os.path.exists(path):
+            return path
+        if Image is None or not self.exists(digest):
+            return None
+        with self.open(digest) as data:
+            png = self._convert(data, size)
+        if png is None:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "wb") as out:
+            out.write(png)
+        os.replace(temp_path, path)
+        return path
+
+    def remove(self, digest):
+        """删除附件文件及其缩略图"""
+        for path in [self.object_path(digest)] + self._thumbnails(digest):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _thumbnails(self, digest):
+        directory = os.path.dirname(self.thumbnail_path(digest))
+        if not os.path.isdir(directory):
+            return []
+        prefix = digest[2:] + "-"
+        return [os.path.join(directory, name) for name in os.listdir(directory)
+                if name.startswith(prefix)]
+
+    def digests(self):
+        """目录中全部附件的哈希"""
+        objects = os.path.join(self.root, "objects")
+        if not os.path.isdir(objects):
+            return
+        for prefix in os.listdir(objects):
+            directory = os.path.join(objects, prefix)
+            if len(prefix) == 2 and os.path.isdir(directory):
+                for name in os.listdir(directory):
+                    yield prefix + name
@@ -0,0 +1,267 @@
+"""存储层性能测试
+
+生成指定规模的模拟错题本（错题数、科目数、标签数、每题复习次数可调），
+对 MistakeBook 的常用方法逐一计时，输出 JSON 格式的延迟分位数和吞吐量，
+便于在不同版本之间对比：
+
+    python -m mistakebook bench --rows 100000 --output new.json
+    python -m mistakebook bench --rows 100000 --compare old.json
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from .models import LIST_COLUMNS
+from .storage import MistakeBook
+
+QUESTION_TYPES = ["单选", "多选", "填空", "判断", "解答"]
+# 模拟题目文本使用的常用字
+_CHARS = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理"
+BATCH_SIZE = 10000
+
+
+def percentile(sorted_values, fraction):
+    """已排序数据的分位数（线性插值）"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies, elapsed):
+    """汇总一组耗时（秒）：次数、吞吐量和毫秒为单位的延迟分位数"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "ops_per_sec": round(len(values) / elapsed, 1) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p90_ms": round(percentile(values, 0.90) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def random_question(rng, length):
+    return "".join(rng.choice(_CHARS) for _ in range(length))
+
+
+def generate_book(book, rows=1000, subjects=5, tags=50, reviews=5, days=365, seed=0):
+    """向错题本写入模拟数据，返回生成耗时等信息
+
+    每道题有1-3个标签（从 tags 个标签中按近似齐夫分布抽取），
+    复习记录分布在最近 days 天内，每道题平均 reviews 次。
+    """
+    rng = random.Random(seed)
+    subject_names = [f"科目{i + 1}" for i in range(subjects)]
+    tag_names = [f"标签{i + 1}" for i in range(tags)]
+    tag_weights = [1 / (i + 1) for i in range(tags)]
+    now = datetime.now()
+    start = time.perf_counter()
+    review_count = 0
+
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = []
+        for _ in range(min(BATCH_SIZE, rows - offset)):
+            question_type = rng.choice(QUESTION_TYPES)
+            options = None
+            answer = random_question(rng, 4)
+            if question_type in ("单选", "多选"):
+                options = {key: random_question(rng, 8) for key in "ABCD"}
+                answer = "A,C" if question_type == "多选" else rng.choice("ABCD")
+            elif question_type == "判断":
+                answer = rng.choice(["对", "错"])
+            batch.append({
+                "subject": rng.choice(subject_names),
+                "question_type": question_type,
+                "question": random_question(rng, rng.randint(20, 80)),
+                "options": options,
+                "correct_answer": answer,
+                "explanation": random_question(rng, rng.randint(0, 60)),
+                "tags": ",".join(sorted(set(rng.choices(tag_names, tag_weights, k=rng.randint(1, 3))))),
+                "difficulty": rng.randint(1, 5),
+                "add_date": (now - timedelta(days=days, seconds=rng.randrange(86400))).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            })
+        ids = book.add_mistakes_bulk(batch)
+
+        history = []
+        for mistake_id in ids:
+            for _ in range(rng.randint(0, 2 * reviews)):
+                review_date = now - timedelta(seconds=rng.randrange(days * 86400))
+                history.append((
+                    mistake_id, rng.random() < 0.6, "",
+                    review_date.strftime("%Y-%m-%d %H:%M:%S"),
+                ))
+        book.add_reviews_bulk(history)
+        review_count += len(history)
+
+    elapsed = time.perf_counter() - start
+    # 相似题签名在写入之后补算（界面在后台进行），单独计时
+    start = time.perf_counter()
+    book.backfill_minhash()
+    minhash_seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "reviews": review_count,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        "minhash_seconds": round(minhash_seconds, 3),
+    }
+
+
+def time_operation(operation, iterations):
+    """重复执行 operation(i)，返回汇总结果"""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        begin = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_benchmarks(book, iterations=50, seed=0):
+    """对常用方法计时，返回 {操作名: 汇总结果}
+
+    错题本中没有科目或标签时（如测试已有的错题本），跳过按科目或标签筛选的操作。
+    """
+    rng = random.Random(seed)
+    subjects = book.get_subjects()
+    tags = book.get_tags()
+    book.cursor.execute("SELECT MIN(id), MAX(id) FROM mistakes")
+    min_id, max_id = book.cursor.fetchone()
+    if min_id is None:
+        raise ValueError("错题本为空，请先生成数据")
+    ids = [rng.randint(min_id, max_id) for _ in range(iterations)]
+    words = [random_question(rng, 3) for _ in range(iterations)]
+
+    # 列表类查询返回的行数与规模成正比，大规模时减少次数
+    list_iterations = max(1, min(iterations, 100000 // max(max_id - min_id + 1, 1)))
+    operations = [
+        ("get_mistakes", list_iterations, lambda i: book.get_mistakes()),
+        ("get_mistakes_subject", list_iterations,
+         lambda i: book.get_mistakes(subjects[i % len(subjects)])) if subjects else None,
+        ("get_mistakes_list", list_iterations, lambda i: book.get_mistakes(columns=LIST_COLUMNS)),
+        ("get_mistakes_page", iterations, lambda i: book.get_mistakes_page(limit=200)),
+        ("get_mistakes_page_list", iterations,
+         lambda i: book.get_mistakes_page(limit=200, columns=LIST_COLUMNS)),
+        ("get_mistakes_page_tag", iterations,
+         lambda i: book.get_mistakes_page(tag=tags[i % len(tags)], limit=200)) if tags else None,
+        ("get_mistakes_page_subject", iterations,
+         lambda i: book.get_mistakes_page(subjects[i % len(subjects)], limit=200)) if subjects else None,
+        ("get_mistakes_page_type", iterations,
+         lambda i: book.get_mistakes_page(question_type=QUESTION_TYPES[i % len(QUESTION_TYPES)], limit=200)),
+        ("count_mistakes", iterations,
+         lambda i: book.count_mistakes(subjects[i % len(subjects)])) if subjects else None,
+        ("get_due_mistakes", iterations, lambda i: book.get_due_mistakes(50)),
+        ("search_mistakes", iterations, lambda i: book.search_mistakes(words[i], limit=50)),
+        ("get_mistake_by_id", iterations, lambda i: book.get_mistake_by_id(ids[i])),
+        ("get_reviews", iterations, lambda i: book.get_reviews(ids[i])),
+        ("get_subjects", iterations, lambda i: book.get_subjects()),
+        ("get_tags", iterations, lambda i: book.get_tags()),
+        ("get_dashboard", iterations, lambda i: book.get_dashboard()),
+        ("find_similar_mistakes", iterations,
+         lambda i: book.find_similar_mistakes(random_question(rng, 40))),
+        ("add_review", iterations, lambda i: book.add_review(ids[i], i % 2 == 0, "")),
+    ]
+    results = {}
+    for name, count, operation in filter(None, operations):
+        results[name] = time_operation(operation, count)
+
+    subjects = subjects or ["科目1"]
+    tags = tags or [""]
+    added = []
+    results["add_mistake"] = time_operation(lambda i: added.append(book.add_mistake(
+        subjects[i % len(subjects)], "填空", random_question(rng, 40), None, "答案",
+        tags=tags[i % len(tags)]
+    )), iterations)
+    results["delete_mistake"] = time_operation(lambda i: book.delete_mistake(added[i]), iterations)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def copy_database(source, target):
+    """用 SQLite 备份接口复制数据库（包括尚未写回主文件的 WAL 内容）"""
+    src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+    try:
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def run(db_path=None, rows=1000, subjects=5, tags=50, reviews=5, iterations=50, seed=0):
+    """生成数据并执行全部测试，返回可直接保存为JSON的结果
+
+    测试总是在临时目录中进行，结束后删除：db_path 为空时生成模拟数据；
+    db_path 指向已有的数据库时复制一份再测试，不会写入原文件。
+    """
+    temp_dir = tempfile.TemporaryDirectory()
+    bench_path = os.path.join(temp_dir.name, "bench.db")
+    try:
+        existing = db_path is not None and os.path.exists(db_path)
+        if existing:
+            copy_database(db_path, bench_path)
+        book = MistakeBook(bench_path)
+        try:
+            generate = None
+            if not existing:
+                generate = generate_book(book, rows, subjects, tags, reviews, seed=seed)
+            return {
+                "environment": environment(),
+                "config": {
+                    "rows": book.count_mistakes(), "subjects": subjects, "tags": tags,
+                    "reviews": reviews, "iterations": iterations, "seed": seed,
+                },
+                "generate": generate,
+                "results": run_benchmarks(book, iterations, seed),
+            }
+        finally:
+            book.close()
+    finally:
+        temp_dir.cleanup()
+
+
+def compare(old, new, key="p50_ms"):
+    """对比两次结果，返回 [(操作名, 旧值, 新值, 新/旧)]"""
+    rows = []
+    for name, stats in new["results"].items():
+        before = old.get("results", {}).get(name, {}).get(key)
+        after = stats[key]
+        ratio = round(after / before, 2) if before else None
+        rows.append((name, before, after, ratio))
+    return rows
+
+
+def format_compare(rows, key="p50_ms"):
+    lines = [f"{'操作':<24}{'旧 ' + key:>14}{'新 ' + key:>14}{'新/旧':>8}"]
+    for name, before, after, ratio in rows:
+        before = "-" if before is None else before
+        ratio = "-" if ratio is None else ratio
+        lines.append(f"{name:<24}{before:>14}{after:>14}{ratio:>8}")
+    return "\n".join(lines)
+
+
+def load_result(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
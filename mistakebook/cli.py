@@ -0,0 +1,310 @@
+"""命令行入口：python -m mistakebook <命令> ...
+
+只导入存储层，不加载 tkinter；gui 命令才会导入图形界面模块。
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from .grading import grade_mistake
+from .models import LIST_COLUMNS
+from .storage import MistakeBook
+
+
+def parse_options(values):
+    """解析 --option 参数：每项为 "A=选项内容"，也可以直接给出JSON对象"""
+    options = {}
+    for value in values or []:
+        if value.lstrip().startswith("{"):
+            options.update(json.loads(value))
+            continue
+        key, sep, text = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"选项格式应为 标签=内容: {value}")
+        options[key.strip()] = text.strip()
+    return options or None
+
+
+def preview(mistake):
+    """在一行内显示的题目预览（截断方式与界面列表相同，见 Mistake.preview）"""
+    return " ".join(mistake.preview.split())
+
+
+def print_mistakes(mistakes):
+    """每行输出一道错题：ID、科目、题型、难度、复习情况、题目预览
+
+    跨错题本查询的结果在ID前加上错题本别名（如 物理:12）。
+    """
+    for mistake in mistakes:
+        progress = f"{mistake.correct_count}/{mistake.review_count}" if mistake.review_count > 0 else "未复习"
+        mistake_id = f"{mistake.book}:{mistake.id}" if mistake.book else mistake.id
+        print(f"{mistake_id}\t{mistake.subject}\t{mistake.question_type}\t{mistake.difficulty}\t"
+              f"{progress}\t{preview(mistake)}")
+
+
+def cmd_add(book, args):
+    mistake_id = book.add_mistake(
+        args.subject, args.type, args.question, parse_options(args.option), args.answer,
+        args.explanation, args.tags, args.difficulty, args.wrong_answer
+    )
+    print(mistake_id)
+
+
+def cmd_review(book, args):
+    mistake = book.get_mistake_by_id(args.id)
+    if not mistake:
+        print(f"错题不存在: {args.id}", file=sys.stderr)
+        return 1
+    result = grade_mistake(mistake, args.answer)
+    book.add_review(args.id, result, args.answer)
+    print("回答正确！" if result else f"回答错误！正确答案: {mistake.correct_answer}")
+    return 0 if result else 2
+
+
+def all_books(book):
+    """用 --book 附加了其他错题本时查询全部错题本，否则只查询当前错题本"""
+    return True if book.books else None
+
+
+def cmd_due(book, args):
+    print_mistakes(book.get_due_mistakes(
+        args.limit, args.subject, args.tag, columns=LIST_COLUMNS, books=all_books(book)
+    ))
+
+
+def cmd_search(book, args):
+    print_mistakes(book.search_mistakes(
+        " ".join(args.keyword), args.subject, args.tag, args.type, args.difficulty, args.limit,
+        columns=LIST_COLUMNS, books=all_books(book)
+    ))
+
+
+def cmd_export(book, args):
+    count = book.export_mistakes(args.path, args.format)
+    print(f"已导出 {count} 道错题: {args.path}")
+    if args.reviews:
+        count = book.export_reviews(args.reviews, args.format)
+        print(f"已导出 {count} 条复习记录: {args.reviews}")
+
+
+def cmd_import(book, args):
+    imported, skipped = book.import_mistakes(args.path, args.format)
+    print(f"导入 {imported} 道错题，跳过重复 {skipped} 道")
+    if args.reviews:
+        imported, skipped = book.import_reviews(args.reviews, args.format)
+        print(f"导入 {imported} 条复习记录，跳过 {skipped} 条")
+
+
+def cmd_stats(book, args):
+    dashboard = book.get_dashboard(args.days, books=all_books(book))
+    if args.json:
+        print(json.dumps(dashboard, ensure_ascii=False, indent=2))
+        return
+    print(f"累计复习: {dashboard['total_reviews']} 次，正确率: {int(dashboard['accuracy'] * 100)}%")
+    for day, reviews, correct in dashboard["daily"]:
+        print(f"  {day}  {correct}/{reviews}")
+    for subject, q_type, reviews, correct in dashboard["subjects"]:
+        print(f"{subject}·{q_type}: {correct}/{reviews} ({int(correct / reviews * 100)}%)")
+    for tag, reviews, correct in dashboard["weakest_tags"]:
+        print(f"薄弱标签 {tag}: {correct}/{reviews} ({int(correct / reviews * 100)}%)")
+
+
+def cmd_dedup(book, args):
+    book.backfill_minhash()
+    groups = book.find_duplicate_groups(args.threshold)
+    if not groups:
+        print("没有发现重复的错题")
+        return
+    merged = 0
+    for group in groups:
+        print(f"保留 {group[0]}，重复 {', '.join(str(mistake_id) for mistake_id in group[1:])}")
+        for mistake_id in group:
+            print(f"  {mistake_id}\t{preview(book.get_mistake_by_id(mistake_id, ('preview',)))}")
+        if args.merge:
+            merged += book.merge_mistakes(group[0], group[1:])
+    if args.merge:
+        print(f"已合并 {merged} 道重复错题")
+    else:
+        print(f"共 {len(groups)} 组，使用 --merge 合并（复习记录移到保留的错题下）")
+
+
+def cmd_attach(book, args):
+    if not book.get_mistake_by_id(args.id, ("id",)):
+        print(f"错题不存在: {args.id}", file=sys.stderr)
+        return 1
+    for path in args.files:
+        book.add_attachment(args.id, path)
+    for attachment_id, _, digest, name, fmt, size, add_date in book.get_attachments(args.id):
+        print(f"{attachment_id}\t{name or ''}\t{fmt or '未知格式'}\t{size}\t{digest[:12]}\t{add_date}")
+    return 0
+
+
+def cmd_archive(book, args):
+    before = datetime.now() - timedelta(days=args.days)
+    archived, mistakes = book.archive_reviews(before, args.keep)
+    print(f"已归档 {mistakes} 道错题的 {archived} 条复习记录（{before:%Y-%m-%d} 以前）")
+    if args.vacuum:
+        book.vacuum()
+        print("已整理数据库文件")
+
+
+def run_bench(args):
+    # --db 指定已有的数据库时在其副本上测试，不会修改原文件；否则生成临时数据库
+    from . import bench
+    result = bench.run(
+        args.db, args.rows, args.subjects, args.tags, args.reviews, args.iterations, args.seed
+    )
+    text = json.dumps(result, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        print(bench.format_compare(bench.compare(bench.load_result(args.compare), result)))
+    elif not args.output:
+        print(text)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="mistakebook", description="Python电子错题本")
+    parser.add_argument("--db", help="数据库文件路径（默认为程序目录下的 mistakes.db）")
+    parser.add_argument("--book", action="append", default=[],
+                        help="同时打开的其他错题本文件，可重复；due、search、stats 合并查询全部错题本")
+    parser.add_argument("--profile", action="store_true", help="记录数据库方法和SQL的耗时，结束时输出报告")
+    parser.add_argument("--slow-ms", type=float, default=50, help="慢查询阈值（毫秒）")
+    commands = parser.add_subparsers(dest="command", metavar="命令")
+
+    # 添加错题
+    p = commands.add_parser("add", help="添加错题")
+    p.add_argument("--subject", required=True, help="科目")
+    p.add_argument("--type", required=True, help="题目类型：单选、多选、填空、判断、解答")
+    p.add_argument("--question", required=True, help="题目")
+    p.add_argument("--answer", required=True, help="正确答案")
+    p.add_argument("--option", action="append", help="选项，格式为 A=内容，可重复")
+    p.add_argument("--explanation", default="", help="解析")
+    p.add_argument("--tags", default="", help="标签，逗号分隔")
+    p.add_argument("--difficulty", type=int, default=3, choices=range(1, 6), help="难度1-5")
+    p.add_argument("--wrong-answer", default="", help="错误答案")
+    p.set_defaults(func=cmd_add)
+
+    # 作答并记录复习
+    p = commands.add_parser("review", help="作答一道错题并记录复习结果")
+    p.add_argument("id", type=int, help="错题ID")
+    p.add_argument("answer", help="你的答案")
+    p.set_defaults(func=cmd_review)
+
+    # 今日复习队列
+    p = commands.add_parser("due", help="列出已到复习时间的错题")
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p.add_argument("--subject")
+    p.add_argument("--tag")
+    p.set_defaults(func=cmd_due)
+
+    # 搜索
+    p = commands.add_parser("search", help="全文搜索错题")
+    p.add_argument("keyword", nargs="+", help="关键词")
+    p.add_argument("--subject")
+    p.add_argument("--tag")
+    p.add_argument("--type")
+    p.add_argument("--difficulty", type=int)
+    p.add_argument("-n", "--limit", type=int, default=50)
+    p.set_defaults(func=cmd_search)
+
+    # 导出、导入
+    for name, func, help_text in (("export", cmd_export, "导出错题"), ("import", cmd_import, "导入错题")):
+        p = commands.add_parser(name, help=help_text)
+        p.add_argument("path", help="错题文件（.jsonl 或 .csv）")
+        p.add_argument("--reviews", help="复习记录文件")
+        p.add_argument("--format", choices=("jsonl", "csv"), help="文件格式，默认按扩展名判断")
+        p.set_defaults(func=func)
+
+    # 统计
+    p = commands.add_parser("stats", help="学习概况")
+    p.add_argument("--days", type=int, default=7, help="显示最近几天的复习量")
+    p.add_argument("--json", action="store_true", help="以JSON格式输出")
+    p.set_defaults(func=cmd_stats)
+
+    # 查找并合并重复错题
+    p = commands.add_parser("dedup", help="查找题目相似的重复错题")
+    p.add_argument("--threshold", type=float, default=0.8, help="相似度阈值（0-1）")
+    p.add_argument("--merge", action="store_true", help="合并每组重复错题")
+    p.set_defaults(func=cmd_dedup)
+
+    # 附件
+    p = commands.add_parser("attach", help="给错题添加图片附件，不指定文件时列出已有附件")
+    p.add_argument("id", type=int, help="错题ID")
+    p.add_argument("files", nargs="*", help="图片文件")
+    p.set_defaults(func=cmd_attach)
+
+    # 归档早期的复习记录
+    p = commands.add_parser("archive", help="归档早期的复习记录")
+    p.add_argument("--days", type=int, default=MistakeBook.ARCHIVE_AFTER_DAYS,
+                   help="归档多少天以前的记录")
+    p.add_argument("--keep", type=int, default=MistakeBook.ARCHIVE_KEEP_RECENT,
+                   help="每道题保留最近几条记录不归档")
+    p.add_argument("--vacuum", action="store_true", help="归档后整理数据库文件，释放空间")
+    p.set_defaults(func=cmd_archive)
+    
+    # HTTP服务
+    p = commands.add_parser("serve", help="以本地HTTP/JSON服务共享错题本")
+    p.add_argument("--host", default="127.0.0.1",
+                   help="监听地址，默认只允许本机访问；监听其他地址时必须设置 --token")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--readers", type=int, default=4, help="读连接数量")
+    p.add_argument("--token", default=os.environ.get("MISTAKEBOOK_TOKEN"),
+                   help="访问令牌，客户端须提供相同的令牌（默认取环境变量 MISTAKEBOOK_TOKEN）")
+
+    # 性能测试
+    p = commands.add_parser("bench", help="生成模拟数据并测试存储层性能")
+    p.add_argument("--rows", type=int, default=1000, help="错题数量")
+    p.add_argument("--subjects", type=int, default=5, help="科目数量")
+    p.add_argument("--tags", type=int, default=50, help="标签数量")
+    p.add_argument("--reviews", type=int, default=5, help="每道题平均复习次数")
+    p.add_argument("--iterations", type=int, default=50, help="每个操作的执行次数")
+    p.add_argument("--seed", type=int, default=0, help="随机种子")
+    p.add_argument("--output", help="把结果保存为JSON文件")
+    p.add_argument("--compare", help="与之前保存的结果对比")
+    
+    # 图形界面
+    p = commands.add_parser("gui", help="启动图形界面")
+    p.add_argument("--server", help="连接到错题本服务（如 http://127.0.0.1:8765）而不是本地数据库")
+    p.add_argument("--token", default=os.environ.get("MISTAKEBOOK_TOKEN"),
+                   help="错题本服务的访问令牌（默认取环境变量 MISTAKEBOOK_TOKEN）")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    profiler = None
+    if args.profile:
+        from .profiling import Profiler, profile_book
+        profiler = Profiler(args.slow_ms)
+    if args.command in (None, "gui"):
+        # 只有启动图形界面时才导入 tkinter
+        from .gui import main as gui_main
+        gui_main(args.db, getattr(args, "server", None), profiler, getattr(args, "token", None))
+        return 0
+    if args.command == "serve":
+        from .remote import serve
+        try:
+            serve(args.db, args.host, args.port, args.readers, args.token)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+    if args.command == "bench":
+        return run_bench(args)
+
+    book = MistakeBook(args.db)
+    for path in args.book:
+        book.attach_book(path)
+    if profiler is not None:
+        profile_book(book, profiler)
+    try:
+        return args.func(book, args) or 0
+    finally:
+        book.close()
+        if profiler is not None:
+            print(profiler.report(), file=sys.stderr)
@@ -0,0 +1,91 @@
+"""相似题目检测（MinHash + LSH）
+
+题目文本规范化后切成字符 n-gram（不依赖分词，适合中文），用 NUM_PERM 个
+哈希函数计算 MinHash 签名，两道题签名相同位置的比例近似于 n-gram 集合的
+Jaccard 相似度。签名分成 BANDS 段，每段哈希成一个桶号，至少有一段桶号相同的
+题目才作为候选，查找时不需要和全部题目逐一比较。
+
+每个 n-gram 只计算 NUM_PERM / 16 次（向上取整）blake2b（每次64字节，拆成16个32位哈希值），
+逐位置取最小值在 C 中完成，不在 Python 中逐个做乘法取模。n-gram 少于
+MIN_SHINGLES 个的短题目（如"见图"）不计算签名，不参与相似题检测。
+
+签名和桶号保存在 minhash、lsh_buckets 表中，由 MistakeBook.backfill_minhash()
+在写入之后补算，写入错题时不计算。
+"""
+import hashlib
+import re
+import struct
+
+from .grading import normalize_text
+
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 6  # 规范化后至少8个字
+# 10段、每段3个值：两道题成为候选的概率为 1-(1-s^3)^10，s 为相似度。
+# s=0.6 时约91%，s=0.8 时超过99.9%；s=0.15 时约3%，无关的题目很少成为候选
+NUM_PERM = 30
+BANDS = 10
+ROWS = NUM_PERM // BANDS
+
+# 每次 blake2b 得到16个哈希值，不同的盐相当于不同的哈希函数（固定值，保证签名稳定）
+_SALTS = [struct.pack("<Q", index) for index in range(-(-NUM_PERM // 16))]
+_HASHES = struct.Struct("<16I")
+_PUNCTUATION_RE = re.compile(r"[\W_]+")
+_SIGNATURE_FORMAT = f"<{NUM_PERM}I"
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """规范化（去掉空白、标点，统一全角半角和大小写）后的字符 n-gram 集合"""
+    text = _PUNCTUATION_RE.sub("", normalize_text(text))
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _shingle_hashes(shingle):
+    data = shingle.encode("utf-8")
+    hashes = ()
+    for salt in _SALTS:
+        hashes += _HASHES.unpack(hashlib.blake2b(data, digest_size=64, salt=salt).digest())
+    return hashes
+
+
+def minhash(text):
+    """计算题目文本的 MinHash 签名（NUM_PERM 个整数的元组），题目太短时返回None"""
+    grams = shingles(text)
+    if len(grams) < MIN_SHINGLES:
+        return None
+    return tuple(map(min, zip(*map(_shingle_hashes, grams))))[:NUM_PERM]
+
+
+def band_buckets(signature):
+    """签名每一段的桶号 [(段号, 桶号)]，桶号为有符号64位整数（SQLite INTEGER）"""
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS}I", *values), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def similarity(signature, other):
+    """两个签名的估计相似度（0-1）"""
+    return sum(1 for x, y in zip(signature, other) if x == y) / NUM_PERM
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, data)
+
+
+def content_key(correct_answer, options, digests):
+    """题目以外必须相同的内容（答案、选项、附件），不同的题目即使题干相同也不合并
+
+    options 为解析后的选项字典，digests 为附件的内容哈希。
+    """
+    options = tuple(sorted(
+        (normalize_text(str(key)), normalize_text(str(value))) for key, value in (options or {}).items()
+    ))
+    return normalize_text(correct_answer), options, tuple(sorted(digests))
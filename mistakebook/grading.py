@@ -0,0 +1,209 @@
+"""作答批改
+
+按题目类型选择批改方式：
+    单选、多选: 比较选项集合，"A,C"、"C、A"、"ac" 视为相同
+    判断: "对/正确/√/T/true" 等视为同一答案
+    填空、解答及其他: 忽略空白、全角半角和大小写，数值按相对误差比较
+
+以 "any:" 开头的正确答案可以用 "||" 分隔多个可接受的答案（没有这个前缀时 "||"
+只是答案的一部分，如代码填空），以 "re:" 开头的答案按正则表达式匹配，不是有效的
+正则表达式时按普通文本比较。
+每道题的正确答案只解析一次，AnswerGrader 按错题ID缓存解析结果。
+"""
+import math
+import re
+
+# 有多个可接受答案时的前缀和分隔符，以及正则答案的前缀
+ALTERNATIVES_PREFIX = "any:"
+ALTERNATIVE_SEPARATOR = "||"
+REGEX_PREFIX = "re:"
+
+# 全角字符（包括全角空格）转半角
+_FULLWIDTH_TABLE = {0x3000: " "}
+_FULLWIDTH_TABLE.update({0xFF01 + i: chr(0x21 + i) for i in range(94)})
+_WHITESPACE_RE = re.compile(r"\s+")
+_CHOICE_SEPARATOR_RE = re.compile(r"[\s,;、，；/]+")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:e[-+]?\d+)?")
+
+# 判断题的同义答案
+_TRUE_WORDS = frozenset(["对", "正确", "是", "√", "✓", "✔", "t", "true", "yes", "y", "1"])
+_FALSE_WORDS = frozenset(["错", "错误", "否", "不对", "×", "✗", "✘", "x", "f", "false", "no", "n", "0"])
+
+
+def to_halfwidth(text):
+    """全角字母、数字、标点和空格转为半角"""
+    return text.translate(_FULLWIDTH_TABLE)
+
+
+def normalize_text(text):
+    """批改用的规范化：全角转半角、转小写、去掉所有空白"""
+    return _WHITESPACE_RE.sub("", to_halfwidth(text or "").lower())
+
+
+def parse_number(text):
+    """规范化后的文本是一个数（可带百分号）时返回其值，否则返回None"""
+    percent = text.endswith("%")
+    if percent:
+        text = text[:-1]
+    if not _NUMBER_RE.fullmatch(text):
+        return None
+    value = float(text)
+    return value / 100 if percent else value
+
+
+def split_alternatives(correct_answer):
+    """拆分多个可接受的答案；只有以 ALTERNATIVES_PREFIX 开头的答案才按 "||" 拆分"""
+    text = (correct_answer or "").strip()
+    if not text.startswith(ALTERNATIVES_PREFIX):
+        return [text] if text else []
+    parts = [part.strip() for part in text[len(ALTERNATIVES_PREFIX):].split(ALTERNATIVE_SEPARATOR)]
+    return [part for part in parts if part]
+
+
+class TextGrader:
+    """填空、解答题：规范化后比较文本，数值允许误差，支持正则答案"""
+
+    def __init__(self, rel_tol=1e-6, abs_tol=1e-9):
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+
+    def prepare(self, correct_answer):
+        """预先解析正确答案，返回 [(正则, None, None) 或 (None, 规范化文本, 数值)]"""
+        key = []
+        for answer in split_alternatives(correct_answer):
+            if answer.startswith(REGEX_PREFIX):
+                try:
+                    pattern = re.compile(answer[len(REGEX_PREFIX):].strip(), re.IGNORECASE)
+                except re.error:
+                    pass  # 不是有效的正则表达式，按普通文本比较
+                else:
+                    key.append((pattern, None, None))
+                    continue
+            text = normalize_text(answer)
+            key.append((None, text, parse_number(text)))
+        return key
+
+    def match(self, key, user_answer):
+        text = normalize_text(user_answer)
+        number = None
+        for pattern, expected, expected_number in key:
+            if pattern is not None:
+                if pattern.fullmatch(to_halfwidth(user_answer).strip()):
+                    return True
+            elif text == expected:
+                return True
+            elif expected_number is not None:
+                if number is None:
+                    number = parse_number(text)
+                if number is not None and math.isclose(
+                    number, expected_number, rel_tol=self.rel_tol, abs_tol=self.abs_tol
+                ):
+                    return True
+        return False
+
+
+class ChoiceGrader:
+    """单选、多选题：比较选中的选项集合，与顺序和分隔符无关"""
+
+    @staticmethod
+    def choices(answer):
+        text = to_halfwidth(answer or "").strip().upper()
+        parts = [part for part in _CHOICE_SEPARATOR_RE.split(text) if part]
+        # 没有分隔符的 "AC" 拆成单个字母
+        if len(parts) == 1 and parts[0].isalpha() and parts[0].isascii():
+            parts = list(parts[0])
+        return frozenset(parts)
+
+    def prepare(self, correct_answer):
+        return [self.choices(answer) for answer in split_alternatives(correct_answer)]
+
+    def match(self, key, user_answer):
+        return self.choices(user_answer) in key
+
+
+class JudgeGrader:
+    """判断题：对/错的各种写法视为相同"""
+
+    @staticmethod
+    def canonical(answer):
+        text = normalize_text(answer)
+        if text in _TRUE_WORDS:
+            return True
+        if text in _FALSE_WORDS:
+            return False
+        return text
+
+    def prepare(self, correct_answer):
+        return {self.canonical(answer) for answer in split_alternatives(correct_answer)}
+
+    def match(self, key, user_answer):
+        return self.canonical(user_answer) in key
+
+
+# 题目类型 -> 批改器，未登记的类型按文本批改
+GRADERS = {
+    "单选": ChoiceGrader(),
+    "多选": ChoiceGrader(),
+    "判断": JudgeGrader(),
+    "填空": TextGrader(),
+    "解答": TextGrader(),
+}
+DEFAULT_GRADER = TextGrader()
+
+
+def register_grader(question_type, grader):
+    """为题目类型登记批改器（需提供 prepare 和 match 方法）"""
+    GRADERS[question_type] = grader
+
+
+def get_grader(question_type):
+    return GRADERS.get(question_type, DEFAULT_GRADER)
+
+
+class AnswerGrader:
+    """批改作答，并按错题ID缓存解析好的正确答案"""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._cache = {}  # {mistake_id: (题目类型, 正确答案, 解析结果)}
+
+    def _prepared(self, mistake_id, question_type, correct_answer):
+        cached = self._cache.get(mistake_id)
+        if cached is not None and cached[0] == question_type and cached[1] == correct_answer:
+            return cached[2]
+        key = get_grader(question_type).prepare(correct_answer)
+        if len(self._cache) >= self.max_entries:
+            self._cache.clear()
+        self._cache[mistake_id] = (question_type, correct_answer, key)
+        return key
+
+    def grade(self, mistake_id, question_type, correct_answer, user_answer):
+        """判断作答是否正确"""
+        key = self._prepared(mistake_id, question_type, correct_answer)
+        return get_grader(question_type).match(key, user_answer)
+
+    def grade_many(self, items):
+        """批量批改，items 中每项为 (错题ID, 题目类型, 正确答案, 作答)，返回结果列表"""
+        return [self.grade(*item) for item in items]
+
+    def invalidate(self, mistake_id=None):
+        """清除某道题（或全部）的缓存"""
+        if mistake_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(mistake_id, None)
+
+
+# 全局共享的批改器
+default_grader = AnswerGrader()
+
+
+def check_answer(question_type, user_answer, correct_answer):
+    """判断作答是否正确（不使用缓存）"""
+    grader = get_grader(question_type)
+    return grader.match(grader.prepare(correct_answer), user_answer)
+
+
+def grade_mistake(mistake, user_answer):
+    """批改一道错题（Mistake），使用全局缓存"""
+    return default_grader.grade(mistake.id, mistake.question_type, mistake.correct_answer, user_answer)
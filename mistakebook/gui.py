@@ -0,0 +1,1807 @@
+"""错题本的图形界面（tkinter）"""
+import base64
+import bisect
+import logging
+import os
+import queue
+import tkinter as tk
+from datetime import datetime
+from functools import partial
+from tkinter import ttk, messagebox, simpledialog, scrolledtext, filedialog
+
+from .cache import LRUCache
+from .grading import grade_mistake
+from .models import LIST_COLUMNS, review_order
+from .session import PracticeSession
+from .storage import MistakeBook
+from .worker import AsyncMistakeBook
+
+logger = logging.getLogger(__name__)
+
+
+class MistakeBookGUI:
+    # 错题列表每次从数据库读取的行数
+    PAGE_SIZE = 200
+    # 检查后台查询结果的间隔（毫秒）
+    POLL_INTERVAL = 20
+    # 最多缓存多少道题的详情
+    DETAIL_CACHE_SIZE = 128
+    # 筛选条件改变后等待多久再查询（毫秒），连续修改时只查询最后一次
+    LOAD_DELAY = 250
+    # 一次收到超过这么多道新错题时重新加载列表，而不是逐行插入
+    PATCH_INSERT_LIMIT = 20
+    # 最多缓存多少张附件缩略图，以及查看原图时的最大边长
+    THUMBNAIL_CACHE_SIZE = 64
+    IMAGE_VIEW_SIZE = 800
+    # 后台每批计算多少道题的相似题签名，一批完成后才提交下一批，不会长时间占用数据库线程
+    BACKFILL_BATCH = 200
+    # 每隔多久更新一次查询规划器的统计信息（毫秒）
+    OPTIMIZE_INTERVAL = 3600 * 1000
+    
+    def __init__(self, root, book_factory=MistakeBook, profiler=None):
+        self.root = root
+        self.root.title("Python电子错题本（含在线作答）")
+        self.root.geometry("1100x800")
+        
+        # 启用性能分析时，给数据库方法和SQL加上计时
+        self.profiler = profiler
+        if profiler is not None:
+            from .profiling import profile_book
+            open_book = book_factory
+            
+            def book_factory():
+                return profile_book(open_book(), profiler)
+        
+        # 创建错题本实例，数据库操作在后台线程中执行
+        self.mistake_book = AsyncMistakeBook(book_factory)
+        self.current_mistake_id = None
+        self.current_question_type = None
+        
+        # 最近查看过的错题详情 {mistake_id: (mistake, options, reviews, 详情文本, 附件)}
+        # 本程序修改、删除错题或记录复习时失效，"刷新"按钮清空全部
+        self.detail_cache = LRUCache(self.DETAIL_CACHE_SIZE)
+        # 附件缩略图 {缩略图路径: PhotoImage}，详情页和作答页共用
+        self.thumbnail_images = LRUCache(self.THUMBNAIL_CACHE_SIZE)
+        
+        # 后台查询结果队列，以及每个通道最新请求的编号
+        self.async_results = queue.Queue()
+        self.async_tokens = {}
+        self.patch_serial = 0
+        
+        # 写操作提交后数据库发出变化通知，列表据此就地更新；
+        # 连接远程服务时没有通知，写操作后重新加载列表
+        self.change_events = queue.Queue()
+        try:
+            self.mistake_book.add_listener(lambda kind, ids: self.change_events.put((kind, ids)))
+            self.live_updates = True
+        except AttributeError:
+            self.live_updates = False
+        # 附件文件保存在数据库所在的电脑上，连接远程服务时不显示附件
+        self.attachments_enabled = self.live_updates
+        
+        # 分页加载状态
+        self.pending_load = None  # 等待执行的 load_mistakes（root.after 的编号）
+        self.list_query = ("", False)  # 当前列表的搜索词和是否只显示到期错题
+        self.list_filters = None  # 当前列表的筛选条件
+        self.list_last_key = None  # 已加载的最后一行的排序键，作为下一页的起点
+        self.list_boundary = None  # 同一行按 sort_key() 的排序键，之后的行还没有加载
+        self.list_sort_keys = {}  # 列表中每一行的排序键 {行ID: sort_key()}
+        self.list_exhausted = True  # 是否已加载全部结果
+        self.list_page_pending = False  # 是否已安排加载下一页
+        self.list_total = 0
+        self.list_capped = False  # 结果数量达到上限，实际总数可能更多
+        self.list_loaded = 0
+        
+        # 创建界面
+        self.create_widgets()
+        
+        # 加载数据
+        self.load_mistakes()
+        
+        # 绑定关闭事件
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # 开始接收后台查询结果
+        self.root.after(self.POLL_INTERVAL, self.poll_async_results)
+        self.refresh_dashboard()
+        self.backfill_signatures()
+        self.root.after(self.OPTIMIZE_INTERVAL, self.optimize_database)
+    
+    def run_async(self, channel, callback, method, *args, **kwargs):
+        """在后台线程执行数据库操作，完成后在界面线程中调用 callback(result)
+        
+        同一通道中只有最新一次请求的结果会被处理，被新请求取代的结果直接丢弃。
+        """
+        token = self.async_tokens.get(channel, 0) + 1
+        self.async_tokens[channel] = token
+        future = self.mistake_book.submit(method, *args, **kwargs)
+        future.add_done_callback(
+            lambda f: self.async_results.put((channel, token, callback, f))
+        )
+    
+    def poll_async_results(self):
+        """在界面线程中分发已完成的后台查询结果
+        
+        回调出错时记录日志并继续处理其余结果，轮询不会因此停止。
+        """
+        try:
+            while True:
+                try:
+                    channel, token, callback, future = self.async_results.get_nowait()
+                except queue.Empty:
+                    break
+                if self.async_tokens.get(channel) != token:
+                    continue  # 已被更新的请求取代
+                try:
+                    result = future.result()
+                except Exception as e:
+                    messagebox.showerror("错误", f"数据库操作失败: {e}")
+                    continue
+                try:
+                    callback(result)
+                except Exception:
+                    logger.exception("处理后台查询结果时出错（通道 %s）", channel)
+            
+            # 合并处理这段时间内收到的数据变化
+            events = []
+            while True:
+                try:
+                    events.append(self.change_events.get_nowait())
+                except queue.Empty:
+                    break
+            if events:
+                try:
+                    self.apply_changes(events)
+                except Exception:
+                    logger.exception("更新错题列表时出错")
+        finally:
+            self.root.after(self.POLL_INTERVAL, self.poll_async_results)
+    
+    def create_widgets(self):
+        # 创建主框架
+        main_frame = ttk.Frame(self.root)
+        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 创建筛选面板
+        filter_frame = ttk.LabelFrame(main_frame, text="筛选条件")
+        filter_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        # 科目选择
+        ttk.Label(filter_frame, text="科目:").grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        self.subject_var = tk.StringVar()
+        self.subject_combo = ttk.Combobox(filter_frame, textvariable=self.subject_var)
+        self.subject_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+        self.subject_combo['values'] = ['']  # 科目和标签在列表加载完成后填充
+        self.subject_combo.bind("<<ComboboxSelected>>", self.schedule_load)
+        
+        # 题目类型选择
+        ttk.Label(filter_frame, text="类型:").grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        self.type_var = tk.StringVar()
+        self.type_combo = ttk.Combobox(filter_frame, textvariable=self.type_var)
+        self.type_combo.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
+        self.type_combo['values'] = [''] + list(MistakeBook.QUESTION_TYPES)
+        self.type_combo.bind("<<ComboboxSelected>>", self.schedule_load)
+        
+        # 难度选择
+        ttk.Label(filter_frame, text="难度:").grid(row=0, column=4, padx=5, pady=5, sticky=tk.W)
+        self.difficulty_var = tk.StringVar()
+        self.difficulty_combo = ttk.Combobox(filter_frame, textvariable=self.difficulty_var)
+        self.difficulty_combo.grid(row=0, column=5, padx=5, pady=5, sticky=tk.W)
+        self.difficulty_combo['values'] = [''] + [str(d) for d in MistakeBook.DIFFICULTIES]
+        self.difficulty_combo.bind("<<ComboboxSelected>>", self.schedule_load)
+        
+        # 标签选择
+        ttk.Label(filter_frame, text="标签:").grid(row=0, column=6, padx=5, pady=5, sticky=tk.W)
+        self.tag_var = tk.StringVar()
+        self.tag_combo = ttk.Combobox(filter_frame, textvariable=self.tag_var)
+        self.tag_combo.grid(row=0, column=7, padx=5, pady=5, sticky=tk.W)
+        self.tag_combo['values'] = ['']
+        self.tag_combo.bind("<<ComboboxSelected>>", self.schedule_load)
+        
+        # 刷新按钮
+        ttk.Button(filter_frame, text="刷新", command=self.refresh).grid(
+            row=0, column=8, padx=5, pady=5
+        )
+        
+        # 添加错题按钮
+        ttk.Button(filter_frame, text="添加错题", command=self.add_mistake).grid(
+            row=0, column=9, padx=5, pady=5
+        )
+        
+        # 导出、导入按钮
+        ttk.Button(filter_frame, text="导出", command=self.export_book).grid(
+            row=0, column=10, padx=5, pady=5
+        )
+        ttk.Button(filter_frame, text="导入", command=self.import_book).grid(
+            row=1, column=10, padx=5, pady=5
+        )
+        
+        # 限时练习按钮
+        ttk.Button(filter_frame, text="开始练习", command=self.start_practice).grid(
+            row=0, column=11, padx=5, pady=5
+        )
+        
+        # 性能报告（仅在启用性能分析时显示）
+        if self.profiler is not None:
+            ttk.Button(filter_frame, text="性能", command=self.show_profile).grid(
+                row=1, column=11, padx=5, pady=5
+            )
+        
+        # 全文搜索
+        ttk.Label(filter_frame, text="搜索:").grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var)
+        search_entry.grid(row=1, column=1, columnspan=7, padx=5, pady=5, sticky=tk.EW)
+        search_entry.bind("<Return>", self.load_mistakes)
+        ttk.Button(filter_frame, text="搜索", command=self.load_mistakes).grid(
+            row=1, column=8, padx=5, pady=5
+        )
+        
+        # 只显示今天需要复习的错题
+        self.due_only_var = tk.BooleanVar()
+        ttk.Checkbutton(
+            filter_frame, text="今日复习", variable=self.due_only_var, command=self.schedule_load
+        ).grid(row=1, column=9, padx=5, pady=5)
+        
+        # 创建主内容区
+        content_frame = ttk.Frame(main_frame)
+        content_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # 创建错题列表框架（左侧）
+        list_frame = ttk.LabelFrame(content_frame, text="错题列表")
+        list_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 5))
+        list_frame.config(width=500)
+        self.list_frame = list_frame
+        
+        # 错题列表
+        columns = ("id", "subject", "type", "question", "diff", "reviews")
+        self.mistake_tree = ttk.Treeview(
+            list_frame, columns=columns, show="headings", selectmode="browse"
+        )
+        
+        # 设置列宽和标题
+        self.mistake_tree.column("id", width=40, anchor=tk.CENTER)
+        self.mistake_tree.column("subject", width=80, anchor=tk.W)
+        self.mistake_tree.column("type", width=50, anchor=tk.CENTER)
+        self.mistake_tree.column("question", width=270, anchor=tk.W)
+        self.mistake_tree.column("diff", width=50, anchor=tk.CENTER)
+        self.mistake_tree.column("reviews", width=50, anchor=tk.CENTER)
+        
+        self.mistake_tree.heading("id", text="ID")
+        self.mistake_tree.heading("subject", text="科目")
+        self.mistake_tree.heading("type", text="类型")
+        self.mistake_tree.heading("question", text="题目")
+        self.mistake_tree.heading("diff", text="难度")
+        self.mistake_tree.heading("reviews", text="复习")
+        
+        # 添加滚动条
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.mistake_tree.yview)
+        self.list_scrollbar = scrollbar
+        # 滚动到接近底部时加载下一页
+        self.mistake_tree.configure(yscroll=self.on_list_scroll)
+        
+        # 布局
+        self.mistake_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # 绑定选择事件
+        self.mistake_tree.bind("<<TreeviewSelect>>", self.show_mistake_details)
+        
+        # 创建错题详情和作答区（右侧）
+        detail_frame = ttk.LabelFrame(content_frame, text="错题详情与作答")
+        detail_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        
+        # 创建详情标签页
+        self.detail_notebook = ttk.Notebook(detail_frame)
+        self.detail_notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        # 详情标签
+        info_tab = ttk.Frame(self.detail_notebook)
+        self.detail_notebook.add(info_tab, text="详情")
+        
+        # 作答标签
+        answer_tab = ttk.Frame(self.detail_notebook)
+        self.detail_notebook.add(answer_tab, text="作答")
+        
+        # 统计标签
+        stats_tab = ttk.Frame(self.detail_notebook)
+        self.detail_notebook.add(stats_tab, text="统计")
+        
+        # 初始化各个标签页内容
+        self.init_info_tab(info_tab)
+        self.init_answer_tab(answer_tab)
+        self.init_stats_tab(stats_tab)
+        
+        # 默认显示详情标签页
+        self.detail_notebook.select(0)
+    
+    def init_info_tab(self, parent):
+        """初始化详情标签页内容"""
+        # 详情内容
+        detail_frame = ttk.Frame(parent)
+        detail_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 详情文本
+        self.info_text = scrolledtext.ScrolledText(detail_frame, wrap=tk.WORD)
+        self.info_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.info_text.config(state=tk.DISABLED)
+        
+        # 附件缩略图
+        self.info_attachments = AttachmentStrip(detail_frame, self.thumbnail_images, self.open_attachment)
+        self.info_attachments.frame.pack(fill=tk.X, padx=5)
+        
+        # 操作按钮
+        button_frame = ttk.Frame(detail_frame)
+        button_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(button_frame, text="编辑", command=self.edit_mistake).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="删除", command=self.delete_mistake).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="去练习", command=lambda: self.detail_notebook.select(1)).pack(side=tk.LEFT, padx=5)
+    
+    def init_answer_tab(self, parent):
+        """初始化作答标签页内容"""
+        # 作答区框架
+        answer_frame = ttk.Frame(parent)
+        answer_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 题目显示区域
+        self.question_frame = ttk.LabelFrame(answer_frame, text="题目")
+        self.question_frame.pack(fill=tk.X, pady=5)
+        
+        # 题目类型标签
+        self.type_label = ttk.Label(self.question_frame, text="", font=("Arial", 10, "bold"))
+        self.type_label.pack(anchor=tk.W, padx=5, pady=2)
+        
+        # 题目内容
+        self.question_text = tk.Text(self.question_frame, height=6, wrap=tk.WORD)
+        self.question_text.pack(fill=tk.X, padx=5, pady=5)
+        self.question_text.config(state=tk.DISABLED)
+        
+        # 题目附带的图片
+        self.question_attachments = AttachmentStrip(
+            self.question_frame, self.thumbnail_images, self.open_attachment
+        )
+        self.question_attachments.frame.pack(fill=tk.X, padx=5)
+        
+        # 选项区域（单选、多选使用）
+        self.options_frame = ttk.Frame(answer_frame)
+        self.options_frame.pack(fill=tk.X, pady=5)
+        self.option_vars = {}  # 存储选项变量
+        self.option_buttons = {}  # 存储选项按钮
+        self.option_pool = OptionButtonPool(self.options_frame, self.profiler)
+        
+        # 答案输入区域（填空、解答等使用）
+        self.answer_frame = ttk.LabelFrame(answer_frame, text="作答区")
+        self.answer_frame.pack(fill=tk.X, pady=5)
+        
+        self.answer_entry = scrolledtext.ScrolledText(self.answer_frame, height=5, wrap=tk.WORD)
+        self.answer_entry.pack(fill=tk.BOTH, padx=5, pady=5, expand=True)
+        
+        # 底部按钮
+        button_frame = ttk.Frame(answer_frame)
+        button_frame.pack(fill=tk.X, pady=10)
+        
+        ttk.Button(button_frame, text="提交答案", command=self.submit_answer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="显示答案", command=self.show_correct_answer).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="重新作答", command=self.reset_answer).pack(side=tk.LEFT, padx=5)
+    
+    def init_stats_tab(self, parent):
+        """初始化统计标签页内容"""
+        # 统计信息框架
+        stats_frame = ttk.Frame(parent)
+        stats_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 整体统计
+        summary_frame = ttk.LabelFrame(stats_frame, text="整体统计")
+        summary_frame.pack(fill=tk.X, pady=5)
+        
+        self.summary_text = tk.Text(summary_frame, height=5, wrap=tk.WORD)
+        self.summary_text.pack(fill=tk.X, padx=5, pady=5)
+        self.summary_text.config(state=tk.DISABLED)
+        
+        # 全部错题的学习概况
+        dashboard_frame = ttk.LabelFrame(stats_frame, text="学习概况")
+        dashboard_frame.pack(fill=tk.X, pady=5)
+        
+        self.dashboard_text = tk.Text(dashboard_frame, height=8, wrap=tk.WORD)
+        self.dashboard_text.pack(fill=tk.X, padx=5, pady=5)
+        self.dashboard_text.config(state=tk.DISABLED)
+        
+        # 复习记录
+        review_frame = ttk.LabelFrame(stats_frame, text="复习记录")
+        review_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # 复习记录列表
+        columns = ("date", "result", "answer")
+        self.review_tree = ttk.Treeview(
+            review_frame, columns=columns, show="headings", selectmode="browse"
+        )
+        
+        # 设置列宽和标题
+        self.review_tree.column("date", width=150, anchor=tk.W)
+        self.review_tree.column("result", width=50, anchor=tk.CENTER)
+        self.review_tree.column("answer", width=300, anchor=tk.W)
+        
+        self.review_tree.heading("date", text="日期")
+        self.review_tree.heading("result", text="结果")
+        self.review_tree.heading("answer", text="你的答案")
+        
+        # 添加滚动条
+        scrollbar = ttk.Scrollbar(review_frame, orient=tk.VERTICAL, command=self.review_tree.yview)
+        self.review_tree.configure(yscroll=scrollbar.set)
+        
+        # 布局
+        self.review_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    
+    def refresh(self):
+        """清空详情缓存并重新加载列表（用于看到其他程序对数据库的修改）"""
+        self.detail_cache.clear()
+        self.load_mistakes()
+        self.show_mistake_details(None)
+        self.refresh_dashboard()
+    
+    def schedule_load(self, event=None):
+        """筛选条件改变后稍后加载列表，连续修改时只执行最后一次查询"""
+        if self.pending_load is not None:
+            self.root.after_cancel(self.pending_load)
+        self.pending_load = self.root.after(self.LOAD_DELAY, self.load_mistakes)
+    
+    def reload_after_write(self):
+        """写操作后刷新列表；能收到变化通知时列表会就地更新，不需要重新加载"""
+        if not self.live_updates:
+            self.load_mistakes()
+            self.backfill_signatures()
+    
+    def backfill_signatures(self):
+        """在后台分批为新添加或修改过的错题计算相似题签名，直到全部算完"""
+        def done(count):
+            if count:
+                self.root.after_idle(self.backfill_signatures)
+        
+        self.run_async("backfill", done, "backfill_minhash", self.BACKFILL_BATCH)
+    
+    def optimize_database(self):
+        """界面长时间打开时定期在后台更新统计信息"""
+        self.run_async("optimize", lambda done: None, "optimize")
+        self.root.after(self.OPTIMIZE_INTERVAL, self.optimize_database)
+    
+    def load_mistakes(self, event=None):
+        """加载错题列表（只加载第一页，其余在滚动时按需加载）"""
+        if self.pending_load is not None:
+            self.root.after_cancel(self.pending_load)
+            self.pending_load = None
+        
+        # 获取筛选条件
+        subject = self.subject_var.get() if self.subject_var.get() != "" else None
+        tag = self.tag_var.get() if self.tag_var.get() != "" else None
+        q_type = self.type_var.get() if self.type_var.get() != "" else None
+        difficulty = self.difficulty_var.get() if self.difficulty_var.get() != "" else None
+        keyword = self.search_var.get().strip()
+        due_only = self.due_only_var.get()
+        
+        filters = (subject, tag, q_type, difficulty)
+        page_size = self.PAGE_SIZE
+        
+        # 结果返回前不再加载后续页
+        self.list_exhausted = True
+        self.list_page_pending = False
+        
+        def fetch(book):
+            # 有搜索词时按相关度排序，复习队列按到期时间排序（结果数量有限，不分页）
+            if keyword:
+                mistakes = book.search_mistakes(
+                    keyword, *filters, limit=page_size, columns=LIST_COLUMNS
+                )
+                total = len(mistakes)
+            elif due_only:
+                mistakes = book.get_due_mistakes(page_size, *filters, columns=LIST_COLUMNS)
+                total = len(mistakes)
+            else:
+                total = book.count_mistakes(*filters)
+                mistakes = book.get_mistakes_page(*filters, limit=page_size, columns=LIST_COLUMNS)
+            return mistakes, total, book.get_subjects(), book.get_tags()
+        
+        def done(result):
+            mistakes, total, subjects, tags = result
+            children = self.mistake_tree.get_children()
+            if self.profiler is not None:
+                self.profiler.start_batch("load_mistakes")
+                self.profiler.count("treeview_delete", len(children))
+            self.mistake_tree.delete(*children)
+            self.list_sort_keys = {}
+            self.list_query = (keyword, due_only)
+            self.list_filters = filters
+            self.list_total = total
+            # 搜索和复习队列最多取一页，取满时总数未知
+            self.list_capped = (bool(keyword) or due_only) and len(mistakes) >= page_size
+            self.list_loaded = 0
+            self.list_exhausted = bool(keyword) or due_only or len(mistakes) < page_size
+            self.list_last_key = self.page_key(mistakes[-1]) if mistakes else None
+            self.list_boundary = self.sort_key(mistakes[-1]) if mistakes else None
+            self.insert_mistake_rows(mistakes)
+            
+            # 更新筛选条件的选项列表
+            self.subject_combo['values'] = [''] + subjects
+            self.tag_combo['values'] = [''] + tags
+        
+        self.run_async("list", done, fetch)
+    
+    def load_next_page(self):
+        """加载错题列表的下一页"""
+        if self.list_exhausted:
+            self.list_page_pending = False
+            return
+        
+        def done(mistakes):
+            self.list_page_pending = False
+            if len(mistakes) < self.PAGE_SIZE:
+                self.list_exhausted = True
+            if mistakes:
+                self.list_last_key = self.page_key(mistakes[-1])
+                self.list_boundary = self.sort_key(mistakes[-1])
+            self.insert_mistake_rows(mistakes)
+        
+        # 与 load_mistakes 共用通道，筛选条件改变后旧的分页结果会被丢弃
+        self.run_async(
+            "list", done, "get_mistakes_page",
+            *self.list_filters, after=self.list_last_key, limit=self.PAGE_SIZE, columns=LIST_COLUMNS
+        )
+    
+    @staticmethod
+    def page_key(mistake):
+        """下一页从这一行之后开始（见 get_mistakes_page 的 after 参数）"""
+        return (mistake.last_review, mistake.add_date, mistake.id)
+    
+    def sort_key(self, mistake):
+        """错题在当前列表中的排序键，与查询的排序相同（复习队列按到期时间）"""
+        if self.list_query[1]:
+            return (mistake.due_date or "", mistake.id)
+        return review_order(mistake) + (mistake.id,)
+    
+    @staticmethod
+    def mistake_row_values(mistake):
+        """错题在列表中一行的内容（只用到 LIST_COLUMNS 中的列）"""
+        # 计算复习进度百分比
+        reviews = mistake.review_count
+        correct = mistake.correct_count
+        progress = f"{correct}/{reviews}" if reviews > 0 else "未复习"
+        
+        return (
+            mistake.id,
+            mistake.subject,
+            mistake.question_type,
+            mistake.preview,  # 题目预览，在SQL中截取
+            mistake.difficulty,
+            progress
+        )
+    
+    def insert_mistake_rows(self, mistakes):
+        """把错题添加到列表末尾并更新计数"""
+        inserted = 0
+        for mistake in mistakes:
+            # 以错题ID作为行的标识，收到变化通知时按ID更新；已在列表中的行不再重复添加
+            iid = str(mistake.id)
+            if self.mistake_tree.exists(iid):
+                continue
+            self.mistake_tree.insert("", tk.END, iid=iid, values=self.mistake_row_values(mistake))
+            self.list_sort_keys[iid] = self.sort_key(mistake)
+            inserted += 1
+        self.list_loaded += inserted
+        if self.profiler is not None:
+            self.profiler.count("treeview_insert", inserted)
+        self.update_list_title()
+    
+    def update_list_title(self):
+        total = f"{self.list_total}+" if self.list_capped else self.list_total
+        self.list_frame.config(text=f"错题列表（已加载 {self.list_loaded} / 共 {total}）")
+    
+    def remove_mistake_row(self, mistake_id):
+        """从列表中移除一行（如果存在）"""
+        iid = str(mistake_id)
+        if self.mistake_tree.exists(iid):
+            self.mistake_tree.delete(iid)
+            self.list_sort_keys.pop(iid, None)
+            self.list_loaded -= 1
+            self.list_total -= 1
+            if self.profiler is not None:
+                self.profiler.count("treeview_delete")
+    
+    def place_mistake_row(self, mistake):
+        """把新增或修改过的错题放到列表中按排序应在的位置
+        
+        排在已加载范围之后的行不显示，滚动到那里时随下一页加载。
+        """
+        iid = str(mistake.id)
+        key = self.sort_key(mistake)
+        exists = self.mistake_tree.exists(iid)
+        if not self.list_exhausted and self.list_boundary is not None and self.list_boundary < key:
+            if exists:
+                self.mistake_tree.delete(iid)
+                self.list_sort_keys.pop(iid, None)
+                self.list_loaded -= 1
+            return
+        keys = [self.list_sort_keys[child] for child in self.mistake_tree.get_children() if child != iid]
+        index = bisect.bisect_left(keys, key)
+        values = self.mistake_row_values(mistake)
+        if exists:
+            self.mistake_tree.item(iid, values=values)
+            self.mistake_tree.move(iid, "", index)
+        else:
+            self.mistake_tree.insert("", index, iid=iid, values=values)
+            self.list_loaded += 1
+            if self.profiler is not None:
+                self.profiler.count("treeview_insert")
+        self.list_sort_keys[iid] = key
+    
+    def apply_changes(self, events):
+        """根据数据变化通知就地更新列表中受影响的行，不重新加载整个列表
+        
+        单独添加的错题按排序插入到已加载的范围内；批量添加（如导入）或一次添加
+        很多道题时重新加载列表。
+        """
+        inserted, updated, deleted = set(), set(), set()
+        bulk = False
+        for kind, ids in events:
+            {"inserted": inserted, "updated": updated, "deleted": deleted}[kind].update(ids)
+            bulk = bulk or (kind == "inserted" and len(ids) > 1)
+        inserted -= deleted
+        updated -= deleted | inserted
+        
+        if self.profiler is not None:
+            self.profiler.start_batch("apply_changes")
+        for mistake_id in deleted | updated:
+            self.detail_cache.pop(mistake_id)
+        for mistake_id in deleted:
+            self.remove_mistake_row(mistake_id)
+        if inserted or updated:
+            self.backfill_signatures()
+        
+        keyword, due_only = self.list_query
+        if inserted and (keyword or bulk or len(inserted) > self.PATCH_INSERT_LIMIT):
+            # 搜索结果按相关度排序，新错题需要重新搜索才能放到正确的位置；
+            # 导入等批量添加的错题可能分布在列表的任何位置，重新加载第一页
+            self.load_mistakes()
+            return
+        
+        # 只需要查询列表中已有的行和新添加的错题
+        ids = [mistake_id for mistake_id in updated if self.mistake_tree.exists(str(mistake_id))]
+        ids.extend(inserted)
+        if not ids:
+            self.update_list_title()
+            return
+        filters = self.list_filters
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        def fetch(book):
+            rows = book.get_mistakes_by_ids(ids, *filters, columns=LIST_COLUMNS)
+            return rows, book.get_subjects(), book.get_tags()
+        
+        def done(result):
+            self.async_tokens.pop(channel, None)
+            if self.list_filters != filters:
+                return  # 列表已按新的筛选条件重新加载
+            rows, subjects, tags = result
+            matched = {row.id: row for row in rows}
+            for mistake_id in ids:
+                iid = str(mistake_id)
+                row = matched.get(mistake_id)
+                if row is not None and due_only and row.due_date > now:
+                    row = None  # 复习后不再到期
+                if row is None:
+                    # 修改后不再满足筛选条件
+                    self.remove_mistake_row(mistake_id)
+                    continue
+                if mistake_id in inserted:
+                    self.list_total += 1
+                if keyword:
+                    # 搜索结果按相关度排序，只更新内容
+                    self.mistake_tree.item(iid, values=self.mistake_row_values(row))
+                else:
+                    # 复习后排序可能改变，移到新的位置
+                    self.place_mistake_row(row)
+            self.update_list_title()
+            self.subject_combo['values'] = [''] + subjects
+            self.tag_combo['values'] = [''] + tags
+        
+        # 每次更新使用单独的通道，不会互相取代
+        self.patch_serial += 1
+        channel = ("patch", self.patch_serial)
+        self.run_async(channel, done, fetch)
+    
+    def on_list_scroll(self, first, last):
+        """错题列表滚动时更新滚动条，接近底部时加载下一页"""
+        self.list_scrollbar.set(first, last)
+        if not self.list_exhausted and not self.list_page_pending and float(last) > 0.9:
+            # 在空闲时加载，避免在滚动回调中修改列表
+            self.list_page_pending = True
+            self.root.after_idle(self.load_next_page)
+    
+    def show_mistake_details(self, event):
+        """显示选中的错题详情"""
+        selection = self.mistake_tree.selection()
+        if not selection:
+            return
+        
+        item = self.mistake_tree.item(selection[0])
+        mistake_id = item['values'][0]
+        self.current_mistake_id = mistake_id
+        
+        # 看过的错题直接从缓存显示，并丢弃还没返回的旧查询
+        cached = self.detail_cache.get(mistake_id)
+        if cached is not None:
+            self.async_tokens["detail"] = self.async_tokens.get("detail", 0) + 1
+            self.render_mistake_details(cached)
+            return
+        
+        def fetch(book):
+            mistake = book.get_mistake_by_id(mistake_id)
+            if not mistake:
+                return None
+            attachments = self.load_attachments(book, mistake_id) if self.attachments_enabled else []
+            return mistake, book.get_options(mistake), book.get_reviews(mistake_id), attachments
+        
+        def done(result):
+            if result is None:
+                return
+            mistake, options, reviews, attachments = result
+            details = (mistake, options, reviews, self.format_mistake_details(mistake, options),
+                       attachments)
+            self.detail_cache.put(mistake_id, details)
+            self.render_mistake_details(details)
+        
+        # 快速切换选择时只显示最后选中的错题
+        self.run_async("detail", done, fetch)
+    
+    @staticmethod
+    def load_attachments(book, mistake_id):
+        """在数据库线程中读取附件列表和缩略图路径（缩略图第一次需要时生成）"""
+        return [(attachment, book.get_thumbnail(attachment[2]))
+                for attachment in book.get_attachments(mistake_id)]
+    
+    def open_attachment(self, attachment):
+        """在新窗口中查看附件原图（在后台读取和缩放）"""
+        name, fmt = attachment[3], attachment[4]
+        
+        def done(data):
+            if data is None:
+                messagebox.showinfo(
+                    "提示", f"无法显示该附件（{fmt or '未知格式'}），PNG、GIF 以外的图片需要安装 Pillow"
+                )
+                return
+            image = tk.PhotoImage(data=base64.b64encode(data))
+            # 未安装 Pillow 时原图没有缩小，按整数倍缩小到窗口大小以内
+            factor = -(-max(image.width(), image.height()) // self.IMAGE_VIEW_SIZE)
+            if factor > 1:
+                image = image.subsample(factor)
+            window = tk.Toplevel(self.root)
+            window.title(name or "图片")
+            label = ttk.Label(window, image=image)
+            label.image = image  # 保持引用，否则图片会被回收
+            label.pack(padx=5, pady=5)
+        
+        self.run_async("attachment", done, "get_image_data", attachment[2], self.IMAGE_VIEW_SIZE)
+    
+    def invalidate_details(self, *mistake_ids):
+        """错题被修改或复习后，丢弃缓存的详情"""
+        for mistake_id in mistake_ids:
+            self.detail_cache.pop(mistake_id)
+    
+    @staticmethod
+    def format_mistake_details(mistake, options):
+        """生成详情标签页的文本"""
+        detail = f"科目: {mistake.subject}\n"
+        detail += f"类型: {mistake.question_type}\n"
+        detail += f"难度: {mistake.difficulty}星\n"
+        detail += f"添加时间: {mistake.add_date}\n"
+        detail += f"最后复习: {mistake.last_review if mistake.last_review else '未复习'}\n"
+        detail += f"复习次数: {mistake.review_count} (正确: {mistake.correct_count})\n"
+        detail += f"标签: {mistake.tags if mistake.tags else '无'}\n\n"
+        detail += f"题目:\n{mistake.question}\n\n"
+        
+        # 显示选项（如果是选择题）
+        if mistake.question_type in ["单选", "多选"] and options:
+            detail += "选项:\n"
+            for key, value in options.items():
+                detail += f"{key}. {value}\n"
+            detail += "\n"
+                
+        detail += f"错误答案:\n{mistake.wrong_answer if mistake.wrong_answer else '无记录'}\n\n"
+        detail += f"正确答案:\n{mistake.correct_answer}\n\n"
+        detail += f"解析:\n{mistake.explanation if mistake.explanation else '无记录'}\n\n"
+        return detail
+    
+    def render_mistake_details(self, details):
+        """显示错题详情，刷新作答和统计区域"""
+        mistake, options, reviews, detail, attachments = details
+        self.current_question_type = mistake.question_type  # 保存题目类型
+        
+        # 更新详情文本
+        self.info_text.config(state=tk.NORMAL)
+        self.info_text.delete(1.0, tk.END)
+        self.info_text.insert(tk.END, detail)
+        self.info_text.config(state=tk.DISABLED)
+        self.info_attachments.show(attachments)
+        
+        # 更新作答区域
+        self.update_answer_tab(mistake, options, attachments)
+        
+        # 更新统计区域
+        self.update_stats_tab(mistake, reviews)
+    
+    def update_answer_tab(self, mistake, options=None, attachments=()):
+        """更新作答区域的内容，mistake 为 None 时清空"""
+        # 重置作答区
+        self.answer_entry.delete("1.0", tk.END)
+        self.question_attachments.show(attachments)
+        
+        # 隐藏选项按钮（按钮保留在池中，下一题复用）
+        self.option_pool.hide()
+        self.option_vars = {}
+        self.option_buttons = {}
+        
+        # 清空问题区域
+        self.question_text.config(state=tk.NORMAL)
+        self.question_text.delete("1.0", tk.END)
+        if mistake is None:
+            self.question_text.config(state=tk.DISABLED)
+            self.type_label.config(text="")
+            return
+        self.question_text.insert(tk.END, mistake.question)
+        self.question_text.config(state=tk.DISABLED)
+        
+        # 更新题目类型标签
+        self.type_label.config(text=f"题型: {mistake.question_type}")
+        
+        # 根据题目类型设置作答区域
+        if mistake.question_type in ["单选", "多选"]:
+            # 显示选项
+            if options:
+                # 单选按钮或多选框
+                self.option_vars, self.option_buttons = self.option_pool.show(mistake.question_type, options)
+                
+                # 显示选项区，隐藏文本作答区
+                self.options_frame.pack(fill=tk.X, pady=5, after=self.question_frame)
+                self.answer_frame.pack_forget()
+            else:
+                # 没有选项数据（或无法解析），显示文本作答区
+                self.options_frame.pack_forget()
+                self.answer_frame.pack(fill=tk.X, pady=5)
+        
+        else:
+            # 对于填空、判断、解答题，直接显示文本作答区
+            self.options_frame.pack_forget()
+            self.answer_frame.pack(fill=tk.X, pady=5)
+    
+    def update_stats_tab(self, mistake, reviews=()):
+        """更新统计区域的内容，mistake 为 None 时清空"""
+        # 更新整体统计信息
+        self.summary_text.config(state=tk.NORMAL)
+        self.summary_text.delete("1.0", tk.END)
+        if mistake is None:
+            self.summary_text.config(state=tk.DISABLED)
+            self.review_tree.delete(*self.review_tree.get_children())
+            return
+        
+        stats = f"科目: {mistake.subject}\n"
+        stats += f"题型: {mistake.question_type}\n"
+        stats += f"难度: {mistake.difficulty}星\n\n"
+        stats += f"复习次数: {mistake.review_count}\n"
+        stats += f"正确次数: {mistake.correct_count}\n"
+        stats += f"正确率: {int(mistake.correct_count/mistake.review_count*100) if mistake.review_count > 0 else 0}%\n"
+        stats += f"最后一次复习: {mistake.last_review if mistake.last_review else '从未'}\n"
+        if mistake.review_count > len(reviews):
+            # 下面的列表只有未归档的最近记录
+            stats += f"（更早的 {mistake.review_count - len(reviews)} 次复习记录已归档）\n"
+        
+        self.summary_text.insert(tk.END, stats)
+        self.summary_text.config(state=tk.DISABLED)
+        
+        # 更新复习记录列表
+        self.review_tree.delete(*self.review_tree.get_children())
+        
+        for review in reviews:
+            result = "✓" if review[3] else "✗"
+            self.review_tree.insert("", tk.END, values=(
+                review[2],  # 日期
+                result,
+                review[4] if review[4] else "无记录"  # 用户答案
+            ))
+    
+    def refresh_dashboard(self):
+        """在后台读取学习概况并刷新统计页"""
+        self.run_async("dashboard", self.render_dashboard, "get_dashboard")
+    
+    def render_dashboard(self, dashboard):
+        """显示学习概况：总体正确率、最近7天、各科目和薄弱标签"""
+        text = f"累计复习: {dashboard['total_reviews']} 次，"
+        text += f"正确率: {int(dashboard['accuracy'] * 100)}%\n"
+        
+        recent = dashboard["daily"][-7:]
+        if recent:
+            text += "最近复习: " + "，".join(
+                f"{day[5:]} {correct}/{reviews}" for day, reviews, correct in recent
+            ) + "\n"
+        for subject, q_type, reviews, correct in dashboard["subjects"]:
+            text += f"{subject}·{q_type}: {correct}/{reviews} ({int(correct / reviews * 100)}%)\n"
+        if dashboard["weakest_tags"]:
+            text += "薄弱标签: " + "，".join(
+                f"{tag} {int(correct / reviews * 100)}%"
+                for tag, reviews, correct in dashboard["weakest_tags"]
+            ) + "\n"
+        
+        self.dashboard_text.config(state=tk.NORMAL)
+        self.dashboard_text.delete("1.0", tk.END)
+        self.dashboard_text.insert(tk.END, text)
+        self.dashboard_text.config(state=tk.DISABLED)
+    
+    def submit_answer(self):
+        """提交答案并检查"""
+        if not self.current_mistake_id:
+            messagebox.showinfo("提示", "请先选择一个错题")
+            return
+            
+        # 获取用户答案
+        user_answer = ""
+        
+        if self.current_question_type == "单选":
+            if "单选" in self.option_vars:
+                user_answer = self.option_vars["单选"].get()
+        elif self.current_question_type == "多选":
+            selected = []
+            for key, var in self.option_vars.items():
+                if var.get():
+                    selected.append(key)
+            user_answer = ",".join(selected)
+        else:  # 填空、判断、解答题
+            user_answer = self.answer_entry.get("1.0", tk.END).strip()
+        
+        if not user_answer:
+            messagebox.showinfo("提示", "请输入答案")
+            return
+            
+        mistake_id = self.current_mistake_id
+        
+        def grade(book):
+            # 判断答案是否正确并保存复习记录
+            mistake = book.get_mistake_by_id(mistake_id)
+            if not mistake:
+                return None, None
+            result = grade_mistake(mistake, user_answer)
+            book.add_review(mistake_id, result, user_answer)
+            return mistake, result
+        
+        def done(outcome):
+            mistake, result = outcome
+            if not mistake:
+                return
+            
+            # 显示结果
+            if result:
+                messagebox.showinfo("结果", "回答正确！")
+            else:
+                messagebox.showinfo("结果", "回答错误！\n正确答案: " + mistake.correct_answer)
+            
+            # 重新加载当前错题详情
+            self.invalidate_details(mistake_id)
+            self.show_mistake_details(None)
+            self.refresh_dashboard()
+        
+        self.run_async("answer", done, grade)
+    
+    def show_correct_answer(self):
+        """显示正确答案"""
+        if not self.current_mistake_id:
+            return
+        
+        def done(mistake):
+            if mistake:
+                messagebox.showinfo("正确答案", mistake.correct_answer)
+        
+        cached = self.detail_cache.get(self.current_mistake_id)
+        if cached:
+            done(cached[0])
+        else:
+            self.run_async("answer", done, "get_mistake_by_id", self.current_mistake_id, ("correct_answer",))
+    
+    def reset_answer(self):
+        """重置作答区域"""
+        # 清空作答区域
+        self.answer_entry.delete("1.0", tk.END)
+        
+        # 重置选项选择
+        for var in self.option_vars.values():
+            if isinstance(var, tk.StringVar):
+                var.set("")
+            elif isinstance(var, tk.BooleanVar):
+                var.set(False)
+    
+    def add_mistake(self):
+        """添加新错题"""
+        AddEditMistakeDialog(
+            self.root, self.run_async, attachments=[] if self.attachments_enabled else None,
+            on_saved=self.reload_after_write
+        )
+    
+    def edit_mistake(self):
+        """编辑错题"""
+        if not self.current_mistake_id:
+            messagebox.showinfo("提示", "请先选择一个错题")
+            return
+        
+        cached = self.detail_cache.get(self.current_mistake_id)
+        if cached:
+            self.open_edit_dialog((cached[0], cached[1], cached[4]))
+            return
+        
+        attachments_enabled = self.attachments_enabled
+        
+        def fetch(book, mistake_id):
+            mistake = book.get_mistake_by_id(mistake_id)
+            if not mistake:
+                return None
+            attachments = self.load_attachments(book, mistake_id) if attachments_enabled else []
+            return mistake, book.get_options(mistake), attachments
+        
+        self.run_async("edit", self.open_edit_dialog, fetch, self.current_mistake_id)
+    
+    def open_edit_dialog(self, details):
+        """显示编辑对话框，details 为 (mistake, options, 附件)"""
+        if details is None:
+            return
+        mistake, options, attachments = details
+        if not self.attachments_enabled:
+            attachments = None
+        
+        def saved():
+            self.invalidate_details(mistake.id)
+            self.reload_after_write()
+            self.show_mistake_details(None)
+        
+        # 对话框不阻塞（这里可能在 poll_async_results 中被调用，不能等待对话框关闭）
+        AddEditMistakeDialog(
+            self.root, self.run_async,
+            mistake_id=mistake.id,
+            subject=mistake.subject,
+            question_type=mistake.question_type,
+            question=mistake.question,
+            options=options,
+            wrong_answer=mistake.wrong_answer,
+            correct_answer=mistake.correct_answer,
+            explanation=mistake.explanation,
+            tags=mistake.tags,
+            difficulty=mistake.difficulty,
+            attachments=attachments,
+            on_saved=saved
+        )
+    
+    def delete_mistake(self):
+        """删除错题"""
+        if not self.current_mistake_id:
+            messagebox.showinfo("提示", "请先选择一个错题")
+            return
+        
+        if not messagebox.askyesno("确认", "确定要删除这个错题吗？"):
+            return
+        
+        mistake_id = self.current_mistake_id
+        self.run_async("delete", lambda result: self.mistake_deleted(mistake_id),
+                       "delete_mistake", mistake_id)
+    
+    def mistake_deleted(self, mistake_id):
+        """删除完成后刷新列表，当前显示的是这道题时清空详情和作答区"""
+        self.invalidate_details(mistake_id)
+        self.reload_after_write()
+        if self.current_mistake_id != mistake_id:
+            return
+        self.current_mistake_id = None
+        
+        # 清空详情和作答区
+        self.info_text.config(state=tk.NORMAL)
+        self.info_text.delete(1.0, tk.END)
+        self.info_text.config(state=tk.DISABLED)
+        self.info_attachments.show([])
+        
+        self.update_answer_tab(None)
+        self.update_stats_tab(None)
+    
+    @staticmethod
+    def reviews_path(path):
+        """与错题文件配套的复习记录文件路径，如 book.jsonl -> book.reviews.jsonl"""
+        base, ext = os.path.splitext(path)
+        return base + ".reviews" + ext
+    
+    def export_book(self):
+        """导出全部错题和复习记录"""
+        path = filedialog.asksaveasfilename(
+            parent=self.root, title="导出错题", defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")]
+        )
+        if not path:
+            return
+        reviews_path = self.reviews_path(path)
+        
+        def export(book):
+            return book.export_mistakes(path), book.export_reviews(reviews_path)
+        
+        def done(counts):
+            messagebox.showinfo(
+                "导出完成", f"已导出 {counts[0]} 道错题、{counts[1]} 条复习记录\n{path}"
+            )
+        
+        self.run_async("transfer", done, export)
+    
+    def import_book(self):
+        """导入错题文件，以及同名的复习记录文件（如果存在）"""
+        path = filedialog.askopenfilename(
+            parent=self.root, title="导入错题",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")]
+        )
+        if not path:
+            return
+        reviews_path = self.reviews_path(path)
+        
+        def do_import(book):
+            mistakes = book.import_mistakes(path)
+            reviews = (0, 0)
+            if os.path.exists(reviews_path):
+                reviews = book.import_reviews(reviews_path)
+            return mistakes, reviews
+        
+        def done(result):
+            (imported, skipped), (reviews, _) = result
+            messagebox.showinfo(
+                "导入完成", f"导入 {imported} 道错题（跳过重复 {skipped} 道），{reviews} 条复习记录"
+            )
+            # 导入的复习记录会改变已有错题的统计
+            self.detail_cache.clear()
+            self.load_mistakes()
+            self.refresh_dashboard()
+        
+        self.run_async("transfer", done, do_import)
+    
+    def start_practice(self):
+        """按当前筛选条件抽题，开始一次限时练习"""
+        count = simpledialog.askinteger(
+            "开始练习", "题目数量:", parent=self.root, initialvalue=10, minvalue=1, maxvalue=200
+        )
+        if not count:
+            return
+        minutes = simpledialog.askinteger(
+            "开始练习", "限时（分钟，0为不限时）:", parent=self.root, initialvalue=0, minvalue=0
+        )
+        if minutes is None:
+            return
+        
+        session = PracticeSession(
+            self.mistake_book, count,
+            subject=self.subject_var.get() or None,
+            tag=self.tag_var.get() or None,
+            question_type=self.type_var.get() or None,
+            difficulty=self.difficulty_var.get() or None,
+            due_only=self.due_only_var.get(),
+            time_limit=minutes * 60 or None,
+        )
+        
+        def done(mistake_ids):
+            if not mistake_ids:
+                messagebox.showinfo("提示", "没有符合条件的错题")
+                return
+            session.start(mistake_ids)
+            PracticeDialog(self.root, session, self.finish_practice)
+        
+        # 在后台抽题
+        self.run_async("practice", done, session.draw)
+    
+    def finish_practice(self, session):
+        """练习结束：一次性提交全部作答结果并显示小结"""
+        def done(summary):
+            messagebox.showinfo(
+                "练习结束",
+                f"作答 {summary['answered']}/{summary['total']} 题，"
+                f"正确 {summary['correct']} 题（{int(summary['accuracy'] * 100)}%）\n"
+                f"总用时 {summary['elapsed']} 秒，平均每题 {summary['average_latency']} 秒"
+            )
+            self.invalidate_details(*(result[0] for result in session.results))
+            self.reload_after_write()
+            self.show_mistake_details(None)
+            self.refresh_dashboard()
+        
+        self.run_async("practice", done, session.commit)
+    
+    def show_profile(self):
+        """显示性能报告：方法和SQL耗时、慢查询、列表和选项控件的增删次数"""
+        top = tk.Toplevel(self.root)
+        top.title("性能报告")
+        top.geometry("900x600")
+        text = scrolledtext.ScrolledText(top, wrap=tk.NONE, font=("Courier", 10))
+        text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        def refresh():
+            text.config(state=tk.NORMAL)
+            text.delete("1.0", tk.END)
+            text.insert(tk.END, self.profiler.report())
+            text.config(state=tk.DISABLED)
+        
+        def reset():
+            self.profiler.reset()
+            refresh()
+        
+        button_frame = ttk.Frame(top)
+        button_frame.pack(fill=tk.X, pady=5)
+        ttk.Button(button_frame, text="刷新", command=refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="清零", command=reset).pack(side=tk.LEFT, padx=5)
+        refresh()
+    
+    def on_close(self):
+        """关闭应用时的处理"""
+        self.mistake_book.close()
+        self.root.destroy()
+
+
+class OptionButtonPool:
+    """作答区的选项按钮池
+    
+    切换题目时不销毁按钮，只修改文字并重新排列；按钮和变量按需创建，
+    数量等于出现过的最多选项数。
+    """
+    
+    def __init__(self, parent, profiler=None):
+        self.parent = parent
+        self.profiler = profiler
+        self.radio_var = tk.StringVar(parent)  # 所有单选按钮共用一个变量
+        self.radios = []
+        self.checks = []  # [(Checkbutton, BooleanVar)]
+        self.visible = []
+    
+    def hide(self):
+        """隐藏正在显示的按钮"""
+        for widget in self.visible:
+            widget.pack_forget()
+        self.visible = []
+    
+    def _created(self):
+        if self.profiler is not None:
+            self.profiler.count("option_widget_create")
+    
+    def show(self, question_type, options):
+        """显示选项，返回 (option_vars, option_buttons)
+        
+        单选题的 option_vars 为 {"单选": 变量}，多选题为 {选项: 变量}。
+        """
+        self.hide()
+        option_vars = {}
+        option_buttons = {}
+        for index, (key, value) in enumerate(options.items()):
+            if question_type == "单选":
+                if index == len(self.radios):
+                    self.radios.append(ttk.Radiobutton(self.parent, variable=self.radio_var))
+                    self._created()
+                button = self.radios[index]
+                button.config(text=f"{key}. {value}", value=key)
+                option_vars["单选"] = self.radio_var
+            else:
+                if index == len(self.checks):
+                    var = tk.BooleanVar(self.parent)
+                    self.checks.append((ttk.Checkbutton(self.parent, variable=var), var))
+                    self._created()
+                button, var = self.checks[index]
+                button.config(text=f"{key}. {value}")
+                var.set(False)
+                option_vars[key] = var
+            button.pack(anchor=tk.W, padx=5, pady=2)
+            option_buttons[key] = button
+            self.visible.append(button)
+        self.radio_var.set("")
+        return option_vars, option_buttons
+
+
+class AttachmentStrip:
+    """一排附件缩略图，点击查看原图
+    
+    只读取已经生成好的缩略图文件，不读取附件原图；没有缩略图（未安装 Pillow）时
+    显示文件名。标签控件在切换题目时复用。
+    """
+    
+    def __init__(self, parent, images, on_open):
+        self.frame = ttk.Frame(parent)
+        self.images = images  # 共用的 LRUCache {缩略图路径: PhotoImage}
+        self.on_open = on_open
+        self.labels = []
+    
+    def load_image(self, path):
+        image = self.images.get(path)
+        if image is None:
+            try:
+                image = tk.PhotoImage(master=self.frame, file=path)
+            except tk.TclError:
+                return None
+            self.images.put(path, image)
+        return image
+    
+    def show(self, items):
+        """显示 [(附件, 缩略图路径)]，为空时隐藏全部"""
+        for index, (attachment, thumbnail) in enumerate(items):
+            if index == len(self.labels):
+                self.labels.append(ttk.Label(self.frame, cursor="hand2"))
+            label = self.labels[index]
+            image = self.load_image(thumbnail) if thumbnail else None
+            if image is not None:
+                label.config(image=image, text="")
+            else:
+                label.config(image="", text=f"[图片] {attachment[3] or attachment[2][:8]}")
+            label.image = image  # 保持引用，否则图片会被回收
+            label.bind("<Button-1>", lambda event, a=attachment: self.on_open(a))
+            label.pack(side=tk.LEFT, padx=2, pady=2)
+        for label in self.labels[len(items):]:
+            label.pack_forget()
+
+
+class PracticeDialog:
+    """限时练习窗口：逐题作答，结束时交给 on_finish(session) 提交结果"""
+    
+    def __init__(self, parent, session, on_finish):
+        self.session = session
+        self.on_finish = on_finish
+        self.mistake = None
+        self.option_vars = {}
+        
+        self.top = tk.Toplevel(parent)
+        self.top.title("限时练习")
+        self.top.geometry("600x500")
+        self.top.transient(parent)
+        self.top.grab_set()
+        self.top.protocol("WM_DELETE_WINDOW", self.finish)
+        
+        frame = ttk.Frame(self.top)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 进度和剩余时间
+        header = ttk.Frame(frame)
+        header.pack(fill=tk.X)
+        self.progress_label = ttk.Label(header, text="", font=("Arial", 10, "bold"))
+        self.progress_label.pack(side=tk.LEFT)
+        self.timer_label = ttk.Label(header, text="")
+        self.timer_label.pack(side=tk.RIGHT)
+        
+        # 题目
+        self.question_text = tk.Text(frame, height=8, wrap=tk.WORD)
+        self.question_text.pack(fill=tk.X, pady=5)
+        self.question_text.config(state=tk.DISABLED)
+        
+        # 选项或文本作答区
+        self.options_frame = ttk.Frame(frame)
+        self.options_frame.pack(fill=tk.X, pady=5)
+        self.option_pool = OptionButtonPool(self.options_frame)
+        self.answer_entry = scrolledtext.ScrolledText(frame, height=4, wrap=tk.WORD)
+        
+        # 上一题的批改结果
+        self.feedback_label = ttk.Label(frame, text="")
+        self.feedback_label.pack(anchor=tk.W, pady=5)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=10)
+        ttk.Button(button_frame, text="提交", command=self.submit).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="跳过", command=self.skip).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="结束练习", command=self.finish).pack(side=tk.RIGHT, padx=5)
+        
+        self.show_question()
+        self.tick()
+    
+    def tick(self):
+        """每秒刷新剩余时间，超时后自动结束"""
+        if not self.top.winfo_exists():
+            return
+        remaining = self.session.remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                self.finish()
+                return
+            self.timer_label.config(text=f"剩余 {int(remaining) // 60}:{int(remaining) % 60:02d}")
+        self.top.after(1000, self.tick)
+    
+    def show_question(self):
+        """显示当前题目（已在后台预取）"""
+        self.mistake, options = self.session.current()
+        if self.mistake is None:
+            self.finish()
+            return
+        mistake = self.mistake
+        self.progress_label.config(
+            text=f"第 {self.session.position + 1}/{self.session.total} 题  {mistake.subject}·{mistake.question_type}"
+        )
+        self.question_text.config(state=tk.NORMAL)
+        self.question_text.delete("1.0", tk.END)
+        self.question_text.insert(tk.END, mistake.question)
+        self.question_text.config(state=tk.DISABLED)
+        
+        self.option_pool.hide()
+        self.option_vars = {}
+        self.answer_entry.delete("1.0", tk.END)
+        if mistake.question_type in ["单选", "多选"] and options:
+            self.answer_entry.pack_forget()
+            self.option_vars, _ = self.option_pool.show(mistake.question_type, options)
+        else:
+            self.answer_entry.pack(fill=tk.X, pady=5, after=self.options_frame)
+    
+    def get_answer(self):
+        if "单选" in self.option_vars:
+            return self.option_vars["单选"].get()
+        if self.option_vars:
+            return ",".join(key for key, var in self.option_vars.items() if var.get())
+        return self.answer_entry.get("1.0", tk.END).strip()
+    
+    def submit(self):
+        # 两次 tick 之间可能已经超时，此时不再记录作答，直接结束并提交
+        if self.session.finished:
+            self.finish()
+            return
+        user_answer = self.get_answer()
+        if not user_answer:
+            messagebox.showinfo("提示", "请输入答案", parent=self.top)
+            return
+        correct_answer = self.mistake.correct_answer
+        if self.session.answer(user_answer):
+            self.feedback_label.config(text="上一题：回答正确！")
+        else:
+            self.feedback_label.config(text=f"上一题：回答错误，正确答案: {correct_answer}")
+        self.show_question()
+    
+    def skip(self):
+        self.session.skip()
+        self.show_question()
+    
+    def finish(self):
+        """结束练习并关闭窗口"""
+        if not self.top.winfo_exists():
+            return
+        self.top.destroy()
+        self.on_finish(self.session)
+
+
+class AddEditMistakeDialog:
+    def __init__(self, parent, run_async, mistake_id=None, 
+                 subject="", question_type="单选", question="", options=None, 
+                 wrong_answer="", correct_answer="", explanation="", 
+                 tags="", difficulty=3, attachments=None, on_saved=None):
+        # 主窗口的 run_async，数据库操作都在后台线程执行
+        self.run_async = run_async
+        self.on_saved = on_saved  # 保存完成、对话框关闭后调用
+        self.mistake_id = mistake_id
+        # 已有的附件 [(附件, 缩略图路径)]；None 表示不支持附件（远程错题本）
+        self.attachments = list(attachments) if attachments is not None else None
+        self.original_attachment_ids = {a[0] for a, _ in attachments or ()}
+        self.new_attachments = []  # 新选择的图片文件路径
+        
+        self.top = tk.Toplevel(parent)
+        self.top.title("添加错题" if mistake_id is None else "编辑错题")
+        self.top.geometry("650x650")
+        self.top.transient(parent)
+        self.top.grab_set()
+        
+        # 创建表单框架
+        form_frame = ttk.Frame(self.top)
+        form_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # 表单内容
+        row = 0
+        
+        # 科目
+        ttk.Label(form_frame, text="科目:").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        self.subject_var = tk.StringVar(value=subject)
+        self.subject_combo = ttk.Combobox(form_frame, textvariable=self.subject_var)
+        self.subject_combo.grid(row=row, column=1, padx=5, pady=5, sticky=tk.EW)
+        self.run_async("dialog_subjects", self.set_subjects, "get_subjects")
+        row += 1
+        
+        # 题目类型
+        ttk.Label(form_frame, text="题目类型:").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        self.type_var = tk.StringVar(value=question_type)
+        self.type_combo = ttk.Combobox(form_frame, textvariable=self.type_var)
+        self.type_combo.grid(row=row, column=1, padx=5, pady=5, sticky=tk.EW)
+        self.type_combo['values'] = list(MistakeBook.QUESTION_TYPES)
+        self.type_combo.bind("<<ComboboxSelected>>", self.update_form)
+        row += 1
+        
+        # 难度
+        ttk.Label(form_frame, text="难度(1-5):").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        self.difficulty_var = tk.IntVar(value=difficulty)
+        self.difficulty_spin = tk.Spinbox(form_frame, from_=1, to=5, textvariable=self.difficulty_var)
+        self.difficulty_spin.grid(row=row, column=1, padx=5, pady=5, sticky=tk.W)
+        row += 1
+        
+        # 标签
+        ttk.Label(form_frame, text="标签(逗号分隔):").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        self.tags_var = tk.StringVar(value=tags)
+        ttk.Entry(form_frame, textvariable=self.tags_var).grid(
+            row=row, column=1, padx=5, pady=5, sticky=tk.EW
+        )
+        row += 1
+        
+        # 题目
+        ttk.Label(form_frame, text="题目:").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        row += 1
+        self.question_text = scrolledtext.ScrolledText(form_frame, height=5)
+        self.question_text.grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        self.question_text.insert(tk.END, question)
+        row += 1
+        
+        # 选项区域（选择题使用）
+        self.options_frame = ttk.LabelFrame(form_frame, text="选项(仅选择题需要)")
+        self.options_frame.grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        row += 1
+        
+        # 添加选项按钮
+        option_button_frame = ttk.Frame(self.options_frame)
+        option_button_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Button(option_button_frame, text="添加选项", command=self.add_option).pack(side=tk.LEFT)
+        
+        # 选项行（用 grid 排列，放在单独的框架中）
+        self.option_rows_frame = ttk.Frame(self.options_frame)
+        self.option_rows_frame.pack(fill=tk.X, padx=5, pady=2)
+        self.option_rows_frame.columnconfigure(1, weight=1)
+        self.option_entries = []  # [(标签输入框, 内容输入框, 删除按钮)]，删除的行隐藏后复用
+        self.option_count = 0  # 正在显示的选项行数
+        
+        # 初始化选项
+        if options:
+            for key, value in options.items():
+                self.add_option(key, value)
+        
+        # 错误答案
+        ttk.Label(form_frame, text="错误答案(可选):").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        row += 1
+        self.wrong_answer_text = scrolledtext.ScrolledText(form_frame, height=2)
+        self.wrong_answer_text.grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        self.wrong_answer_text.insert(tk.END, wrong_answer)
+        row += 1
+        
+        # 正确答案
+        ttk.Label(form_frame, text="正确答案:").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        row += 1
+        self.correct_answer_text = scrolledtext.ScrolledText(form_frame, height=2)
+        self.correct_answer_text.grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        self.correct_answer_text.insert(tk.END, correct_answer)
+        row += 1
+        
+        # 解析
+        ttk.Label(form_frame, text="解析(可选):").grid(row=row, column=0, padx=5, pady=5, sticky=tk.W)
+        row += 1
+        self.explanation_text = scrolledtext.ScrolledText(form_frame, height=4)
+        self.explanation_text.grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky=tk.EW)
+        self.explanation_text.insert(tk.END, explanation)
+        row += 1
+        
+        # 图片附件
+        if self.attachments is not None:
+            ttk.Label(form_frame, text="图片(可选):").grid(row=row, column=0, padx=5, pady=5, sticky=tk.NW)
+            attachment_frame = ttk.Frame(form_frame)
+            attachment_frame.grid(row=row, column=1, padx=5, pady=5, sticky=tk.EW)
+            self.attachment_list = tk.Listbox(attachment_frame, height=3)
+            self.attachment_list.pack(side=tk.LEFT, fill=tk.X, expand=True)
+            ttk.Button(attachment_frame, text="添加图片", command=self.add_attachments).pack(side=tk.TOP, padx=5)
+            ttk.Button(attachment_frame, text="移除", command=self.remove_attachment).pack(side=tk.TOP, padx=5)
+            for attachment, _ in self.attachments:
+                self.attachment_list.insert(tk.END, attachment[3] or attachment[2][:8])
+            row += 1
+        
+        # 按钮区域
+        button_frame = ttk.Frame(form_frame)
+        button_frame.grid(row=row, column=0, columnspan=2, pady=10)
+        
+        ttk.Button(button_frame, text="保存", command=self.save).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="取消", command=self.top.destroy).pack(side=tk.LEFT, padx=5)
+        
+        # 初始更新表单
+        self.update_form()
+        
+        # 配置网格布局
+        form_frame.columnconfigure(1, weight=1)
+        self.top.resizable(True, True)
+    
+    def update_form(self, event=None):
+        """根据选择的题目类型更新表单"""
+        q_type = self.type_var.get()
+        
+        if q_type in ["单选", "多选"]:
+            self.options_frame.grid()
+        else:
+            self.options_frame.grid_remove()
+    
+    def add_option(self, key=None, value=None):
+        """添加新的选项行，优先复用已隐藏的行"""
+        row = self.option_count  # 当前选项行数
+        
+        # 如果未提供key，则使用大写字母作为标签
+        if key is None:
+            key = chr(65 + row)  # A, B, C, ...
+        
+        if row == len(self.option_entries):
+            # 标签、选项内容和删除按钮
+            label_entry = ttk.Entry(self.option_rows_frame, width=3)
+            content_entry = ttk.Entry(self.option_rows_frame, width=40)
+            delete_btn = ttk.Button(self.option_rows_frame, text="×", width=2, 
+                                  command=lambda r=row: self.remove_option(r))
+            self.option_entries.append((label_entry, content_entry, delete_btn))
+        
+        label_entry, content_entry, delete_btn = self.option_entries[row]
+        self.set_option_row(row, key, value or "")
+        label_entry.grid(row=row, column=0, padx=5, pady=2, sticky=tk.W)
+        content_entry.grid(row=row, column=1, padx=5, pady=2, sticky=tk.EW)
+        delete_btn.grid(row=row, column=2, padx=5, pady=2, sticky=tk.E)
+        self.option_count += 1
+    
+    def set_option_row(self, row, key, value):
+        """设置一行选项的标签和内容"""
+        label_entry, content_entry, _ = self.option_entries[row]
+        label_entry.delete(0, tk.END)
+        label_entry.insert(0, key)
+        content_entry.delete(0, tk.END)
+        content_entry.insert(0, value)
+    
+    def remove_option(self, row):
+        """移除指定行的选项：后面各行的内容依次上移，隐藏最后一行"""
+        if row >= self.option_count:
+            return
+        for index in range(row, self.option_count - 1):
+            label_entry, content_entry, _ = self.option_entries[index + 1]
+            self.set_option_row(index, label_entry.get(), content_entry.get())
+        self.option_count -= 1
+        for widget in self.option_entries[self.option_count]:
+            widget.grid_remove()
+    
+    def get_options(self):
+        """获取当前所有选项"""
+        options = {}
+        for label_entry, content_entry, _ in self.option_entries[:self.option_count]:
+            key = label_entry.get().strip()
+            value = content_entry.get().strip()
+            if key and value:
+                options[key] = value
+        return options
+    
+    def add_attachments(self):
+        """选择要添加的图片文件"""
+        paths = filedialog.askopenfilenames(
+            parent=self.top, title="选择图片",
+            filetypes=[("图片", "*.png *.gif *.jpg *.jpeg *.bmp *.webp"), ("所有文件", "*.*")]
+        )
+        for path in paths:
+            self.new_attachments.append(path)
+            self.attachment_list.insert(tk.END, os.path.basename(path))
+    
+    def remove_attachment(self):
+        """移除选中的图片（保存时才删除已有的附件）"""
+        selection = self.attachment_list.curselection()
+        if not selection:
+            return
+        index = selection[0]
+        self.attachment_list.delete(index)
+        if index < len(self.attachments):
+            self.attachments.pop(index)
+        else:
+            self.new_attachments.pop(index - len(self.attachments))
+    
+    def set_subjects(self, subjects):
+        if self.top.winfo_exists():
+            self.subject_combo['values'] = subjects
+    
+    @staticmethod
+    def save_attachments(book, mistake_id, removed_ids, new_paths):
+        """删除被移除的已有附件，添加新选择的图片（在后台线程执行），返回添加失败的 [(路径, 错误)]"""
+        for attachment_id in removed_ids:
+            book.delete_attachment(attachment_id)
+        failed = []
+        for path in new_paths:
+            try:
+                book.add_attachment(mistake_id, path, os.path.basename(path))
+            except OSError as e:
+                failed.append((path, e))
+        return failed
+    
+    def save(self):
+        """保存错题"""
+        # 获取表单数据
+        subject = self.subject_var.get().strip()
+        question_type = self.type_var.get().strip()
+        question = self.question_text.get("1.0", tk.END).strip()
+        options = self.get_options() if question_type in ["单选", "多选"] else None
+        wrong_answer = self.wrong_answer_text.get("1.0", tk.END).strip()
+        correct_answer = self.correct_answer_text.get("1.0", tk.END).strip()
+        explanation = self.explanation_text.get("1.0", tk.END).strip()
+        tags = self.tags_var.get().strip()
+        difficulty = self.difficulty_var.get()
+        
+        # 验证输入
+        if not subject:
+            messagebox.showerror("错误", "科目不能为空")
+            return
+        if not question_type:
+            messagebox.showerror("错误", "请选择题型")
+            return
+        if not question:
+            messagebox.showerror("错误", "题目不能为空")
+            return
+        if question_type in ["单选", "多选"] and not options:
+            messagebox.showerror("错误", "请至少添加一个选项")
+            return
+        if not correct_answer:
+            messagebox.showerror("错误", "正确答案不能为空")
+            return
+        
+        values = (subject, question_type, question, options, correct_answer,
+                  explanation, tags, difficulty, wrong_answer)
+        if self.mistake_id is not None:
+            self.write(values)
+            return
+        # 新错题与已有错题相似时提醒，避免同一道题录入多次；连续点击时只处理最后一次
+        self.run_async(
+            "similar", lambda similar: self.confirm_similar(similar, values),
+            self.find_similar, question, subject, question_type
+        )
+    
+    @staticmethod
+    def find_similar(book, question, subject, question_type):
+        """最相似的已有错题 (ID, 相似度, 题目)，没有时返回None（在后台线程执行）"""
+        similar = book.find_similar_mistakes(question, subject, question_type, limit=1)
+        if not similar:
+            return None
+        similar_id, score = similar[0]
+        existing = book.get_mistake_by_id(similar_id, ("question",))
+        return (similar_id, score, existing.question) if existing else None
+    
+    def confirm_similar(self, similar, values):
+        """有相似的错题时询问是否仍要添加"""
+        if not self.top.winfo_exists():
+            return
+        if similar:
+            similar_id, score, question = similar
+            if not messagebox.askyesno(
+                "发现相似错题",
+                f"错题本中已有相似的题目（ID {similar_id}，相似度 {int(score * 100)}%）:\n\n"
+                f"{question[:100]}\n\n仍要添加吗？",
+                parent=self.top
+            ):
+                return
+        self.write(values)
+    
+    def write(self, values):
+        """在后台保存到数据库，完成后关闭对话框；保存失败时对话框保持打开"""
+        mistake_id = self.mistake_id
+        removed_ids = new_paths = None
+        if self.attachments is not None:
+            kept = {attachment[0] for attachment, _ in self.attachments}
+            removed_ids = self.original_attachment_ids - kept
+            new_paths = list(self.new_attachments)
+        
+        def save(book):
+            if mistake_id is None:
+                saved_id = book.add_mistake(*values)
+            else:
+                saved_id = mistake_id
+                book.update_mistake(mistake_id, *values)
+            if removed_ids is None:
+                return []
+            return self.save_attachments(book, saved_id, removed_ids, new_paths)
+        
+        self.run_async("save", self.saved, save)
+    
+    def saved(self, failed):
+        for path, error in failed:
+            messagebox.showerror("错误", f"无法添加图片 {path}: {error}", parent=self.top)
+        if self.top.winfo_exists():
+            self.top.destroy()
+        if self.on_saved is not None:
+            self.on_saved()
+
+
+def main(db_path=None, server=None, profiler=None, token=None):
+    """启动图形界面；指定 server 时通过HTTP连接到错题本服务（token 为访问令牌），profiler 用于性能分析"""
+    if server:
+        from .remote import MistakeBookClient
+        factory = partial(MistakeBookClient, server, token=token)
+    else:
+        factory = partial(MistakeBook, db_path)
+    root = tk.Tk()
+    app = MistakeBookGUI(root, factory, profiler)
+    root.mainloop()
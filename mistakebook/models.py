@@ -0,0 +1,148 @@
+"""错题的行对象
+
+查询结果中的每道错题是一个 Mistake，按列名访问（mistake.question_type），
+不再按下标访问元组。查询时可以只选取部分列，例如列表只需要 LIST_COLUMNS，
+题目只在SQL中截取前 PREVIEW_LENGTH 个字作为预览；其余的列在第一次访问时
+通过创建它的 MistakeBook 一次补齐。补齐使用原来的数据库连接，只能在创建这一行
+的线程中进行，界面线程需要完整内容时应在数据库线程中用 get_mistake_by_id 读取。
+
+    for mistake in book.get_mistakes(columns=LIST_COLUMNS):
+        print(mistake.id, mistake.preview)
+    print(mistake.explanation)  # 按需读取
+"""
+
+# mistakes 表的全部列
+MISTAKE_COLUMNS = (
+    "id", "subject", "question", "question_type", "options", "wrong_answer", "correct_answer",
+    "explanation", "tags", "difficulty", "add_date", "last_review", "review_count",
+    "correct_count", "ease", "interval_days", "repetitions", "due_date", "content_hash",
+)
+PREVIEW_LENGTH = 50
+# 错题列表使用的列（包括分页需要的 last_review、add_date）
+LIST_COLUMNS = (
+    "id", "subject", "question_type", "preview", "difficulty", "add_date", "last_review",
+    "review_count", "correct_count", "due_date",
+)
+
+
+class Descending:
+    """排序键中按降序比较的值"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def review_order(mistake):
+    """与 ORDER BY last_review ASC, add_date DESC 相同的排序键（未复习的排在最前）"""
+    return (mistake.last_review is not None, mistake.last_review or "", Descending(mistake.add_date))
+
+
+def select_columns(columns=None, table=None):
+    """生成 SELECT 的列清单，返回 (SQL片段, 列名元组)
+
+    columns 为空时选取全部列；总会包含 id，用于按需补齐其余的列。
+    preview 是计算列：超过 PREVIEW_LENGTH 个字的题目截断并加上省略号。
+    """
+    columns = MISTAKE_COLUMNS if columns is None else tuple(columns)
+    if "id" not in columns:
+        columns = ("id",) + columns
+    prefix = f"{table}." if table else ""
+    parts = []
+    for name in columns:
+        if name == "preview":
+            question = prefix + "question"
+            parts.append(
+                f"CASE WHEN length({question}) > {PREVIEW_LENGTH} "
+                f"THEN substr({question}, 1, {PREVIEW_LENGTH}) || '...' ELSE {question} END"
+            )
+        elif name in MISTAKE_COLUMNS:
+            parts.append(prefix + name)
+        else:
+            raise ValueError(f"未知的列: {name}")
+    return ", ".join(parts), columns
+
+
+class Mistake:
+    """一道错题；未读取的列在第一次访问时通过 loader 补齐"""
+
+    # book 为跨错题本查询时错题所在的错题本（见 MistakeBook.attach_book）
+    __slots__ = MISTAKE_COLUMNS + ("preview", "book", "_loader")
+
+    def __init__(self, loader=None, **fields):
+        # loader(错题ID, 列名列表) 返回这些列的值，错题不存在时返回 None
+        self._loader = loader
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_rows(cls, columns, rows, loader=None):
+        """把查询结果（与 columns 顺序相同的元组）转换为 Mistake 列表"""
+        setters = [getattr(cls, name).__set__ for name in columns]
+        mistakes = []
+        for row in rows:
+            mistake = cls.__new__(cls)
+            mistake._loader = loader
+            for setter, value in zip(setters, row):
+                setter(mistake, value)
+            mistakes.append(mistake)
+        return mistakes
+
+    @classmethod
+    def from_dict(cls, data, loader=None):
+        return cls(loader, **data)
+
+    def is_loaded(self, name):
+        """某一列是否已经读取（不会触发按需读取）"""
+        try:
+            object.__getattribute__(self, name)
+        except AttributeError:
+            return False
+        return True
+
+    @property
+    def columns(self):
+        """已经读取的列名"""
+        return tuple(name for name in MISTAKE_COLUMNS + ("preview",) if self.is_loaded(name))
+
+    def load(self):
+        """补齐全部未读取的列，返回自身"""
+        missing = [name for name in MISTAKE_COLUMNS if not self.is_loaded(name)]
+        if not missing:
+            return self
+        if self._loader is None:
+            raise AttributeError(f"错题 {self.id} 没有读取 {', '.join(missing)}")
+        values = self._loader(self.id, missing)
+        if values is None:
+            raise AttributeError(f"错题不存在: {self.id}")
+        for name, value in zip(missing, values):
+            setattr(self, name, value)
+        return self
+
+    def __getattr__(self, name):
+        # 只有还没有赋值的列会走到这里
+        if name == "book":
+            return None
+        if name == "preview":
+            question = self.question
+            return question[:PREVIEW_LENGTH] + "..." if len(question) > PREVIEW_LENGTH else question
+        if name in MISTAKE_COLUMNS and name != "id":
+            self.load()
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    def to_dict(self):
+        """已读取的列组成的字典（可直接转为JSON）"""
+        return {name: object.__getattribute__(self, name) for name in self.columns}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.to_dict().items()
+                           if name in ("id", "subject", "question_type", "preview"))
+        return f"Mistake({fields})"
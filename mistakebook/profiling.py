@@ -0,0 +1,294 @@
+"""可选的性能分析
+
+profile_book() 给一个 MistakeBook 的公开方法以及它的游标、连接加上计时，
+超过阈值的SQL连同 EXPLAIN QUERY PLAN 记录到慢查询日志；界面可以用
+Profiler.count() 统计控件的创建和销毁次数。默认不启用，启用方式：
+
+    python -m mistakebook --profile due          # 命令结束后输出报告
+    python -m mistakebook gui --profile          # 界面中增加"性能"按钮
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _new_stats():
+    return {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+
+class Profiler:
+    """收集方法耗时、SQL耗时、慢查询和计数器（线程安全）"""
+
+    def __init__(self, slow_ms=50, max_slow_queries=100, max_batches=50):
+        self.slow_ms = slow_ms
+        self.lock = threading.Lock()
+        self.methods = {}
+        self.queries = {}
+        self.slow_queries = deque(maxlen=max_slow_queries)
+        self.counters = Counter()
+        # 界面操作（如一次 load_mistakes）期间的计数 [(名称, Counter)]
+        self.batches = deque(maxlen=max_batches)
+
+    @staticmethod
+    def _add(table, key, ms):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = _new_stats()
+        stats["count"] += 1
+        stats["total_ms"] += ms
+        stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def record_method(self, name, seconds):
+        with self.lock:
+            self._add(self.methods, name, seconds * 1000)
+
+    def record_query(self, sql, seconds, plan=None):
+        ms = seconds * 1000
+        sql = _SPACE_RE.sub(" ", sql).strip()
+        with self.lock:
+            self._add(self.queries, sql, ms)
+            if plan is not None:
+                self.slow_queries.append({"sql": sql, "ms": round(ms, 3), "plan": plan})
+        if plan is not None:
+            logger.warning("慢查询 %.1f ms: %s\n%s", ms, sql, "\n".join(plan))
+
+    def start_batch(self, name):
+        """开始一次界面操作，之后的计数同时记入该操作"""
+        with self.lock:
+            self.batches.append((name, Counter()))
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+            if self.batches:
+                self.batches[-1][1][name] += n
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+            self.queries.clear()
+            self.slow_queries.clear()
+            self.counters.clear()
+            self.batches.clear()
+
+    def snapshot(self):
+        """当前统计的副本，可直接转为JSON"""
+        def with_average(table):
+            return {
+                key: dict(stats, avg_ms=stats["total_ms"] / stats["count"])
+                for key, stats in table.items()
+            }
+        with self.lock:
+            return {
+                "methods": with_average(self.methods),
+                "queries": with_average(self.queries),
+                "slow_queries": list(self.slow_queries),
+                "counters": dict(self.counters),
+                "batches": [(name, dict(counts)) for name, counts in self.batches],
+            }
+
+    def report(self, top=15):
+        """文字报告：耗时最多的方法和SQL、慢查询、控件计数"""
+        data = self.snapshot()
+        lines = ["== 方法（按总耗时）=="]
+        lines.extend(self._format_table(data["methods"], top))
+        lines.append("")
+        lines.append("== SQL（按总耗时）==")
+        lines.extend(self._format_table(data["queries"], top, width=90))
+        if data["slow_queries"]:
+            lines.append("")
+            lines.append(f"== 慢查询（超过 {self.slow_ms} ms）==")
+            for query in data["slow_queries"][-top:]:
+                lines.append(f"{query['ms']:>9.1f} ms  {query['sql'][:120]}")
+                lines.extend(f"             {step}" for step in query["plan"])
+        if data["counters"]:
+            lines.append("")
+            lines.append("== 计数 ==")
+            for name, value in sorted(data["counters"].items()):
+                lines.append(f"{name}: {value}")
+            for name, counts in data["batches"][-top:]:
+                lines.append(f"  {name}: " + "，".join(f"{k} {v}" for k, v in sorted(counts.items())))
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_table(table, top, width=40):
+        rows = sorted(table.items(), key=lambda item: -item[1]["total_ms"])[:top]
+        lines = [f"{'次数':>8}{'总计ms':>12}{'平均ms':>10}{'最大ms':>10}  名称"]
+        for name, stats in rows:
+            name = name if len(name) <= width else name[:width - 3] + "..."
+            lines.append(
+                f"{stats['count']:>8}{stats['total_ms']:>12.1f}{stats['avg_ms']:>10.3f}"
+                f"{stats['max_ms']:>10.1f}  {name}"
+            )
+        return lines
+
+
+class ProfiledCursor:
+    """给查询计时的游标包装，其余属性直接转发
+
+    SQLite 在 fetch 和迭代时才逐行执行查询，所以一条语句的耗时包括 execute 和
+    之后读取结果的时间：读完全部结果、执行下一条语句或关闭游标时才记录，
+    慢查询也在这时判断。
+    """
+
+    def __init__(self, cursor, connection, profiler):
+        self._cursor = cursor
+        self._connection = connection  # 原始连接，用于执行 EXPLAIN QUERY PLAN
+        self._profiler = profiler
+        self._pending = None  # 尚未读完结果的语句 [sql, params, 已用秒数]
+
+    def _start(self, sql, params, seconds):
+        self._finish()
+        self._pending = [sql, params, seconds]
+        if self._cursor.description is None:
+            self._finish()  # 没有结果集（写操作等）
+
+    def _add(self, seconds, done):
+        if self._pending is not None:
+            self._pending[2] += seconds
+            if done:
+                self._finish()
+
+    def _finish(self):
+        if self._pending is None:
+            return
+        sql, params, seconds = self._pending
+        self._pending = None
+        plan = None
+        if seconds * 1000 >= self._profiler.slow_ms:
+            plan = explain(self._connection, sql, params)
+        self._profiler.record_query(sql, seconds, plan)
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        except BaseException:
+            self._finish()
+            self._profiler.record_query(sql, time.perf_counter() - start)
+            raise
+        self._start(sql, params, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        # 参数可能是生成器，保留第一组用于 EXPLAIN
+        seq_of_params = list(seq_of_params)
+        self._finish()
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._pending = [sql, seq_of_params[0] if seq_of_params else (),
+                             time.perf_counter() - start]
+            self._finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._add(time.perf_counter() - start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(self._cursor.arraysize if size is None else size)
+        self._add(time.perf_counter() - start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._add(time.perf_counter() - start, True)
+        return rows
+
+    def __iter__(self):
+        while True:
+            start = time.perf_counter()
+            row = next(self._cursor, None)
+            self._add(time.perf_counter() - start, row is None)
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        # 没有读完结果就被丢弃的游标
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ProfiledConnection:
+    """让 conn.execute / conn.cursor() 也经过计时，其余属性直接转发"""
+
+    def __init__(self, connection, profiler):
+        self._connection = connection
+        self._profiler = profiler
+
+    def cursor(self):
+        return ProfiledCursor(self._connection.cursor(), self._connection, self._profiler)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def explain(connection, sql, params=()):
+    """返回SQL的查询计划（每步一行），无法解释的语句返回空列表"""
+    statement = sql.lstrip().upper()
+    if statement.startswith(("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA",
+                             "CREATE", "ALTER", "DROP", "ANALYZE")):
+        return []
+    try:
+        rows = connection.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except Exception:
+        return []
+    return [row[-1] for row in rows]
+
+
+def profile_book(book, profiler):
+    """给 book 的公开方法（以及 SQLite 游标和连接）加上计时，返回 book 本身
+
+    包装只作用于这个实例。远程客户端的方法由 __getattr__ 转发，按它的
+    PROXIED_METHODS 包装；没有游标的对象只记录方法耗时。
+    """
+    names = set(dir(type(book))) | set(getattr(book, "PROXIED_METHODS", ()))
+    for name in sorted(names):
+        if name.startswith("_") or name == "transaction":
+            continue
+        method = getattr(book, name, None)
+        if not callable(method):
+            continue
+        setattr(book, name, _timed(method, f"{type(book).__name__}.{name}", profiler))
+    if getattr(book, "conn", None) is not None and getattr(book, "cursor", None) is not None:
+        connection = book.conn
+        book.cursor = ProfiledCursor(book.cursor, connection, profiler)
+        book.conn = ProfiledConnection(connection, profiler)
+    return book
+
+
+def _timed(method, name, profiler):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profiler.record_method(name, time.perf_counter() - start)
+    return wrapper
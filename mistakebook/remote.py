@@ -0,0 +1,288 @@
+"""通过本地 HTTP/JSON 接口共享一个错题本
+
+服务端：python -m mistakebook serve --port 8765
+客户端：MistakeBookClient("http://127.0.0.1:8765")，接口与 MistakeBook 相同。
+
+请求格式为 POST /api/<方法名>，请求体 {"args": [...], "kwargs": {...}}，
+返回 {"result": ...}；出错时返回 {"error": "...", "type": "..."}。
+错题（Mistake）以 {列名: 值} 的形式传输，只包含查询时选取的列。
+GET /metrics 返回每个方法的请求次数和耗时统计。
+
+服务没有用户权限，任何能连上的人都可以修改和删除错题。启动时指定 token 后，
+/api 和 /metrics 请求必须带上 "Authorization: Bearer <token>"；监听本机以外的
+地址时必须指定 token。
+"""
+import hmac
+import ipaddress
+import json
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .cache import LRUCache
+from .models import Mistake
+from .storage import MistakeBook
+
+# 只读方法由读连接池处理，写方法由唯一的写连接串行处理
+READ_METHODS = frozenset([
+    "get_mistakes", "get_mistake_by_id", "get_reviews", "search_mistakes",
+    "count_mistakes", "get_mistakes_page", "get_due_mistakes", "draw_mistake_ids", "get_subjects",
+    "get_question_types", "get_tags", "get_difficulties", "get_dashboard",
+    "find_similar_mistakes", "find_duplicate_groups", "get_mistakes_by_ids", "get_mistake_fields",
+])
+WRITE_METHODS = frozenset([
+    "add_mistake", "update_mistake", "delete_mistake", "add_review",
+    "add_mistakes_bulk", "add_reviews_bulk", "merge_mistakes", "archive_reviews", "backfill_minhash",
+    "optimize",
+])
+# 返回错题的方法，客户端把结果还原为 Mistake
+MISTAKE_METHODS = frozenset([
+    "get_mistakes", "get_mistake_by_id", "search_mistakes", "get_mistakes_page",
+    "get_due_mistakes", "get_mistakes_by_ids",
+])
+
+
+def _to_json(value):
+    if isinstance(value, Mistake):
+        return value.to_dict()
+    raise TypeError(f"无法转换为JSON: {type(value).__name__}")
+
+
+def encode_json(data):
+    """编码为JSON，错题转为 {列名: 值}"""
+    return json.dumps(data, ensure_ascii=False, default=_to_json).encode("utf-8")
+
+
+class BookPool:
+    """一个写连接加多个读连接（WAL模式下读写互不阻塞）"""
+
+    def __init__(self, db_path=None, readers=4):
+        # 先打开写连接，由它完成数据库迁移
+        self.writer = MistakeBook(db_path, check_same_thread=False)
+        self.write_lock = threading.Lock()
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            self.readers.put(MistakeBook(db_path, check_same_thread=False))
+
+    def call(self, method, args, kwargs):
+        """在合适的连接上执行 MistakeBook 的方法"""
+        if method in WRITE_METHODS:
+            with self.write_lock:
+                return getattr(self.writer, method)(*args, **kwargs)
+        if method not in READ_METHODS:
+            raise AttributeError(f"不支持的方法: {method}")
+        book = self.readers.get()
+        try:
+            return getattr(book, method)(*args, **kwargs)
+        finally:
+            self.readers.put(book)
+
+    def close(self):
+        with self.write_lock:
+            self.writer.close()
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
+
+
+class RequestMetrics:
+    """按方法统计请求次数、失败次数和耗时"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.methods = {}
+
+    def record(self, method, seconds, ok):
+        with self.lock:
+            stats = self.methods.setdefault(
+                method, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            ms = seconds * 1000
+            stats["count"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                method: dict(stats, avg_ms=stats["total_ms"] / stats["count"])
+                for method, stats in self.methods.items()
+            }
+
+
+class BookRequestHandler(BaseHTTPRequestHandler):
+    """处理 /api/<方法名>、/metrics 和 /health 请求"""
+
+    def authorized(self):
+        """检查请求是否带有正确的 token（服务未设置 token 时不检查）"""
+        token = self.server.token
+        if token is None:
+            return True
+        header = self.headers.get("Authorization") or ""
+        if hmac.compare_digest(header.encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return True
+        self.send_json(401, {"error": "unauthorized", "type": "Unauthorized"})
+        return False
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            if self.authorized():
+                self.send_json(200, self.server.metrics.snapshot())
+        elif self.path == "/health":
+            self.send_json(200, {"ok": True})
+        else:
+            self.send_json(404, {"error": "not found", "type": "NotFound"})
+
+    def do_POST(self):
+        if not self.path.startswith("/api/"):
+            self.send_json(404, {"error": "not found", "type": "NotFound"})
+            return
+        if not self.authorized():
+            return
+        method = self.path[len("/api/"):]
+        # 只有方法名不在允许列表中时才是 404，方法内部的 AttributeError 按服务端错误返回
+        if method not in READ_METHODS and method not in WRITE_METHODS:
+            self.send_json(404, {"error": f"不支持的方法: {method}", "type": "AttributeError"})
+            return
+        start = time.perf_counter()
+        ok = False
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            result = self.server.pool.call(method, body.get("args", []), body.get("kwargs", {}))
+        except (TypeError, ValueError, KeyError) as e:
+            self.send_json(400, {"error": str(e), "type": type(e).__name__})
+        except Exception as e:
+            self.send_json(500, {"error": str(e), "type": type(e).__name__})
+        else:
+            ok = True
+            self.send_json(200, {"result": result})
+        finally:
+            self.server.metrics.record(method, time.perf_counter() - start, ok)
+
+    def send_json(self, status, data):
+        body = encode_json(data)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 逐条请求的访问日志太多，耗时见 /metrics
+        pass
+
+
+class MistakeBookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, db_path=None, readers=4, token=None):
+        self.token = token or None
+        self.pool = BookPool(db_path, readers)
+        self.metrics = RequestMetrics()
+        super().__init__(address, BookRequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.close()
+
+
+def is_loopback(host):
+    """host 是否只能从本机访问"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(db_path=None, host="127.0.0.1", port=8765, readers=4, token=None):
+    """启动服务，直到 Ctrl+C 结束；监听本机以外的地址时必须指定 token"""
+    if not token and not is_loopback(host):
+        raise ValueError(f"监听 {host} 时任何能连上的人都可以修改错题本，请用 --token 设置访问令牌")
+    server = MistakeBookServer((host, port), db_path, readers, token)
+    print(f"错题本服务已启动: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class RemoteError(RuntimeError):
+    """服务端执行出错"""
+
+    def __init__(self, message, error_type=None):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+class MistakeBookClient:
+    """通过 HTTP 访问错题本服务，接口与 MistakeBook 相同
+
+    返回的错题是 Mistake，未选取的列同样在访问时向服务端补齐；其他查询结果中的
+    行是列表而不是元组，按下标访问的方式不变。
+    """
+    # 由 __getattr__ 转发给服务端的方法
+    PROXIED_METHODS = READ_METHODS | WRITE_METHODS
+
+    def __init__(self, base_url="http://127.0.0.1:8765", timeout=30, token=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token
+        self._options_cache = LRUCache(MistakeBook.OPTIONS_CACHE_SIZE)
+
+    def _request(self, path, payload=None):
+        data = None if payload is None else encode_json(payload)
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            error = json.loads(e.read() or b"{}")
+            raise RemoteError(error.get("error", str(e)), error.get("type")) from None
+
+    def call(self, method, *args, **kwargs):
+        """调用服务端的 MistakeBook 方法"""
+        result = self._request(f"/api/{method}", {"args": list(args), "kwargs": kwargs})["result"]
+        if method in MISTAKE_METHODS and result is not None:
+            if isinstance(result, dict):
+                return Mistake.from_dict(result, self.get_mistake_fields)
+            return [Mistake.from_dict(row, self.get_mistake_fields) for row in result]
+        return result
+
+    def __getattr__(self, name):
+        if name not in self.PROXIED_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def get_metrics(self):
+        """获取服务端的请求耗时统计"""
+        return self._request("/metrics")
+
+    # 不访问数据库的辅助方法直接在本地执行
+    split_tags = staticmethod(MistakeBook.split_tags)
+    decode_options = staticmethod(MistakeBook.decode_options)
+    encode_options = staticmethod(MistakeBook.encode_options)
+    content_hash = staticmethod(MistakeBook.content_hash)
+
+    def get_options(self, mistake):
+        """获取错题的选项字典，按错题缓存解析结果"""
+        mistake_id, text = mistake.id, mistake.options
+        cached = self._options_cache.get(mistake_id)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        options = self.decode_options(text)
+        self._options_cache.put(mistake_id, (text, options))
+        return options
+
+    def close(self):
+        """客户端不持有连接，无需关闭"""
@@ -0,0 +1,26 @@
+"""间隔复习调度（SM-2算法）"""
+
+# 复习间隔的上限（天）
+MAX_REVIEW_INTERVAL = 3650
+
+
+def schedule_review(ease, interval, repetitions, result):
+    """按SM-2算法计算下一次复习间隔
+    
+    答对按质量4分、答错按质量2分计算，返回 (新易度, 间隔天数, 连续答对次数)。
+    答错后连续次数清零，第二天重新复习。
+    """
+    quality = 4 if result else 2
+    if quality < 3:
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = min(round(interval * ease), MAX_REVIEW_INTERVAL)
+    ease = round(max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)), 2)
+    return ease, interval, repetitions
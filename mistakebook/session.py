@@ -0,0 +1,170 @@
+"""限时练习
+
+PracticeSession 按筛选条件（或今日到期）抽取若干道题，在后台预取后面几道题
+及其解析好的选项，记录每道题的作答用时，练习结束时在一个事务中写入全部结果。
+
+    session = PracticeSession(AsyncMistakeBook(), count=20, due_only=True)
+    session.start()
+    while not session.finished:
+        mistake, options = session.current()
+        session.answer(input(mistake.question))
+    print(session.finish())
+"""
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from .grading import default_grader
+
+
+def load_question(book, mistake_id):
+    """读取一道题及其选项（在数据库线程中执行）"""
+    mistake = book.get_mistake_by_id(mistake_id)
+    if not mistake:
+        return None, None
+    return mistake, book.get_options(mistake)
+
+
+class PracticeSession:
+    """一次练习：抽题、预取、计时、批改，结束时统一提交复习记录"""
+
+    def __init__(self, book, count=20, subject=None, tag=None, question_type=None,
+                 difficulty=None, due_only=False, time_limit=None, prefetch=3,
+                 grader=default_grader):
+        # book 可以是 AsyncMistakeBook（在后台预取），也可以是普通的 MistakeBook
+        self.book = book
+        self.count = count
+        self.filters = (subject, tag, question_type, difficulty)
+        self.due_only = due_only
+        self.time_limit = time_limit  # 整场练习的限时（秒），None 表示不限时
+        self.prefetch = prefetch
+        self.grader = grader
+
+        self.mistake_ids = []
+        self.position = 0
+        self.results = []  # [(mistake_id, result, user_answer, review_date, 用时秒数)]
+        self.committed = False
+        self._questions = {}  # {位置: Future[(mistake, options)]}
+        self._started_at = None
+        self._shown_at = None  # 当前题目开始显示的时间
+
+    def _submit(self, method, *args):
+        """在数据库线程中执行；普通 MistakeBook 没有后台线程，直接执行"""
+        if hasattr(self.book, "submit"):
+            return self.book.submit(method, *args)
+        future = Future()
+        try:
+            future.set_result(method(self.book, *args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def draw(self, book):
+        """抽题，返回错题ID列表"""
+        return book.draw_mistake_ids(self.count, *self.filters, due_only=self.due_only)
+
+    def start(self, mistake_ids=None):
+        """开始练习，返回题目数量；可以直接给出题目ID（在界面线程外抽好的题）"""
+        if mistake_ids is None:
+            mistake_ids = self._submit(self.draw).result()
+        self.mistake_ids = list(mistake_ids)
+        self.position = 0
+        self.results = []
+        self._questions = {}
+        self._started_at = time.monotonic()
+        self._shown_at = None
+        self._prefetch_from(0)
+        return len(self.mistake_ids)
+
+    def _prefetch_from(self, position):
+        """确保从 position 开始的几道题已在后台读取"""
+        end = min(position + self.prefetch + 1, len(self.mistake_ids))
+        for index in range(position, end):
+            if index not in self._questions:
+                self._questions[index] = self._submit(load_question, self.mistake_ids[index])
+
+    @property
+    def total(self):
+        return len(self.mistake_ids)
+
+    @property
+    def expired(self):
+        """是否已超过限时"""
+        return self.remaining_time() == 0
+
+    @property
+    def finished(self):
+        return self.position >= len(self.mistake_ids) or self.expired
+
+    def remaining_time(self):
+        """剩余秒数，不限时返回None"""
+        if self.time_limit is None or self._started_at is None:
+            return None
+        return max(0.0, self.time_limit - (time.monotonic() - self._started_at))
+
+    def current(self):
+        """当前题目 (mistake, options)，同时开始计时；已被删除的题目自动跳过"""
+        while not self.finished:
+            self._prefetch_from(self.position)
+            mistake, options = self._questions[self.position].result()
+            if mistake:
+                if self._shown_at is None:
+                    self._shown_at = time.monotonic()
+                return mistake, options
+            self._advance()
+        return None, None
+
+    def _advance(self):
+        self._questions.pop(self.position, None)
+        self.position += 1
+        self._shown_at = None
+        self._prefetch_from(self.position)
+
+    def answer(self, user_answer):
+        """提交当前题目的答案，返回是否正确"""
+        mistake, _ = self.current()
+        if mistake is None:
+            raise RuntimeError("练习已结束")
+        latency = time.monotonic() - self._shown_at
+        result = self.grader.grade(mistake.id, mistake.question_type, mistake.correct_answer,
+                                   user_answer)
+        review_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.results.append((mistake.id, result, user_answer, review_date, latency))
+        self._advance()
+        return result
+
+    def skip(self):
+        """跳过当前题目（不记录复习）"""
+        if not self.finished:
+            self._advance()
+
+    def commit(self, book):
+        """把全部作答结果写入数据库（一个事务），返回练习小结"""
+        if not self.committed and self.results:
+            book.add_reviews_bulk([result[:4] for result in self.results])
+        self.committed = True
+        return self.summary()
+
+    def finish(self):
+        """结束练习并提交结果，返回练习小结"""
+        for future in self._questions.values():
+            future.cancel()
+        self._questions = {}
+        return self._submit(self.commit).result()
+
+    def summary(self):
+        """练习小结：题数、作答数、正确数、正确率和用时"""
+        answered = len(self.results)
+        correct = sum(1 for result in self.results if result[1])
+        latencies = [result[4] for result in self.results]
+        elapsed = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "total": len(self.mistake_ids),
+            "answered": answered,
+            "correct": correct,
+            "accuracy": correct / answered if answered else 0.0,
+            "elapsed": round(elapsed, 1),
+            "average_latency": round(sum(latencies) / answered, 1) if answered else 0.0,
+            "max_latency": round(max(latencies), 1) if latencies else 0.0,
+            "latencies": {result[0]: round(result[4], 2) for result in self.results},
+        }
@@ -0,0 +1,1953 @@
+"""错题本的数据存储层（SQLite）"""
+import sqlite3
+import os
+import ast
+import csv
+import hashlib
+import heapq
+import itertools
+import json
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+
+from . import dedup
+from .attachments import AttachmentStore
+from .cache import LRUCache
+from .models import MISTAKE_COLUMNS, Mistake, review_order, select_columns
+from .scheduler import schedule_review
+
+# 默认的数据库文件：与程序入口 错题本.py 放在同一目录
+DEFAULT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "mistakes.db"
+)
+
+
+def _attachments_dir(db_path):
+    """错题本的附件目录：数据库旁边的 <文件名（不含扩展名）>.attachments"""
+    db_path = os.path.abspath(db_path)
+    return os.path.splitext(db_path)[0] + ".attachments"
+
+
+def _with_columns(columns, *names):
+    """在要读取的列中补上合并排序需要的列"""
+    if columns is None:
+        return None
+    return tuple(columns) + tuple(name for name in names if name not in columns)
+
+
+class MistakeBook:
+    # 允许设置的日志模式和同步级别
+    JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+    SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+    # 题目类型和难度等级（固定不变，界面不需要查询数据库）
+    QUESTION_TYPES = ("单选", "多选", "填空", "判断", "解答")
+    DIFFICULTIES = (1, 2, 3, 4, 5)
+    # 最多缓存多少道题的已解析选项
+    OPTIONS_CACHE_SIZE = 2048
+    # archive_reviews 默认归档多少天以前的复习记录，每道题至少保留多少条最近的记录
+    ARCHIVE_AFTER_DAYS = 180
+    ARCHIVE_KEEP_RECENT = 10
+    # optimize 时每个索引最多抽样多少行，大库上也能很快完成
+    ANALYSIS_LIMIT = 400
+    # find_similar_mistakes 每次最多当场计算多少道还没有签名的错题（最新的优先）
+    SIMILAR_PENDING_LIMIT = 100
+    
+    def __init__(self, db_path=None, journal_mode="WAL", synchronous="NORMAL",
+                 check_same_thread=True, attachments_dir=None):
+        # 数据库文件路径
+        self.db_path = db_path or DEFAULT_DB_PATH
+        # 附件文件默认保存在数据库旁边的 <文件名>.attachments 目录中。每个错题本
+        # 使用自己的目录：文件是否还被引用只查本错题本的 attachments 表
+        self.attachments = AttachmentStore(attachments_dir or _attachments_dir(self.db_path))
+        # 为 False 时连接可以交给其他线程使用（调用方需保证同一时间只有一个线程使用）
+        self.check_same_thread = check_same_thread
+        self.conn = None
+        self.cursor = None
+        self.fts_enabled = False  # 当前SQLite是否支持FTS5全文检索
+        self._options_cache = LRUCache(self.OPTIONS_CACHE_SIZE)  # {mistake_id: (原始文本, 选项字典)}
+        self._transaction_depth = 0  # transaction() 的嵌套层数
+        # 科目和标签的使用次数缓存 {"subjects": Counter, "tags": Counter}，None 表示需要重新加载
+        self._vocab = None
+        self._data_version = None  # 上次检查时的 PRAGMA data_version
+        self._listeners = []  # 数据变化的回调，见 add_listener()
+        self._pending_changes = []  # 尚未提交的变化 [(kind, ids)]
+        self.books = {}  # 附加的其他错题本 {别名: 路径}，见 attach_book()
+        
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"不支持的日志模式: {journal_mode}")
+        if synchronous not in self.SYNCHRONOUS_LEVELS:
+            raise ValueError(f"不支持的同步级别: {synchronous}")
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.setup_database()
+        
+    def setup_database(self):
+        """创建数据库和表结构"""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=self.check_same_thread)
+        self.cursor = self.conn.cursor()
+        
+        # WAL模式下读写互不阻塞，NORMAL同步级别只在检查点时刷盘
+        self.cursor.execute(f'PRAGMA journal_mode = {self.journal_mode}')
+        self.cursor.execute(f'PRAGMA synchronous = {self.synchronous}')
+        
+        # 创建错题表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mistakes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                subject TEXT NOT NULL,
+                question TEXT NOT NULL,
+                question_type TEXT NOT NULL,  -- 题目类型：单选、多选、填空、解答等
+                options TEXT,  -- 选择题的选项，JSON格式
+                wrong_answer TEXT,
+                correct_answer TEXT NOT NULL,
+                explanation TEXT,  -- 题目解析
+                tags TEXT,
+                difficulty INTEGER DEFAULT 3,  -- 难度等级1-5
+                add_date TEXT NOT NULL,
+                last_review TEXT,
+                review_count INTEGER DEFAULT 0,
+                correct_count INTEGER DEFAULT 0
+            )
+        ''')
+        
+        # 创建复习记录表
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reviews (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mistake_id INTEGER NOT NULL,
+                review_date TEXT NOT NULL,
+                result BOOLEAN NOT NULL,
+                user_answer TEXT,  -- 用户作答的答案
+                FOREIGN KEY (mistake_id) REFERENCES mistakes(id)
+            )
+        ''')
+        self.conn.commit()
+        
+        # 升级旧版本的数据库
+        self.migrate_database()
+        
+        # 检查全文索引是否可用（部分SQLite编译版本不带FTS5）
+        self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='mistakes_fts'"
+        )
+        self.fts_enabled = self.cursor.fetchone() is not None
+    
+    def migrate_database(self):
+        """按 PRAGMA user_version 依次执行未完成的迁移，原有数据保持不变"""
+        migrations = [
+            self._migrate_v1,
+            self._migrate_v2,
+            self._migrate_v3,
+            self._migrate_v4,
+            self._migrate_v5,
+            self._migrate_v6,
+            self._migrate_v7,
+            self._migrate_v8,
+            self._migrate_v9,
+            self._migrate_v10,
+            self._migrate_v11,
+            self._migrate_v12,
+            self._migrate_v13,
+            self._migrate_v14,
+        ]
+        self.cursor.execute('PRAGMA user_version')
+        version = self.cursor.fetchone()[0]
+        
+        for target, migration in enumerate(migrations, start=1):
+            if version >= target:
+                continue
+            # 每个迁移在单独的事务中执行，失败时整体回滚
+            try:
+                self.cursor.execute('BEGIN')
+                migration()
+                self.cursor.execute(f'PRAGMA user_version = {target}')
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            version = target
+    
+    def _migrate_v1(self):
+        """v1: 按 get_mistakes / get_reviews 的查询形状建立索引"""
+        # 筛选条件 + ORDER BY last_review ASC, add_date DESC
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_order
+            ON mistakes (last_review ASC, add_date DESC)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_subject
+            ON mistakes (subject, question_type, difficulty, last_review ASC, add_date DESC)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_type
+            ON mistakes (question_type, difficulty, last_review ASC, add_date DESC)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_difficulty
+            ON mistakes (difficulty, last_review ASC, add_date DESC)
+        ''')
+        # WHERE mistake_id=? ORDER BY review_date，同时用于删除错题时清理复习记录
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reviews_mistake
+            ON reviews (mistake_id, review_date)
+        ''')
+    
+    def _migrate_v2(self):
+        """v2: 建立题目、解析、答案的FTS5全文索引，由触发器与mistakes表保持同步"""
+        # trigram分词不依赖空格分词，适合中文内容
+        try:
+            self.cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS mistakes_fts USING fts5(
+                    question, explanation, correct_answer,
+                    content='mistakes', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError:
+            # SQLite不支持FTS5或trigram分词时退化为LIKE搜索
+            return
+        
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS mistakes_fts_ai AFTER INSERT ON mistakes BEGIN
+                INSERT INTO mistakes_fts (rowid, question, explanation, correct_answer)
+                VALUES (new.id, new.question, new.explanation, new.correct_answer);
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS mistakes_fts_ad AFTER DELETE ON mistakes BEGIN
+                INSERT INTO mistakes_fts (mistakes_fts, rowid, question, explanation, correct_answer)
+                VALUES ('delete', old.id, old.question, old.explanation, old.correct_answer);
+            END
+        ''')
+        self.cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS mistakes_fts_au
+            AFTER UPDATE OF question, explanation, correct_answer ON mistakes BEGIN
+                INSERT INTO mistakes_fts (mistakes_fts, rowid, question, explanation, correct_answer)
+                VALUES ('delete', old.id, old.question, old.explanation, old.correct_answer);
+                INSERT INTO mistakes_fts (rowid, question, explanation, correct_answer)
+                VALUES (new.id, new.question, new.explanation, new.correct_answer);
+            END
+        ''')
+        # 为已有的错题建立索引
+        self.cursor.execute("INSERT INTO mistakes_fts (mistakes_fts) VALUES ('rebuild')")
+    
+    def _migrate_v3(self):
+        """v3: 标签拆分到 tags / mistake_tags 表，按标签筛选改为索引查询"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mistake_tags (
+                mistake_id INTEGER NOT NULL,
+                tag_id INTEGER NOT NULL,
+                PRIMARY KEY (mistake_id, tag_id)
+            ) WITHOUT ROWID
+        ''')
+        # 按标签反查错题
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistake_tags_tag
+            ON mistake_tags (tag_id, mistake_id)
+        ''')
+        
+        # 迁移已有错题的标签
+        rows = self.conn.execute("SELECT id, tags FROM mistakes WHERE tags IS NOT NULL AND tags != ''")
+        for mistake_id, tags in rows:
+            self._save_tags(mistake_id, tags)
+    
+    def _migrate_v4(self):
+        """v4: 选项由 str(dict) 改为JSON存储，旧数据一次性转换"""
+        rows = self.conn.execute(
+            "SELECT id, options FROM mistakes WHERE options IS NOT NULL AND options != ''"
+        ).fetchall()
+        for mistake_id, text in rows:
+            self.cursor.execute(
+                'UPDATE mistakes SET options=? WHERE id=?',
+                (self.encode_options(self.decode_options(text)), mistake_id)
+            )
+    
+    def _migrate_v5(self):
+        """v5: 增加间隔复习的调度字段和到期时间索引，并按已有复习记录回放计算"""
+        self.cursor.execute('ALTER TABLE mistakes ADD COLUMN ease REAL NOT NULL DEFAULT 2.5')
+        self.cursor.execute('ALTER TABLE mistakes ADD COLUMN interval_days INTEGER NOT NULL DEFAULT 0')
+        self.cursor.execute('ALTER TABLE mistakes ADD COLUMN repetitions INTEGER NOT NULL DEFAULT 0')
+        self.cursor.execute('ALTER TABLE mistakes ADD COLUMN due_date TEXT')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_due ON mistakes (due_date)
+        ''')
+        
+        # 没有复习过的错题从添加时起即到期
+        self.cursor.execute('UPDATE mistakes SET due_date = add_date')
+        
+        # 按时间顺序回放每道题的复习记录
+        rows = self.conn.execute(
+            'SELECT mistake_id, review_date, result FROM reviews ORDER BY mistake_id, review_date'
+        )
+        state = None
+        for mistake_id, review_date, result in rows:
+            if state is None or state[0] != mistake_id:
+                if state is not None:
+                    self._save_schedule(*state)
+                state = [mistake_id, 2.5, 0, 0, review_date]
+            state[1], state[2], state[3] = schedule_review(state[1], state[2], state[3], result)
+            state[4] = review_date
+        if state is not None:
+            self._save_schedule(*state)
+    
+    def _migrate_v6(self):
+        """v6: 增加题目内容哈希，导入时据此去重"""
+        self.cursor.execute('ALTER TABLE mistakes ADD COLUMN content_hash TEXT')
+        rows = self.conn.execute(
+            'SELECT id, subject, question_type, question, options, correct_answer FROM mistakes'
+        ).fetchall()
+        self.cursor.executemany(
+            'UPDATE mistakes SET content_hash=? WHERE id=?',
+            [(self.content_hash(*row[1:]), row[0]) for row in rows]
+        )
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_hash ON mistakes (content_hash)
+        ''')
+    
+    def _migrate_v7(self):
+        """v7: 按天、科目/题型、标签汇总复习次数，统计页面不再扫描 reviews 表"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_daily (
+                day TEXT PRIMARY KEY,  -- YYYY-MM-DD
+                reviews INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_subjects (
+                subject TEXT NOT NULL,
+                question_type TEXT NOT NULL,
+                reviews INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (subject, question_type)
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_tags (
+                tag TEXT PRIMARY KEY,
+                reviews INTEGER NOT NULL DEFAULT 0,
+                correct INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        
+        # 汇总已有的复习记录
+        self.cursor.execute('''
+            INSERT INTO stats_daily (day, reviews, correct)
+            SELECT substr(review_date, 1, 10), COUNT(*), SUM(result) FROM reviews
+            GROUP BY substr(review_date, 1, 10)
+        ''')
+        self.cursor.execute('''
+            INSERT INTO stats_subjects (subject, question_type, reviews, correct)
+            SELECT m.subject, m.question_type, COUNT(*), SUM(r.result)
+            FROM reviews r JOIN mistakes m ON m.id = r.mistake_id
+            GROUP BY m.subject, m.question_type
+        ''')
+        self.cursor.execute('''
+            INSERT INTO stats_tags (tag, reviews, correct)
+            SELECT t.name, COUNT(*), SUM(r.result)
+            FROM reviews r
+            JOIN mistake_tags mt ON mt.mistake_id = r.mistake_id
+            JOIN tags t ON t.id = mt.tag_id
+            GROUP BY t.name
+        ''')
+    
+    def _migrate_v8(self):
+        """v8: 保存题目的 MinHash 签名和 LSH 桶号，用于查找相似题目（由 backfill_minhash() 计算）"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS minhash (
+                mistake_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                mistake_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, mistake_id)
+            ) WITHOUT ROWID
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_lsh_buckets_mistake ON lsh_buckets (mistake_id)
+        ''')
+    
+    def _migrate_v9(self):
+        """v9: 归档的复习记录，每道题一行，见 archive_reviews()"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS reviews_archive (
+                mistake_id INTEGER PRIMARY KEY,
+                reviews INTEGER NOT NULL,  -- 已归档的复习次数
+                correct INTEGER NOT NULL,  -- 其中答对的次数
+                first_review TEXT NOT NULL,
+                last_review TEXT NOT NULL,
+                history BLOB NOT NULL  -- zlib压缩的JSON [[复习时间, 结果, 用户答案], ...]，按时间排序
+            )
+        ''')
+    
+    def _migrate_v10(self):
+        """v10: 错题的附件（图片），文件按内容哈希保存在错题本的附件目录中"""
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS attachments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                mistake_id INTEGER NOT NULL,
+                digest TEXT NOT NULL,  -- 文件内容的 SHA-256
+                name TEXT,  -- 原始文件名
+                format TEXT,  -- 图片格式：png、jpeg、gif 等，无法识别时为空
+                size INTEGER NOT NULL,
+                add_date TEXT NOT NULL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attachments_mistake ON attachments (mistake_id)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_attachments_digest ON attachments (digest)
+        ''')
+    
+    def _migrate_v11(self):
+        """v11: MinHash 签名改为 32 个哈希值，清空旧签名；待计算签名的错题记入 minhash_pending"""
+        self.cursor.execute('DELETE FROM minhash')
+        self.cursor.execute('DELETE FROM lsh_buckets')
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS minhash_pending (
+                mistake_id INTEGER PRIMARY KEY
+            )
+        ''')
+        self.cursor.execute('INSERT OR IGNORE INTO minhash_pending (mistake_id) SELECT id FROM mistakes')
+    
+    def _migrate_v12(self):
+        """v12: 只按科目或只按题型筛选时的排序索引
+
+        v1 的索引只在筛选条件恰好是其前缀时才能直接按 last_review, add_date 排序，
+        只按科目或只按题型筛选时要临时排序全部匹配的行（10万道题时每页约7-10毫秒，
+        有索引时约2毫秒，见 bench 的 get_mistakes_page_subject/_type）。其他组合
+        匹配的行少，临时排序的开销不值得再为每次写入多维护一个索引。
+        """
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_subject_order
+            ON mistakes (subject, last_review ASC, add_date DESC)
+        ''')
+        self.cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_mistakes_type_order
+            ON mistakes (question_type, last_review ASC, add_date DESC)
+        ''')
+    
+    def _migrate_v13(self):
+        """v13: MinHash 改为 30 个哈希值、10 段，清空旧签名和桶号，由 backfill_minhash 重新计算"""
+        self.cursor.execute('DELETE FROM minhash')
+        self.cursor.execute('DELETE FROM lsh_buckets')
+        self.cursor.execute('INSERT OR IGNORE INTO minhash_pending (mistake_id) SELECT id FROM mistakes')
+    
+    def _migrate_v14(self):
+        """v14: 删除早期 v12 建立的科目+题型、科目+难度排序索引（收益很小，拖慢写入）"""
+        self.cursor.execute('DROP INDEX IF EXISTS idx_mistakes_subject_type_order')
+        self.cursor.execute('DROP INDEX IF EXISTS idx_mistakes_subject_difficulty_order')
+    
+    def _save_minhash(self, questions):
+        """计算并保存题目的 MinHash 签名和桶号，questions 为 (mistake_id, 题目)（不提交事务）
+        
+        题目太短时不保存签名，不会成为相似题的候选。
+        """
+        ids = []
+        signatures = []
+        buckets = []
+        for mistake_id, question in questions:
+            ids.append((mistake_id,))
+            signature = dedup.minhash(question)
+            if signature is None:
+                continue
+            signatures.append((mistake_id, dedup.pack_signature(signature)))
+            buckets.extend((band, bucket, mistake_id) for band, bucket in dedup.band_buckets(signature))
+        self.cursor.executemany('DELETE FROM minhash_pending WHERE mistake_id=?', ids)
+        self.cursor.executemany('DELETE FROM minhash WHERE mistake_id=?', ids)
+        self.cursor.executemany('DELETE FROM lsh_buckets WHERE mistake_id=?', ids)
+        self.cursor.executemany(
+            'INSERT OR REPLACE INTO minhash (mistake_id, signature) VALUES (?, ?)', signatures
+        )
+        self.cursor.executemany(
+            'INSERT OR IGNORE INTO lsh_buckets (band, bucket, mistake_id) VALUES (?, ?, ?)', buckets
+        )
+    
+    def _save_schedule(self, mistake_id, ease, interval, repetitions, review_date):
+        """保存错题的复习调度状态，到期时间 = 复习时间 + 间隔（不提交事务）"""
+        due_date = datetime.strptime(review_date, "%Y-%m-%d %H:%M:%S") + timedelta(days=interval)
+        self.cursor.execute('''
+            UPDATE mistakes SET ease=?, interval_days=?, repetitions=?, due_date=?
+            WHERE id=?
+        ''', (ease, interval, repetitions, due_date.strftime("%Y-%m-%d %H:%M:%S"), mistake_id))
+    
+    def _commit(self):
+        """提交事务；在 transaction() 范围内时推迟到范围结束再提交"""
+        if self._transaction_depth == 0:
+            self.conn.commit()
+            self._flush_changes()
+    
+    def add_listener(self, listener):
+        """注册数据变化的回调 listener(kind, ids)
+        
+        kind 为 "inserted"、"updated" 或 "deleted"，ids 为错题ID列表。回调在事务
+        提交之后、在执行写操作的线程中调用，回滚的修改不会通知。只通知本连接
+        的写操作。
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _changed(self, kind, ids):
+        """记录一次数据变化，提交后通知"""
+        if self._listeners and ids:
+            self._pending_changes.append((kind, list(ids)))
+    
+    def _flush_changes(self):
+        changes, self._pending_changes = self._pending_changes, []
+        for kind, ids in changes:
+            for listener in list(self._listeners):
+                listener(kind, ids)
+    
+    @contextmanager
+    def transaction(self):
+        """把多个写操作合并为一个事务，正常结束时提交，出现异常时回滚
+        
+        可以嵌套使用，内层范围通过 SAVEPOINT 实现，只有最外层提交一次。
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        pending = len(self._pending_changes)
+        if depth == 0:
+            if not self.conn.in_transaction:
+                self.cursor.execute('BEGIN IMMEDIATE')
+        else:
+            self.cursor.execute(f'SAVEPOINT {savepoint}')
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.conn.rollback()
+            else:
+                self.cursor.execute(f'ROLLBACK TO {savepoint}')
+                self.cursor.execute(f'RELEASE {savepoint}')
+            # 已回滚的写操作可能更新过缓存，也不再通知
+            self._vocab = None
+            del self._pending_changes[pending:]
+            raise
+        else:
+            self._transaction_depth -= 1
+            if depth == 0:
+                self.conn.commit()
+                self._flush_changes()
+            else:
+                self.cursor.execute(f'RELEASE {savepoint}')
+    
+    def add_mistake(self, subject, question_type, question, options, correct_answer, 
+                   explanation="", tags="", difficulty=3, wrong_answer=""):
+        """添加新的错题"""
+        add_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        # 处理选项格式
+        options = self.encode_options(options)
+        content_hash = self.content_hash(subject, question_type, question, options, correct_answer)
+        
+        # 新错题立即进入复习队列
+        self.cursor.execute('''
+            INSERT INTO mistakes (
+                subject, question_type, question, options, wrong_answer, 
+                correct_answer, explanation, tags, difficulty, add_date, due_date,
+                content_hash
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (subject, question_type, question, options, wrong_answer, 
+              correct_answer, explanation, tags, difficulty, add_date, add_date,
+              content_hash))
+        mistake_id = self.cursor.lastrowid
+        self._save_tags(mistake_id, tags)
+        # 相似题签名由 backfill_minhash() 在之后计算
+        self.cursor.execute('INSERT OR IGNORE INTO minhash_pending (mistake_id) VALUES (?)', (mistake_id,))
+        self._changed("inserted", [mistake_id])
+        self._commit()
+        self._update_vocab(subject, tags, 1)
+        return mistake_id
+    
+    def update_mistake(self, mistake_id, subject, question_type, question, options, 
+                      correct_answer, explanation, tags, difficulty, wrong_answer):
+        """更新错题信息"""
+        # 处理选项格式
+        options = self.encode_options(options)
+        content_hash = self.content_hash(subject, question_type, question, options, correct_answer)
+        self._options_cache.pop(mistake_id)
+        self.cursor.execute('SELECT subject, tags, question_type FROM mistakes WHERE id=?', (mistake_id,))
+        old = self.cursor.fetchone()
+        
+        # 科目、题型或标签改变时，这道题的复习统计随之移到新的分类下
+        day_counts = None
+        if old and (old[0] != subject or old[2] != question_type
+                    or self.split_tags(old[1]) != self.split_tags(tags)):
+            day_counts = self._review_day_counts(mistake_id)
+            self._rollup_reviews(mistake_id, day_counts, -1)
+            
+        self.cursor.execute('''
+            UPDATE mistakes
+            SET subject=?, question_type=?, question=?, options=?, wrong_answer=?, 
+                correct_answer=?, explanation=?, tags=?, difficulty=?, content_hash=?
+            WHERE id=?
+        ''', (subject, question_type, question, options, wrong_answer, 
+              correct_answer, explanation, tags, difficulty, content_hash, mistake_id))
+        self._save_tags(mistake_id, tags)
+        # 题目可能已改变，签名由 backfill_minhash() 重新计算
+        self.cursor.execute('DELETE FROM minhash WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM lsh_buckets WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('INSERT OR IGNORE INTO minhash_pending (mistake_id) VALUES (?)', (mistake_id,))
+        if day_counts:
+            self._rollup_reviews(mistake_id, day_counts, 1)
+        self._changed("updated", [mistake_id])
+        self._commit()
+        if old:
+            self._update_vocab(old[0], old[1], -1)
+            self._update_vocab(subject, tags, 1)
+    
+    def delete_mistake(self, mistake_id):
+        """删除错题（包括不再被其他错题引用的附件文件）"""
+        self.cursor.execute('SELECT subject, tags FROM mistakes WHERE id=?', (mistake_id,))
+        old = self.cursor.fetchone()
+        self.cursor.execute('SELECT digest FROM attachments WHERE mistake_id=?', (mistake_id,))
+        digests = [row[0] for row in self.cursor.fetchall()]
+        self._rollup_reviews(mistake_id, self._review_day_counts(mistake_id), -1)
+        self.cursor.execute('DELETE FROM mistakes WHERE id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM reviews WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM reviews_archive WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM mistake_tags WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM minhash WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM lsh_buckets WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM minhash_pending WHERE mistake_id=?', (mistake_id,))
+        self.cursor.execute('DELETE FROM attachments WHERE mistake_id=?', (mistake_id,))
+        self._changed("deleted", [mistake_id])
+        self._commit()
+        self._release_attachments(digests)
+        self._options_cache.pop(mistake_id)
+        if old:
+            self._update_vocab(old[0], old[1], -1)
+    
+    @staticmethod
+    def decode_options(text):
+        """把数据库中的选项文本解析为 {标签: 内容} 字典，无法解析时返回None
+        
+        兼容旧版本用 str() 保存的数据，但只按字面量解析，不会执行任何代码。
+        """
+        if not text:
+            return None
+        try:
+            options = json.loads(text)
+        except ValueError:
+            try:
+                options = ast.literal_eval(text)
+            except (ValueError, TypeError, SyntaxError, RecursionError):
+                return None
+        if isinstance(options, (list, tuple)):
+            # 列表形式的选项依次编号为 A, B, C, ...
+            options = {chr(65 + i): value for i, value in enumerate(options)}
+        if not isinstance(options, dict):
+            return None
+        return {str(key): str(value) for key, value in options.items()}
+    
+    @classmethod
+    def encode_options(cls, options):
+        """把选项字典（或列表）编码为紧凑的JSON文本"""
+        if isinstance(options, str):
+            options = cls.decode_options(options)
+        if not options:
+            return None
+        if isinstance(options, (list, tuple)):
+            options = {chr(65 + i): value for i, value in enumerate(options)}
+        return json.dumps(options, ensure_ascii=False, separators=(",", ":"))
+    
+    @classmethod
+    def content_hash(cls, subject, question_type, question, options, correct_answer):
+        """根据题目内容计算哈希，用于导入时识别重复的错题"""
+        content = [subject, question_type, question.strip(), cls.encode_options(options),
+                   correct_answer.strip()]
+        return hashlib.sha1(json.dumps(content, ensure_ascii=False).encode("utf-8")).hexdigest()
+    
+    def get_options(self, mistake):
+        """获取错题的选项字典，按错题缓存解析结果"""
+        mistake_id, text = mistake.id, mistake.options
+        cached = self._options_cache.get(mistake_id)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        options = self.decode_options(text)
+        self._options_cache.put(mistake_id, (text, options))
+        return options
+    
+    @staticmethod
+    def split_tags(tags):
+        """把逗号分隔的标签字符串（或标签列表）拆成去重后的标签列表"""
+        if not tags:
+            return []
+        if isinstance(tags, str):
+            tags = tags.replace("，", ",").split(",")
+        result = []
+        for tag in tags:
+            tag = tag.strip()
+            if tag and tag not in result:
+                result.append(tag)
+        return result
+    
+    def _save_tags(self, mistake_id, tags):
+        """将错题的标签写入 tags / mistake_tags 表（不提交事务）"""
+        self.cursor.execute('DELETE FROM mistake_tags WHERE mistake_id=?', (mistake_id,))
+        for tag in self.split_tags(tags):
+            self.cursor.execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (tag,))
+            self.cursor.execute('''
+                INSERT OR IGNORE INTO mistake_tags (mistake_id, tag_id)
+                SELECT ?, id FROM tags WHERE name=?
+            ''', (mistake_id, tag))
+    
+    def add_review(self, mistake_id, result, user_answer):
+        """添加复习记录并更新错题统计"""
+        review_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cursor.execute('''
+            INSERT INTO reviews (mistake_id, review_date, result, user_answer)
+            VALUES (?, ?, ?, ?)
+        ''', (mistake_id, review_date, result, user_answer))
+        
+        # 更新错题的复习统计
+        self.cursor.execute('''
+            UPDATE mistakes
+            SET last_review=?, review_count=review_count+1, 
+                correct_count=correct_count+?
+            WHERE id=?
+        ''', (review_date, 1 if result else 0, mistake_id))
+        
+        # 计算下一次复习时间
+        self.cursor.execute(
+            'SELECT ease, interval_days, repetitions FROM mistakes WHERE id=?', (mistake_id,)
+        )
+        row = self.cursor.fetchone()
+        if row:
+            self._save_schedule(mistake_id, *schedule_review(*row, result), review_date)
+        
+        # 更新统计汇总
+        self._rollup_reviews(mistake_id, {review_date[:10]: (1, 1 if result else 0)})
+        self._changed("updated", [mistake_id])
+        self._commit()
+    
+    def _review_day_counts(self, mistake_id):
+        """按天统计一道题的复习次数 {日期: (复习次数, 答对次数)}"""
+        self.cursor.execute('''
+            SELECT substr(review_date, 1, 10), COUNT(*), SUM(result) FROM reviews
+            WHERE mistake_id=? GROUP BY substr(review_date, 1, 10)
+        ''', (mistake_id,))
+        day_counts = {day: (count, correct) for day, count, correct in self.cursor.fetchall()}
+        for review_date, result, _ in self._archived_reviews(mistake_id):
+            count, correct = day_counts.get(review_date[:10], (0, 0))
+            day_counts[review_date[:10]] = (count + 1, correct + (1 if result else 0))
+        return day_counts
+    
+    def _rollup_reviews(self, mistake_id, day_counts, sign=1):
+        """把一道题的复习次数计入统计汇总表，sign=-1 时扣除（不提交事务）"""
+        if not day_counts:
+            return
+        self.cursor.execute('SELECT subject, question_type FROM mistakes WHERE id=?', (mistake_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return
+        reviews = sign * sum(count for count, _ in day_counts.values())
+        correct = sign * sum(correct for _, correct in day_counts.values())
+        
+        self.cursor.executemany('''
+            INSERT INTO stats_daily (day, reviews, correct) VALUES (?, ?, ?)
+            ON CONFLICT (day) DO UPDATE
+            SET reviews = reviews + excluded.reviews, correct = correct + excluded.correct
+        ''', [(day, sign * count, sign * day_correct)
+              for day, (count, day_correct) in day_counts.items()])
+        self.cursor.execute('''
+            INSERT INTO stats_subjects (subject, question_type, reviews, correct) VALUES (?, ?, ?, ?)
+            ON CONFLICT (subject, question_type) DO UPDATE
+            SET reviews = reviews + excluded.reviews, correct = correct + excluded.correct
+        ''', (row[0], row[1], reviews, correct))
+        self.cursor.execute('''
+            INSERT INTO stats_tags (tag, reviews, correct)
+            SELECT t.name, ?, ? FROM mistake_tags mt JOIN tags t ON t.id = mt.tag_id
+            WHERE mt.mistake_id = ?
+            ON CONFLICT (tag) DO UPDATE
+            SET reviews = reviews + excluded.reviews, correct = correct + excluded.correct
+        ''', (reviews, correct, mistake_id))
+    
+    def add_mistakes_bulk(self, mistakes):
+        """批量添加错题，在一个事务中用 executemany 写入，返回新错题的ID列表
+        
+        mistakes 中的每一项是一个字典，键与 add_mistake 的参数相同。
+        """
+        add_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        tag_lists = []
+        for m in mistakes:
+            tags = m.get("tags", "")
+            options = self.encode_options(m.get("options"))
+            rows.append((
+                m["subject"], m["question_type"], m["question"],
+                options, m.get("wrong_answer", ""),
+                m["correct_answer"], m.get("explanation", ""), tags,
+                m.get("difficulty", 3), m.get("add_date", add_date),
+                m.get("add_date", add_date),
+                self.content_hash(m["subject"], m["question_type"], m["question"],
+                                  options, m["correct_answer"])
+            ))
+            tag_lists.append(self.split_tags(tags))
+        if not rows:
+            return []
+        
+        with self.transaction():
+            # 事务持有写锁，新插入行的ID依次大于当前最大ID
+            self.cursor.execute('SELECT COALESCE(MAX(id), 0) FROM mistakes')
+            last_id = self.cursor.fetchone()[0]
+            self.cursor.executemany('''
+                INSERT INTO mistakes (
+                    subject, question_type, question, options, wrong_answer, 
+                    correct_answer, explanation, tags, difficulty, add_date, due_date,
+                    content_hash
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.cursor.execute('SELECT id FROM mistakes WHERE id > ? ORDER BY id', (last_id,))
+            ids = [row[0] for row in self.cursor.fetchall()]
+            
+            # 写入标签
+            names = {tag for tags in tag_lists for tag in tags}
+            self.cursor.executemany(
+                'INSERT OR IGNORE INTO tags (name) VALUES (?)', [(name,) for name in names]
+            )
+            self.cursor.executemany('''
+                INSERT OR IGNORE INTO mistake_tags (mistake_id, tag_id)
+                SELECT ?, id FROM tags WHERE name=?
+            ''', [(mistake_id, tag) for mistake_id, tags in zip(ids, tag_lists) for tag in tags])
+            self.cursor.executemany(
+                'INSERT OR IGNORE INTO minhash_pending (mistake_id) VALUES (?)', [(i,) for i in ids]
+            )
+            self._changed("inserted", ids)
+        for row, tags in zip(rows, tag_lists):
+            self._update_vocab(row[0], tags, 1)
+        return ids
+    
+    def add_reviews_bulk(self, reviews):
+        """批量添加复习记录，在一个事务中写入并更新每道题的统计和复习调度
+        
+        reviews 中的每一项为 (mistake_id, result, user_answer) 或
+        (mistake_id, result, user_answer, review_date)。
+        """
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        rows = []
+        for review in reviews:
+            mistake_id, result, user_answer = review[:3]
+            review_date = review[3] if len(review) > 3 and review[3] else now
+            rows.append((mistake_id, review_date, bool(result), user_answer))
+        if not rows:
+            return
+        
+        # 每道题的复习按时间顺序计算
+        by_mistake = {}
+        for row in sorted(rows, key=lambda r: r[1]):
+            by_mistake.setdefault(row[0], []).append(row)
+        
+        with self.transaction():
+            self.cursor.executemany('''
+                INSERT INTO reviews (mistake_id, review_date, result, user_answer)
+                VALUES (?, ?, ?, ?)
+            ''', rows)
+            
+            updates = []
+            for mistake_id, items in by_mistake.items():
+                self.cursor.execute(
+                    'SELECT last_review, ease, interval_days, repetitions FROM mistakes WHERE id=?',
+                    (mistake_id,)
+                )
+                state = self.cursor.fetchone()
+                if state is None:
+                    continue
+                last_review, ease, interval, repetitions = state
+                for _, review_date, result, _ in items:
+                    ease, interval, repetitions = schedule_review(ease, interval, repetitions, result)
+                latest = items[-1][1]
+                due_date = datetime.strptime(latest, "%Y-%m-%d %H:%M:%S") + timedelta(days=interval)
+                day_counts = {}
+                for _, review_date, result, _ in items:
+                    count, correct = day_counts.get(review_date[:10], (0, 0))
+                    day_counts[review_date[:10]] = (count + 1, correct + (1 if result else 0))
+                self._rollup_reviews(mistake_id, day_counts)
+                updates.append((
+                    max(last_review or latest, latest), len(items),
+                    sum(1 for item in items if item[2]), ease, interval, repetitions,
+                    due_date.strftime("%Y-%m-%d %H:%M:%S"), mistake_id
+                ))
+            self.cursor.executemany('''
+                UPDATE mistakes
+                SET last_review=?, review_count=review_count+?, correct_count=correct_count+?,
+                    ease=?, interval_days=?, repetitions=?, due_date=?
+                WHERE id=?
+            ''', updates)
+            self._changed("updated", [update[-1] for update in updates])
+    
+    @staticmethod
+    def _pack_history(history):
+        return zlib.compress(
+            json.dumps(history, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9
+        )
+    
+    @staticmethod
+    def _unpack_history(data):
+        return [tuple(item) for item in json.loads(zlib.decompress(data))]
+    
+    def _archived_reviews(self, mistake_id):
+        """一道题已归档的复习记录 [(复习时间, 结果, 用户答案)]，按时间排序"""
+        self.cursor.execute('SELECT history FROM reviews_archive WHERE mistake_id=?', (mistake_id,))
+        row = self.cursor.fetchone()
+        return self._unpack_history(row[0]) if row else []
+    
+    def _save_archive(self, mistake_id, history):
+        """保存一道题的归档记录（覆盖原有的），history 为空时删除（不提交事务）"""
+        if not history:
+            self.cursor.execute('DELETE FROM reviews_archive WHERE mistake_id=?', (mistake_id,))
+            return
+        history = sorted(history, key=lambda item: item[0])
+        self.cursor.execute('''
+            INSERT OR REPLACE INTO reviews_archive
+                (mistake_id, reviews, correct, first_review, last_review, history)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (mistake_id, len(history), sum(1 for item in history if item[1]),
+              history[0][0], history[-1][0], self._pack_history(history)))
+    
+    def archive_reviews(self, before=None, keep=None, batch_size=500):
+        """把早于 before 的复习记录移入归档表，返回 (归档的记录数, 涉及的错题数)
+        
+        before 默认为 ARCHIVE_AFTER_DAYS 天以前；每道题最近的 keep 条记录不归档，
+        详情页的复习记录始终有内容。归档后每道题一行，作答内容压缩保存，
+        错题的复习次数、答对次数和统计汇总都不变。每 batch_size 道题一个事务。
+        """
+        if before is None:
+            before = datetime.now() - timedelta(days=self.ARCHIVE_AFTER_DAYS)
+        if isinstance(before, datetime):
+            before = before.strftime("%Y-%m-%d %H:%M:%S")
+        keep = self.ARCHIVE_KEEP_RECENT if keep is None else keep
+        
+        self.cursor.execute(
+            'SELECT DISTINCT mistake_id FROM reviews WHERE review_date < ?', (before,)
+        )
+        mistake_ids = [row[0] for row in self.cursor.fetchall()]
+        archived = mistakes = 0
+        for start in range(0, len(mistake_ids), batch_size):
+            with self.transaction():
+                for mistake_id in mistake_ids[start:start + batch_size]:
+                    # 跳过最近的 keep 条，其余早于 before 的记录归档
+                    self.cursor.execute('''
+                        SELECT id, review_date, result, user_answer FROM reviews
+                        WHERE mistake_id=? ORDER BY review_date DESC, id DESC LIMIT -1 OFFSET ?
+                    ''', (mistake_id, keep))
+                    rows = [row for row in self.cursor.fetchall() if row[1] < before]
+                    if not rows:
+                        continue
+                    history = self._archived_reviews(mistake_id)
+                    history.extend((review_date, bool(result), user_answer)
+                                   for _, review_date, result, user_answer in rows)
+                    self._save_archive(mistake_id, history)
+                    self.cursor.executemany(
+                        'DELETE FROM reviews WHERE id=?', [(row[0],) for row in rows]
+                    )
+                    archived += len(rows)
+                    mistakes += 1
+        return archived, mistakes
+    
+    def vacuum(self):
+        """整理数据库文件，释放删除和归档后的空闲空间"""
+        self.conn.commit()
+        self.cursor.execute('VACUUM')
+    
+    # 导入导出的字段
+    EXPORT_FIELDS = ("subject", "question_type", "question", "options", "wrong_answer",
+                     "correct_answer", "explanation", "tags", "difficulty", "add_date",
+                     "content_hash")
+    REVIEW_EXPORT_FIELDS = ("mistake_hash", "review_date", "result", "user_answer")
+    
+    @staticmethod
+    def _file_format(path, fmt):
+        """确定导入导出的文件格式（jsonl 或 csv），未指定时按扩展名判断"""
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".") or "jsonl").lower()
+        if fmt == "json":
+            fmt = "jsonl"
+        if fmt not in ("jsonl", "csv"):
+            raise ValueError(f"不支持的文件格式: {fmt}")
+        return fmt
+    
+    def _iter_query(self, query, params=(), chunk_size=1000):
+        """分块读取查询结果，避免一次性 fetchall 占用大量内存"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+    
+    def _write_records(self, path, fmt, fields, records):
+        """把记录流式写入 JSONL 或 CSV 文件，返回写入的条数"""
+        count = 0
+        if fmt == "jsonl":
+            with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+                for record in records:
+                    f.write(json.dumps(dict(zip(fields, record)), ensure_ascii=False))
+                    f.write("\n")
+                    count += 1
+        else:
+            # 带BOM的UTF-8，便于用Excel直接打开
+            with open(path, "w", encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                for record in records:
+                    writer.writerow(record)
+                    count += 1
+        return count
+    
+    def _read_records(self, path, fmt):
+        """逐条读取 JSONL 或 CSV 文件中的记录（字典）"""
+        if fmt == "jsonl":
+            with open(path, encoding="utf-8-sig", buffering=1 << 20) as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(path, encoding="utf-8-sig", newline="", buffering=1 << 20) as f:
+                yield from csv.DictReader(f)
+    
+    def export_mistakes(self, path, fmt=None, chunk_size=1000):
+        """把全部错题导出为 JSONL 或 CSV 文件，返回导出的条数"""
+        fmt = self._file_format(path, fmt)
+        rows = self._iter_query(
+            "SELECT " + ", ".join(self.EXPORT_FIELDS) + " FROM mistakes ORDER BY id",
+            chunk_size=chunk_size
+        )
+        if fmt == "jsonl":
+            # JSONL中的选项保存为对象而不是JSON字符串
+            rows = (row[:3] + (self.decode_options(row[3]),) + row[4:] for row in rows)
+        return self._write_records(path, fmt, self.EXPORT_FIELDS, rows)
+    
+    def export_reviews(self, path, fmt=None, chunk_size=1000):
+        """导出全部复习记录，错题以内容哈希标识，返回导出的条数"""
+        fmt = self._file_format(path, fmt)
+        
+        def archived():
+            for content_hash, history in self._iter_query('''
+                SELECT m.content_hash, a.history
+                FROM reviews_archive a JOIN mistakes m ON m.id = a.mistake_id
+                ORDER BY a.mistake_id
+            ''', chunk_size=chunk_size):
+                for review_date, result, user_answer in self._unpack_history(history):
+                    yield content_hash, review_date, int(result), user_answer
+        
+        # 先导出已归档的（较早的）记录
+        rows = itertools.chain(archived(), self._iter_query('''
+            SELECT m.content_hash, r.review_date, r.result, r.user_answer
+            FROM reviews r JOIN mistakes m ON m.id = r.mistake_id
+            ORDER BY r.id
+        ''', chunk_size=chunk_size))
+        return self._write_records(path, fmt, self.REVIEW_EXPORT_FIELDS, rows)
+    
+    def import_mistakes(self, path, fmt=None, batch_size=1000):
+        """从 JSONL 或 CSV 文件导入错题，内容重复的题目跳过
+        
+        按批读取和写入，每批一个事务。返回 (导入条数, 跳过条数)。
+        """
+        fmt = self._file_format(path, fmt)
+        imported = skipped = 0
+        batch = []
+        
+        def flush():
+            nonlocal imported, skipped
+            # 同一批内和数据库中已有的重复题目都跳过
+            hashes = {}
+            for record in batch:
+                record_hash = self.content_hash(
+                    record["subject"], record["question_type"], record["question"],
+                    record.get("options"), record["correct_answer"]
+                )
+                hashes.setdefault(record_hash, record)
+            existing = set()
+            keys = list(hashes)
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                self.cursor.execute(
+                    "SELECT content_hash FROM mistakes WHERE content_hash IN ("
+                    + ", ".join("?" * len(chunk)) + ")", chunk
+                )
+                existing.update(row[0] for row in self.cursor.fetchall())
+            new = [record for key, record in hashes.items() if key not in existing]
+            self.add_mistakes_bulk(new)
+            imported += len(new)
+            skipped += len(batch) - len(new)
+            batch.clear()
+        
+        for record in self._read_records(path, fmt):
+            record = {key: value for key, value in record.items() if key in self.EXPORT_FIELDS}
+            if not record.get("add_date"):
+                record.pop("add_date", None)
+            if record.get("difficulty") not in (None, ""):
+                record["difficulty"] = int(record["difficulty"])
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return imported, skipped
+    
+    def import_reviews(self, path, fmt=None, batch_size=1000):
+        """导入复习记录，按内容哈希对应到本地错题
+        
+        找不到对应错题或已存在相同记录的跳过。返回 (导入条数, 跳过条数)。
+        """
+        fmt = self._file_format(path, fmt)
+        imported = skipped = 0
+        batch = []
+        
+        def flush():
+            nonlocal imported, skipped
+            ids = {}
+            for key in {record["mistake_hash"] for record in batch}:
+                self.cursor.execute('SELECT id FROM mistakes WHERE content_hash=?', (key,))
+                row = self.cursor.fetchone()
+                if row:
+                    ids[key] = row[0]
+            reviews = []
+            seen = set()
+            # 已归档的记录 {mistake_id: {(复习时间, 结果, 用户答案)}}
+            archived = {}
+            for record in batch:
+                mistake_id = ids.get(record["mistake_hash"])
+                result = str(record["result"]).lower() in ("1", "true")
+                user_answer = record.get("user_answer") or ""
+                review = (mistake_id, result, user_answer, record["review_date"])
+                if mistake_id is None or review in seen:
+                    continue
+                seen.add(review)
+                if mistake_id not in archived:
+                    archived[mistake_id] = {
+                        (review_date, bool(archived_result), archived_answer or "")
+                        for review_date, archived_result, archived_answer
+                        in self._archived_reviews(mistake_id)
+                    }
+                if (record["review_date"], result, user_answer) in archived[mistake_id]:
+                    continue
+                self.cursor.execute('''
+                    SELECT 1 FROM reviews
+                    WHERE mistake_id=? AND review_date=? AND result=? AND user_answer IS ?
+                ''', (mistake_id, record["review_date"], result, user_answer))
+                if self.cursor.fetchone() is None:
+                    reviews.append(review)
+            self.add_reviews_bulk(reviews)
+            imported += len(reviews)
+            skipped += len(batch) - len(reviews)
+            batch.clear()
+        
+        for record in self._read_records(path, fmt):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return imported, skipped
+    
+    def attach_book(self, path, name=None):
+        """附加另一个错题本（SQLite ATTACH），返回它的别名
+        
+        附加后 get_mistakes、get_due_mistakes、search_mistakes 和 get_dashboard
+        可以通过 books 参数同时查询多个错题本。别名默认为文件名（不含扩展名）；
+        SQLite 默认最多同时附加10个数据库。附加的错题本只用于读取，它的附件
+        保存在自己的附件目录中，本错题本删除错题或清理附件时不会影响。
+        """
+        name = name or os.path.splitext(os.path.basename(path))[0]
+        if name.lower() in ("main", "temp") or name.lower() in (n.lower() for n in self.books):
+            raise ValueError(f"错题本别名已被使用: {name}")
+        # 先用单独的连接建表并执行迁移，保证附加的错题本与本错题本结构相同
+        MistakeBook(path, self.journal_mode, self.synchronous).close()
+        self.cursor.execute(f'ATTACH DATABASE ? AS {self._quote(name)}', (path,))
+        self.books[name] = path
+        return name
+    
+    def detach_book(self, name):
+        """取消附加的错题本"""
+        if name not in self.books:
+            raise ValueError(f"未附加的错题本: {name}")
+        self.cursor.execute(f'DETACH DATABASE {self._quote(name)}')
+        del self.books[name]
+    
+    @staticmethod
+    def _quote(name):
+        return '"' + name.replace('"', '""') + '"'
+    
+    def _table(self, name, book=None):
+        """表名；book 为错题本别名时加上数据库前缀"""
+        return name if book is None else f"{self._quote(book)}.{name}"
+    
+    def _resolve_books(self, books):
+        """要查询的错题本别名列表
+        
+        None 表示只查询本错题本（不加前缀），True 表示本错题本（"main"）和全部附加的错题本。
+        """
+        if books is None:
+            return [None]
+        if books is True:
+            return ["main"] + list(self.books)
+        books = [books] if isinstance(books, str) else list(books)
+        unknown = [name for name in books if name != "main" and name not in self.books]
+        if unknown:
+            raise ValueError(f"未附加的错题本: {', '.join(unknown)}")
+        return books
+    
+    def _fan_out(self, books, fetch, key, limit=None):
+        """在每个错题本中执行 fetch(别名)，按 key 合并各自已排好序的结果
+        
+        每个错题本的查询都能用上自己的索引，合并时只比较排序键，不再整体排序。
+        """
+        books = self._resolve_books(books)
+        if books == [None]:
+            return fetch(None)
+        merged = heapq.merge(*(fetch(book) for book in books), key=key)
+        return list(itertools.islice(merged, limit))
+    
+    def _build_filters(self, subject=None, tag=None, question_type=None, difficulty=None,
+                       tag_mode="and", book=None):
+        """根据筛选条件生成WHERE子句的条件列表和参数
+        
+        tag 可以是单个标签、逗号分隔的字符串或标签列表；tag_mode 为 "and" 时
+        需包含全部标签，为 "or" 时包含任一标签即可。book 为标签表所在的错题本。
+        """
+        conditions = []
+        params = []
+        
+        if subject:
+            conditions.append("subject=?")
+            params.append(subject)
+        tags = self.split_tags(tag)
+        if tags:
+            placeholders = ", ".join("?" * len(tags))
+            subquery = (
+                f"SELECT mt.mistake_id FROM {self._table('mistake_tags', book)} mt "
+                f"JOIN {self._table('tags', book)} t ON t.id = mt.tag_id WHERE t.name IN ({placeholders})"
+            )
+            if tag_mode == "and" and len(tags) > 1:
+                subquery += f" GROUP BY mt.mistake_id HAVING COUNT(*) = {len(tags)}"
+            conditions.append(f"id IN ({subquery})")
+            params.extend(tags)
+        if question_type:
+            conditions.append("question_type=?")
+            params.append(question_type)
+        if difficulty:
+            conditions.append("difficulty=?")
+            params.append(difficulty)
+        return conditions, params
+    
+    def _to_mistakes(self, columns, rows, book=None):
+        """把查询结果转换为 Mistake 列表；book 为结果所在的错题本（跨错题本查询时）"""
+        if book is None:
+            return Mistake.from_rows(columns, rows, self.get_mistake_fields)
+        mistakes = Mistake.from_rows(columns, rows, partial(self.get_mistake_fields, book=book))
+        for mistake in mistakes:
+            mistake.book = book
+        return mistakes
+    
+    def _fetch_mistakes(self, columns, query, params, book=None):
+        """执行查询并把结果转换为 Mistake 列表（未选取的列可按需补齐）"""
+        self.cursor.execute(query, tuple(params))
+        return self._to_mistakes(columns, self.cursor.fetchall(), book)
+    
+    def get_mistakes(self, subject=None, tag=None, question_type=None, difficulty=None,
+                     tag_mode="and", columns=None, books=None, limit=None):
+        """获取错题列表，支持多种筛选条件
+        
+        columns 为要读取的列（见 models.LIST_COLUMNS），为空时读取全部列。
+        books 为要查询的错题本（见 attach_book），多个错题本的结果按相同顺序合并。
+        limit 为最多返回的数量，为空时返回全部。
+        """
+        if books is not None:
+            columns = _with_columns(columns, "last_review", "add_date")
+        select, columns = select_columns(columns)
+        
+        def fetch(book):
+            query = f"SELECT {select} FROM {self._table('mistakes', book)}"
+            conditions, params = self._build_filters(
+                subject, tag, question_type, difficulty, tag_mode, book
+            )
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            
+            query += " ORDER BY last_review ASC, add_date DESC"  # 优先显示未复习或复习时间早的题目
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            return self._fetch_mistakes(columns, query, params, book)
+        
+        return self._fan_out(books, fetch, review_order, limit)
+    
+    def get_due_mistakes(self, limit=50, subject=None, tag=None, question_type=None,
+                         difficulty=None, now=None, tag_mode="and", columns=None, books=None):
+        """获取已到复习时间的错题，最早到期的排在前面（books 见 get_mistakes）"""
+        now = (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        if books is not None:
+            columns = _with_columns(columns, "due_date")
+        select, columns = select_columns(columns)
+        
+        def fetch(book):
+            conditions, params = self._build_filters(
+                subject, tag, question_type, difficulty, tag_mode, book
+            )
+            conditions.insert(0, "due_date <= ?")
+            params.insert(0, now)
+            query = f"SELECT {select} FROM {self._table('mistakes', book)} WHERE " + " AND ".join(conditions)
+            query += " ORDER BY due_date LIMIT ?"
+            return self._fetch_mistakes(columns, query, params + [limit], book)
+        
+        return self._fan_out(books, fetch, lambda mistake: mistake.due_date, limit)
+    
+    def count_mistakes(self, subject=None, tag=None, question_type=None, difficulty=None,
+                       tag_mode="and"):
+        """统计满足筛选条件的错题数量"""
+        query = "SELECT COUNT(*) FROM mistakes"
+        conditions, params = self._build_filters(subject, tag, question_type, difficulty, tag_mode)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        self.cursor.execute(query, tuple(params))
+        return self.cursor.fetchone()[0]
+    
+    def draw_mistake_ids(self, count, subject=None, tag=None, question_type=None, difficulty=None,
+                         due_only=False, now=None, tag_mode="and"):
+        """为练习抽题，只返回错题ID
+        
+        due_only 为 True 时按到期时间取最早到期的题，否则随机抽取。
+        """
+        conditions, params = self._build_filters(subject, tag, question_type, difficulty, tag_mode)
+        if due_only:
+            conditions.insert(0, "due_date <= ?")
+            params.insert(0, (now or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"))
+        query = "SELECT id FROM mistakes"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY due_date LIMIT ?" if due_only else " ORDER BY RANDOM() LIMIT ?"
+        self.cursor.execute(query, tuple(params + [count]))
+        return [row[0] for row in self.cursor.fetchall()]
+    
+    def get_mistakes_page(self, subject=None, tag=None, question_type=None, difficulty=None,
+                          after=None, limit=200, tag_mode="and", columns=None):
+        """分页获取错题列表（键集分页）
+        
+        排序与 get_mistakes 相同，并以 id 作为最后的排序键保证顺序唯一。
+        after 为上一页的最后一行（Mistake、经过JSON传输后的字典，或
+        (last_review, add_date, id) 三元组），下一页从它之后开始，不需要 OFFSET
+        扫描已读过的行。
+        """
+        select, columns = select_columns(columns)
+        conditions, params = self._build_filters(subject, tag, question_type, difficulty, tag_mode)
+        
+        # 每一段都能走 (last_review, add_date) 索引的范围查询
+        if after is None:
+            segments = [("", [])]
+        else:
+            if isinstance(after, Mistake):
+                last_review, add_date, last_id = after.last_review, after.add_date, after.id
+            elif isinstance(after, dict):
+                # 远程客户端把 Mistake 编码为 {列名: 值}
+                last_review, add_date, last_id = after["last_review"], after["add_date"], after["id"]
+            else:
+                last_review, add_date, last_id = after
+            tie = "(add_date < ? OR (add_date = ? AND id > ?))"
+            if last_review is None:
+                # 未复习的题目(NULL)排在最前面
+                segments = [
+                    ("last_review IS NULL AND add_date <= ? AND " + tie,
+                     [add_date, add_date, add_date, last_id]),
+                    ("last_review IS NOT NULL", []),
+                ]
+            else:
+                segments = [
+                    ("last_review >= ? AND (last_review > ? OR " + tie + ")",
+                     [last_review, last_review, add_date, add_date, last_id]),
+                ]
+        
+        rows = []
+        for condition, segment_params in segments:
+            where = conditions + ([condition] if condition else [])
+            query = f"SELECT {select} FROM mistakes"
+            if where:
+                query += " WHERE " + " AND ".join(where)
+            query += " ORDER BY last_review ASC, add_date DESC, id ASC LIMIT ?"
+            rows.extend(self._fetch_mistakes(
+                columns, query, params + segment_params + [limit - len(rows)]
+            ))
+            if len(rows) >= limit:
+                break
+        return rows
+    
+    def search_mistakes(self, keyword, subject=None, tag=None, question_type=None,
+                        difficulty=None, limit=200, tag_mode="and", columns=None, books=None):
+        """在题目、解析和答案中全文搜索错题，结果按相关度排序
+        
+        多个关键词用空格分隔，需全部命中。trigram索引只能匹配3个字及以上的词，
+        更短的关键词改用LIKE在命中结果上过滤。books 见 get_mistakes，多个错题本
+        的结果按各自的相关度得分合并。
+        """
+        terms = keyword.split()
+        if not terms:
+            return self.get_mistakes(
+                subject, tag, question_type, difficulty, tag_mode, columns, books, limit
+            )
+        
+        if self.fts_enabled:
+            long_terms = [t for t in terms if len(t) >= 3]
+            short_terms = [t for t in terms if len(t) < 3]
+        else:
+            long_terms = []
+            short_terms = terms
+        if books is not None and not long_terms:
+            columns = _with_columns(columns, "last_review", "add_date")
+        select, columns = select_columns(columns, "m")
+        
+        def fetch(book):
+            conditions, params = self._build_filters(
+                subject, tag, question_type, difficulty, tag_mode, book
+            )
+            # 短关键词：任意一个文本字段包含即可
+            for term in short_terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                conditions.append(
+                    "(m.question LIKE ? ESCAPE '\\' OR m.explanation LIKE ? ESCAPE '\\' "
+                    "OR m.correct_answer LIKE ? ESCAPE '\\')"
+                )
+                params.extend([pattern, pattern, pattern])
+            
+            if long_terms:
+                # 每个关键词作为短语查询，避免用户输入被解析为FTS5语法
+                match = " AND ".join('"' + t.replace('"', '""') + '"' for t in long_terms)
+                # 跨错题本查询时多取一列得分用于合并
+                rank = ", bm25(mistakes_fts)" if book is not None else ""
+                query = (
+                    f"SELECT {select}{rank} FROM {self._table('mistakes_fts', book)} "
+                    f"JOIN {self._table('mistakes', book)} m ON m.id = mistakes_fts.rowid "
+                    "WHERE mistakes_fts MATCH ?"
+                )
+                params.insert(0, match)
+                if conditions:
+                    query += " AND " + " AND ".join(conditions)
+                query += " ORDER BY bm25(mistakes_fts)"
+            else:
+                query = f"SELECT {select} FROM {self._table('mistakes', book)} m"
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += " ORDER BY m.last_review ASC, m.add_date DESC"
+            
+            query += " LIMIT ?"
+            params.append(limit)
+            if long_terms and book is not None:
+                self.cursor.execute(query, params)
+                rows = self.cursor.fetchall()
+                return list(zip([row[-1] for row in rows], self._to_mistakes(columns, rows, book)))
+            return self._fetch_mistakes(columns, query, params, book)
+        
+        if not long_terms:
+            return self._fan_out(books, fetch, review_order, limit)
+        results = self._fan_out(books, fetch, lambda item: item[0], limit)
+        return results if books is None else [mistake for _, mistake in results]
+    
+    def get_mistake_by_id(self, mistake_id, columns=None):
+        """根据ID获取错题详情，不存在时返回None"""
+        select, columns = select_columns(columns)
+        mistakes = self._fetch_mistakes(
+            columns, f"SELECT {select} FROM mistakes WHERE id=?", (mistake_id,)
+        )
+        return mistakes[0] if mistakes else None
+    
+    def get_mistake_fields(self, mistake_id, columns, book=None):
+        """读取一道错题的指定列，返回值的元组，错题不存在时返回None（用于按需补齐）
+        
+        book 为错题所在的附加错题本的别名。
+        """
+        unknown = [name for name in columns if name not in MISTAKE_COLUMNS]
+        if unknown:
+            raise ValueError(f"未知的列: {', '.join(unknown)}")
+        if not columns:
+            return ()
+        self.cursor.execute(
+            f"SELECT {', '.join(columns)} FROM {self._table('mistakes', book)} WHERE id=?", (mistake_id,)
+        )
+        return self.cursor.fetchone()
+    
+    def get_mistakes_by_ids(self, ids, subject=None, tag=None, question_type=None,
+                            difficulty=None, tag_mode="and", columns=None):
+        """获取指定ID中满足筛选条件的错题（用于在列表中更新发生变化的行）"""
+        ids = list(ids)
+        if not ids:
+            return []
+        conditions, params = self._build_filters(subject, tag, question_type, difficulty, tag_mode)
+        conditions.insert(0, f"id IN ({', '.join('?' * len(ids))})")
+        select, columns = select_columns(columns)
+        return self._fetch_mistakes(
+            columns, f"SELECT {select} FROM mistakes WHERE " + " AND ".join(conditions), ids + params
+        )
+    
+    def get_reviews(self, mistake_id, include_archived=False, limit=None):
+        """获取某错题的复习记录 (id, mistake_id, review_date, result, user_answer)，最近的在前
+        
+        默认只读取未归档的记录；include_archived 为 True 时也包括归档的记录（id 为None）。
+        """
+        query = 'SELECT * FROM reviews WHERE mistake_id=? ORDER BY review_date DESC, id DESC'
+        params = (mistake_id,)
+        if limit is not None and not include_archived:
+            query += ' LIMIT ?'
+            params += (limit,)
+        self.cursor.execute(query, params)
+        reviews = self.cursor.fetchall()
+        if include_archived:
+            archived = self._archived_reviews(mistake_id)
+            reviews.extend((None, mistake_id, review_date, result, user_answer)
+                           for review_date, result, user_answer in reversed(archived))
+            reviews.sort(key=lambda review: review[2], reverse=True)
+            if limit is not None:
+                reviews = reviews[:limit]
+        return reviews
+    
+    def add_attachment(self, mistake_id, source, name=None):
+        """给错题添加附件（文件路径或 bytes），返回附件ID
+        
+        文件按内容哈希保存，多道题引用同一张图片时只保存一份。
+        """
+        digest, size, fmt = self.attachments.put(source)
+        if name is None and isinstance(source, (str, os.PathLike)):
+            name = os.path.basename(source)
+        self.cursor.execute('''
+            INSERT INTO attachments (mistake_id, digest, name, format, size, add_date)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (mistake_id, digest, name, fmt, size, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+        attachment_id = self.cursor.lastrowid
+        self._changed("updated", [mistake_id])
+        self._commit()
+        return attachment_id
+    
+    def get_attachments(self, mistake_id):
+        """获取错题的附件 (id, mistake_id, digest, name, format, size, add_date)，只读数据库不读文件"""
+        self.cursor.execute('SELECT * FROM attachments WHERE mistake_id=? ORDER BY id', (mistake_id,))
+        return self.cursor.fetchall()
+    
+    def delete_attachment(self, attachment_id):
+        """删除一个附件，文件不再被引用时一并删除"""
+        self.cursor.execute('SELECT mistake_id, digest FROM attachments WHERE id=?', (attachment_id,))
+        row = self.cursor.fetchone()
+        if row is None:
+            return
+        self.cursor.execute('DELETE FROM attachments WHERE id=?', (attachment_id,))
+        self._changed("updated", [row[0]])
+        self._commit()
+        self._release_attachments([row[1]])
+    
+    def _release_attachments(self, digests):
+        """删除已不被任何错题引用的附件文件
+        
+        在事务中时不删除（事务可能回滚），留给 clean_attachments() 清理。
+        """
+        if self._transaction_depth:
+            return
+        for digest in set(digests):
+            self.cursor.execute('SELECT 1 FROM attachments WHERE digest=? LIMIT 1', (digest,))
+            if self.cursor.fetchone() is None:
+                self.attachments.remove(digest)
+    
+    def clean_attachments(self):
+        """删除附件目录中没有被引用的文件，返回删除的文件数"""
+        self.cursor.execute('SELECT DISTINCT digest FROM attachments')
+        referenced = {row[0] for row in self.cursor.fetchall()}
+        removed = 0
+        for digest in list(self.attachments.digests()):
+            if digest not in referenced:
+                self.attachments.remove(digest)
+                removed += 1
+        return removed
+    
+    def get_thumbnail(self, digest):
+        """附件缩略图的文件路径，第一次调用时生成；无法生成时返回None"""
+        return self.attachments.thumbnail(digest)
+    
+    def get_image_data(self, digest, max_size=None):
+        """附件图片转换为 Tk 可以显示的 PNG/GIF 数据，无法显示时返回None"""
+        return self.attachments.tk_image_data(digest, max_size)
+    
+    def _get_vocab(self):
+        """获取科目和标签的使用次数缓存
+        
+        本连接的写操作会增量更新缓存；其他连接（或其他进程）提交的修改
+        通过 PRAGMA data_version 的变化发现，此时重新从数据库加载。
+        """
+        self.cursor.execute('PRAGMA data_version')
+        data_version = self.cursor.fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._vocab = None
+        
+        if self._vocab is None:
+            self.cursor.execute('SELECT subject, COUNT(*) FROM mistakes GROUP BY subject')
+            subjects = Counter(dict(self.cursor.fetchall()))
+            self.cursor.execute('''
+                SELECT t.name, COUNT(*) FROM mistake_tags mt JOIN tags t ON t.id = mt.tag_id
+                GROUP BY t.name
+            ''')
+            tags = Counter(dict(self.cursor.fetchall()))
+            self._vocab = {"subjects": subjects, "tags": tags}
+        return self._vocab
+    
+    def _update_vocab(self, subject, tags, delta):
+        """按一次写操作增量更新科目和标签缓存，缓存未加载时不做处理"""
+        if self._vocab is None:
+            return
+        self._vocab["subjects"][subject] += delta
+        for tag in self.split_tags(tags):
+            self._vocab["tags"][tag] += delta
+    
+    def get_subjects(self):
+        """获取所有科目列表"""
+        subjects = self._get_vocab()["subjects"]
+        return sorted(subject for subject, count in subjects.items() if count > 0)
+    
+    def get_question_types(self):
+        """获取所有题目类型列表"""
+        return list(self.QUESTION_TYPES)
+    
+    def get_tags(self):
+        """获取所有标签列表（仅包含仍被错题使用的标签）"""
+        tags = self._get_vocab()["tags"]
+        return sorted(tag for tag, count in tags.items() if count > 0)
+    
+    def _union(self, books, table, columns):
+        """把各错题本中的同一张表合并为一个子查询"""
+        return " UNION ALL ".join(
+            f"SELECT {columns} FROM {self._table(table, book)}" for book in self._resolve_books(books)
+        )
+    
+    def get_dashboard(self, days=30, weakest=5, min_reviews=3, books=None):
+        """获取学习概况，只读取统计汇总表，耗时与复习记录的总量无关
+        
+        books 见 get_mistakes，多个错题本的统计按日期、科目和标签相加。返回字典：
+            total_reviews / total_correct / accuracy: 全部复习的次数、答对次数和正确率
+            daily: 最近 days 天每天的 (日期, 复习次数, 答对次数)
+            subjects: 每个科目和题型的 (科目, 题型, 复习次数, 答对次数)
+            weakest_tags: 正确率最低的标签 (标签, 复习次数, 答对次数)，至少复习过 min_reviews 次
+        """
+        since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        daily = self._union(books, "stats_daily", "day, reviews, correct")
+        self.cursor.execute(f'''
+            SELECT day, SUM(reviews), SUM(correct) FROM ({daily}) WHERE day >= ?
+            GROUP BY day HAVING SUM(reviews) > 0 ORDER BY day
+        ''', (since,))
+        daily = self.cursor.fetchall()
+        subjects = self._union(books, "stats_subjects", "subject, question_type, reviews, correct")
+        self.cursor.execute(f'''
+            SELECT subject, question_type, SUM(reviews), SUM(correct) FROM ({subjects})
+            GROUP BY subject, question_type HAVING SUM(reviews) > 0 ORDER BY subject, question_type
+        ''')
+        subjects = self.cursor.fetchall()
+        tags = self._union(books, "stats_tags", "tag, reviews, correct")
+        self.cursor.execute(f'''
+            SELECT tag, SUM(reviews), SUM(correct) FROM ({tags}) GROUP BY tag HAVING SUM(reviews) >= ?
+            ORDER BY CAST(SUM(correct) AS REAL) / SUM(reviews), SUM(reviews) DESC LIMIT ?
+        ''', (max(min_reviews, 1), weakest))
+        weakest_tags = self.cursor.fetchall()
+        
+        total_reviews = sum(row[2] for row in subjects)
+        total_correct = sum(row[3] for row in subjects)
+        return {
+            "total_reviews": total_reviews,
+            "total_correct": total_correct,
+            "accuracy": total_correct / total_reviews if total_reviews else 0,
+            "daily": daily,
+            "subjects": subjects,
+            "weakest_tags": weakest_tags,
+        }
+    
+    def _unsigned_questions(self, limit=None, subject=None, question_type=None, newest=False):
+        """还没有计算签名的错题 [(mistake_id, 题目)]，只读取 minhash_pending 中记录的错题
+        
+        默认按ID从小到大，newest 为 True 时最新的在前。
+        """
+        query = '''
+            SELECT m.id, m.question FROM minhash_pending p JOIN mistakes m ON m.id = p.mistake_id
+        '''
+        conditions = []
+        params = []
+        if subject:
+            conditions.append("m.subject=?")
+            params.append(subject)
+        if question_type:
+            conditions.append("m.question_type=?")
+            params.append(question_type)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY p.mistake_id DESC" if newest else " ORDER BY p.mistake_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        self.cursor.execute(query, params)
+        return self.cursor.fetchall()
+    
+    def backfill_minhash(self, limit=None, batch_size=500):
+        """为还没有签名的错题（新添加、修改过或迁移后）计算 MinHash 签名，返回计算的数量
+        
+        每 batch_size 道题提交一次，limit 为本次最多计算多少道。写入错题时不计算签名，
+        界面在后台分批调用，命令行在查找重复题之前调用。
+        """
+        done = 0
+        while limit is None or done < limit:
+            size = batch_size if limit is None else min(batch_size, limit - done)
+            questions = self._unsigned_questions(size)
+            if not questions:
+                break
+            with self.transaction():
+                self._save_minhash(questions)
+            done += len(questions)
+        return done
+    
+    def _unsigned_signatures(self, subject=None, question_type=None, limit=None):
+        """在内存中计算尚未保存签名的错题的签名 {mistake_id: 签名}（不写入数据库）
+        
+        limit 为最多计算多少道，此时只计算最新的错题。
+        """
+        signatures = {}
+        questions = self._unsigned_questions(limit, subject, question_type, newest=limit is not None)
+        for mistake_id, question in questions:
+            signature = dedup.minhash(question)
+            if signature is not None:
+                signatures[mistake_id] = signature
+        return signatures
+    
+    def _duplicate_info(self, ids):
+        """{mistake_id: ((科目, 题型, 答案、选项和附件), 复习次数)}，只有这些都相同的题目才能合并"""
+        ids = sorted(set(ids))
+        digests = {}
+        rows = []
+        # 分批查询，避免超过SQLite的参数个数上限
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f'SELECT mistake_id, digest FROM attachments WHERE mistake_id IN ({placeholders})', chunk
+            )
+            for mistake_id, digest in self.cursor.fetchall():
+                digests.setdefault(mistake_id, []).append(digest)
+            self.cursor.execute(f'''
+                SELECT id, subject, question_type, correct_answer, options, review_count
+                FROM mistakes WHERE id IN ({placeholders})
+            ''', chunk)
+            rows.extend(self.cursor.fetchall())
+        info = {}
+        for row in rows:
+            key = dedup.content_key(row[3], self.decode_options(row[4]), digests.get(row[0], ()))
+            info[row[0]] = ((row[1], row[2], key), row[5])
+        return info
+    
+    def find_similar_mistakes(self, question, subject=None, question_type=None, exclude_id=None,
+                              threshold=0.6, limit=5):
+        """查找与题目文本相似的错题，返回 [(错题ID, 相似度)]，相似度高的在前
+        
+        只比较与题目落入同一个 LSH 桶的候选题，耗时与错题总数基本无关。还没有签名的
+        错题（刚添加或导入、尚未 backfill_minhash）只当场计算最新的 SIMILAR_PENDING_LIMIT 道，
+        大量导入后在补算完成之前可能漏掉较早导入的相似题。题目太短时返回空列表。
+        """
+        signature = dedup.minhash(question)
+        if signature is None:
+            return []
+        buckets = dedup.band_buckets(signature)
+        # 写成 OR 条件，每一段都能按主键查找桶
+        bucket_conditions = " OR ".join(["(band=? AND bucket=?)"] * len(buckets))
+        query = f'''
+            SELECT h.mistake_id, h.signature FROM minhash h JOIN mistakes m ON m.id = h.mistake_id
+            WHERE h.mistake_id IN (SELECT mistake_id FROM lsh_buckets WHERE {bucket_conditions})
+        '''
+        params = [value for bucket in buckets for value in bucket]
+        if subject:
+            query += " AND m.subject=?"
+            params.append(subject)
+        if question_type:
+            query += " AND m.question_type=?"
+            params.append(question_type)
+        self.cursor.execute(query, params)
+        candidates = [(mistake_id, dedup.unpack_signature(data))
+                      for mistake_id, data in self.cursor.fetchall()]
+        
+        candidates.extend(
+            self._unsigned_signatures(subject, question_type, self.SIMILAR_PENDING_LIMIT).items()
+        )
+        
+        matches = []
+        for mistake_id, other in candidates:
+            if mistake_id == exclude_id:
+                continue
+            score = dedup.similarity(signature, other)
+            if score >= threshold:
+                matches.append((mistake_id, score))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches[:limit]
+    
+    def find_duplicate_groups(self, threshold=0.8):
+        """找出重复的错题分组：科目、题型、答案、选项和附件都相同，且题目相似
+        
+        题目太短（见 dedup.MIN_SHINGLES）的错题不参与比较。还没有签名的错题在内存中
+        计算，调用前先执行 backfill_minhash() 可以省去这部分计算。
+        返回 ID 列表的列表，每组第一个是建议保留的错题（复习次数最多，其次ID最小）。
+        """
+        unsigned = self._unsigned_signatures()
+        # 同一个桶里的题目两两作为候选；有未保存签名的题目时还需要只有一道题的桶
+        having = "" if unsigned else " HAVING COUNT(*) > 1"
+        self.cursor.execute(
+            'SELECT band, bucket, group_concat(mistake_id) FROM lsh_buckets GROUP BY band, bucket'
+            + having
+        )
+        buckets = {(band, bucket): [int(mistake_id) for mistake_id in ids.split(",")]
+                   for band, bucket, ids in self.cursor.fetchall()}
+        for mistake_id, signature in unsigned.items():
+            for bucket in dedup.band_buckets(signature):
+                buckets.setdefault(bucket, []).append(mistake_id)
+        pairs = set()
+        for ids in buckets.values():
+            ids = sorted(ids)
+            pairs.update((a, b) for i, a in enumerate(ids) for b in ids[i + 1:])
+        if not pairs:
+            return []
+        
+        candidates = {mistake_id for pair in pairs for mistake_id in pair}
+        signatures = dict(unsigned)
+        for mistake_id, data in self._iter_query('SELECT mistake_id, signature FROM minhash'):
+            if mistake_id in candidates:
+                signatures[mistake_id] = dedup.unpack_signature(data)
+        info = self._duplicate_info(candidates)
+        
+        # 并查集合并相似的题目
+        parent = {}
+        
+        def find(x):
+            while parent[x] != x:
+                x = parent[x]
+            return x
+        
+        for a, b in pairs:
+            if a not in info or b not in info or info[a][0] != info[b][0]:
+                continue
+            if a not in signatures or b not in signatures:
+                continue
+            if dedup.similarity(signatures[a], signatures[b]) >= threshold:
+                parent.setdefault(a, a)
+                parent.setdefault(b, b)
+                parent[find(b)] = find(a)
+        
+        groups = {}
+        for mistake_id in parent:
+            groups.setdefault(find(mistake_id), set()).add(mistake_id)
+        result = [
+            sorted(members, key=lambda mistake_id: (-info[mistake_id][1], mistake_id))
+            for members in groups.values()
+        ]
+        result.sort(key=lambda group: group[0])
+        return result
+    
+    def merge_mistakes(self, keep_id, duplicate_ids):
+        """合并重复的错题：复习记录和附件移到保留的错题下，然后删除其余错题
+        
+        保留错题的复习次数、答对次数和最后复习时间按合并后的记录（包括已归档的）
+        重新计算，复习调度保持不变。返回被删除的错题数量。
+        答案、选项或附件与保留的错题不同时不合并，抛出 ValueError。
+        """
+        duplicate_ids = [mistake_id for mistake_id in duplicate_ids if mistake_id != keep_id]
+        if not duplicate_ids or not self.get_mistake_by_id(keep_id, ("id",)):
+            return 0
+        info = self._duplicate_info([keep_id] + duplicate_ids)
+        different = [mistake_id for mistake_id in duplicate_ids
+                     if mistake_id in info and info[mistake_id][0][2] != info[keep_id][0][2]]
+        if different:
+            raise ValueError(
+                f"错题 {', '.join(map(str, different))} 的答案、选项或附件与 {keep_id} 不同，不能合并"
+            )
+        removed = []
+        with self.transaction():
+            for mistake_id in duplicate_ids:
+                self.cursor.execute('SELECT subject, tags FROM mistakes WHERE id=?', (mistake_id,))
+                old = self.cursor.fetchone()
+                if old is None:
+                    continue
+                # 统计汇总从重复题的分类移到保留题的分类
+                day_counts = self._review_day_counts(mistake_id)
+                self._rollup_reviews(mistake_id, day_counts, -1)
+                self._rollup_reviews(keep_id, day_counts, 1)
+                self.cursor.execute(
+                    'UPDATE reviews SET mistake_id=? WHERE mistake_id=?', (keep_id, mistake_id)
+                )
+                self.cursor.execute(
+                    'UPDATE attachments SET mistake_id=? WHERE mistake_id=?', (keep_id, mistake_id)
+                )
+                archived = self._archived_reviews(mistake_id)
+                if archived:
+                    self._save_archive(keep_id, self._archived_reviews(keep_id) + archived)
+                    self._save_archive(mistake_id, [])
+                self.cursor.execute('DELETE FROM mistakes WHERE id=?', (mistake_id,))
+                self.cursor.execute('DELETE FROM mistake_tags WHERE mistake_id=?', (mistake_id,))
+                self.cursor.execute('DELETE FROM minhash WHERE mistake_id=?', (mistake_id,))
+                self.cursor.execute('DELETE FROM lsh_buckets WHERE mistake_id=?', (mistake_id,))
+                self.cursor.execute('DELETE FROM minhash_pending WHERE mistake_id=?', (mistake_id,))
+                removed.append((mistake_id, old))
+            self._changed("deleted", [mistake_id for mistake_id, _ in removed])
+            self._changed("updated", [keep_id])
+            self.cursor.execute('''
+                UPDATE mistakes SET
+                    review_count = (SELECT COUNT(*) FROM reviews WHERE mistake_id = mistakes.id)
+                        + COALESCE((SELECT reviews FROM reviews_archive
+                                    WHERE mistake_id = mistakes.id), 0),
+                    correct_count = (SELECT COALESCE(SUM(result), 0) FROM reviews
+                                     WHERE mistake_id = mistakes.id)
+                        + COALESCE((SELECT correct FROM reviews_archive
+                                    WHERE mistake_id = mistakes.id), 0),
+                    last_review = COALESCE(
+                        (SELECT MAX(review_date) FROM reviews WHERE mistake_id = mistakes.id),
+                        (SELECT last_review FROM reviews_archive WHERE mistake_id = mistakes.id)
+                    )
+                WHERE id=?
+            ''', (keep_id,))
+        for mistake_id, old in removed:
+            self._options_cache.pop(mistake_id)
+            self._update_vocab(old[0], old[1], -1)
+        return len(removed)
+    
+    def get_difficulties(self):
+        """获取难度等级列表"""
+        return list(self.DIFFICULTIES)
+    
+    def optimize(self):
+        """让 SQLite 按需更新查询规划器的统计信息（PRAGMA optimize）
+        
+        只分析统计信息过期或缺失的表，每个索引最多抽样 ANALYSIS_LIMIT 行；
+        关闭时自动执行，长时间打开时可定期调用。数据库只读或被其他连接
+        锁住时跳过，返回 False。
+        """
+        try:
+            self.cursor.execute(f'PRAGMA analysis_limit={self.ANALYSIS_LIMIT}')
+            self.cursor.execute('PRAGMA optimize')
+        except sqlite3.OperationalError:
+            return False
+        return True
+    
+    def close(self):
+        """关闭数据库连接（关闭前更新统计信息）"""
+        if self.conn:
+            self.optimize()
+            self.conn.close()
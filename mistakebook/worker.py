@@ -0,0 +1,92 @@
+"""在后台线程中执行数据库操作"""
+import queue
+import threading
+from concurrent.futures import Future
+
+from .storage import MistakeBook
+
+
+class AsyncMistakeBook:
+    """在后台线程中持有数据库连接的 MistakeBook 代理
+    
+    所有操作按提交顺序在同一个工作线程中执行。submit() 返回 Future，
+    直接调用 MistakeBook 的方法则等待结果返回（同步调用）。
+    """
+    
+    def __init__(self, factory=MistakeBook):
+        self._tasks = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._book = None
+        self._thread = threading.Thread(
+            target=self._run, args=(factory,), name="MistakeBookWorker", daemon=True
+        )
+        self._thread.start()
+        
+        # 等待数据库打开（包括迁移）完成
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+    
+    def _run(self, factory):
+        """工作线程：创建数据库连接并依次执行任务"""
+        try:
+            self._book = factory()
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            future, method, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if callable(method):
+                    result = method(self._book, *args, **kwargs)
+                else:
+                    result = getattr(self._book, method)(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        self._book.close()
+    
+    def submit(self, method, *args, **kwargs):
+        """提交任务，返回 Future
+        
+        method 可以是 MistakeBook 的方法名，也可以是以 MistakeBook 实例
+        为第一个参数的函数（用于在一次任务中组合多个查询）。需要把多个
+        写操作放进一个事务时，在该函数内使用 book.transaction()。
+        """
+        future = Future()
+        if not self._thread.is_alive():
+            future.set_exception(RuntimeError("数据库工作线程已关闭"))
+            return future
+        self._tasks.put((future, method, args, kwargs))
+        return future
+    
+    def call(self, method, *args, **kwargs):
+        """同步执行任务并返回结果"""
+        if threading.current_thread() is self._thread:
+            # 在工作线程内部直接执行，避免自己等待自己
+            if callable(method):
+                return method(self._book, *args, **kwargs)
+            return getattr(self._book, method)(*args, **kwargs)
+        return self.submit(method, *args, **kwargs).result()
+    
+    def __getattr__(self, name):
+        # 事务只能在工作线程中使用，见 submit()
+        if name.startswith("_") or name == "transaction" or not callable(getattr(MistakeBook, name, None)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+    
+    def close(self):
+        """等待已提交的任务完成后关闭数据库连接"""
+        if self._thread.is_alive():
+            self._tasks.put(None)
+            self._thread.join()
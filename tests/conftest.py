@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mistakebook.storage import MistakeBook  # noqa: E402
+
+
+@pytest.fixture
+def book(tmp_path):
+    """临时目录中的空错题本"""
+    book = MistakeBook(str(tmp_path / "mistakes.db"))
+    yield book
+    book.close()
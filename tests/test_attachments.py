@@ -0,0 +1,78 @@
+import os
+
+from mistakebook.storage import MistakeBook
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def add_with_image(book, data=PNG):
+    mistake_id = book.add_mistake("数学", "填空", "1+1=?", None, "2")
+    book.add_attachment(mistake_id, data, "图.png")
+    return mistake_id
+
+
+def test_same_image_is_stored_once(book):
+    first = add_with_image(book)
+    second = add_with_image(book)
+    digest = book.get_attachments(first)[0][2]
+    assert book.get_attachments(second)[0][2] == digest
+    assert list(book.attachments.digests()) == [digest]
+
+    book.delete_mistake(first)
+    assert book.attachments.exists(digest)
+    book.delete_mistake(second)
+    assert not book.attachments.exists(digest)
+
+
+def test_books_in_one_directory_do_not_share_files(tmp_path):
+    math = MistakeBook(str(tmp_path / "数学.db"))
+    physics = MistakeBook(str(tmp_path / "物理.db"))
+    try:
+        math_id = add_with_image(math)
+        physics_id = add_with_image(physics)
+        digest = physics.get_attachments(physics_id)[0][2]
+        assert math.attachments.root != physics.attachments.root
+
+        math.delete_mistake(math_id)
+        assert math.clean_attachments() == 0
+        assert not math.attachments.exists(digest)
+        assert physics.attachments.exists(digest)
+        assert physics.get_image_data(digest) == PNG
+    finally:
+        math.close()
+        physics.close()
+
+
+def test_clean_attachments_removes_unreferenced_files(book):
+    mistake_id = add_with_image(book)
+    with book.transaction():
+        book.delete_mistake(mistake_id)
+    # 事务中不删除文件，留给 clean_attachments()
+    assert len(list(book.attachments.digests())) == 1
+    assert book.clean_attachments() == 1
+    assert list(book.attachments.digests()) == []
+    assert os.path.isdir(book.attachments.root)
+
+
+def test_attached_book_keeps_its_files(tmp_path):
+    physics = MistakeBook(str(tmp_path / "物理.db"))
+    physics_id = add_with_image(physics)
+    digest = physics.get_attachments(physics_id)[0][2]
+    physics.close()
+
+    math = MistakeBook(str(tmp_path / "数学.db"))
+    try:
+        math.attach_book(str(tmp_path / "物理.db"))
+        math_id = add_with_image(math)
+        assert len(math.get_mistakes(books=True)) == 2
+        math.delete_mistake(math_id)
+        math.clean_attachments()
+    finally:
+        math.close()
+
+    physics = MistakeBook(str(tmp_path / "物理.db"))
+    try:
+        assert physics.attachments.exists(digest)
+        assert physics.get_image_data(digest) == PNG
+    finally:
+        physics.close()
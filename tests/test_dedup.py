@@ -0,0 +1,61 @@
+import pytest
+
+from mistakebook import dedup
+
+QUESTION = "已知函数f(x)等于x的平方减去二x加一，求函数在区间零到三上的最大值和最小值"
+SIMILAR = "已知函数f(x)等于x的平方减去二x加一，求函数在区间零到四上的最大值和最小值"
+
+
+def pending_count(book):
+    book.cursor.execute("SELECT COUNT(*) FROM minhash_pending")
+    return book.cursor.fetchone()[0]
+
+
+def test_short_text_has_no_signature(book):
+    assert dedup.minhash("见图") is None
+    book.add_mistake("数学", "解答", "见图", None, "1")
+    assert book.find_similar_mistakes("见图") == []
+
+
+def test_lookup_sees_pending_rows(book):
+    [mistake_id] = book.add_mistakes_bulk([
+        {"subject": "数学", "question_type": "解答", "question": QUESTION, "correct_answer": "4"},
+    ])
+    assert pending_count(book) == 1
+    matches = book.find_similar_mistakes(SIMILAR, "数学")
+    assert [match[0] for match in matches] == [mistake_id]
+    # 查找不写数据库
+    assert pending_count(book) == 1
+
+    assert book.backfill_minhash() == 1
+    assert pending_count(book) == 0
+    assert [match[0] for match in book.find_similar_mistakes(SIMILAR, "数学")] == [mistake_id]
+    assert book.find_similar_mistakes(SIMILAR, "物理") == []
+
+
+def test_lookup_checks_only_newest_pending_rows(book):
+    book.SIMILAR_PENDING_LIMIT = 2
+    old_id = book.add_mistake("数学", "解答", QUESTION, None, "4")
+    for index in range(3):
+        book.add_mistake("数学", "解答", f"第{index}道无关的题目：计算三角形的面积和周长", None, "1")
+    assert book.find_similar_mistakes(SIMILAR) == []
+    book.backfill_minhash()
+    assert [match[0] for match in book.find_similar_mistakes(SIMILAR)] == [old_id]
+
+
+def test_duplicates_need_the_same_answer(book):
+    first = book.add_mistake("数学", "解答", QUESTION, None, "4")
+    second = book.add_mistake("数学", "解答", QUESTION, None, "4")
+    other = book.add_mistake("数学", "解答", QUESTION, None, "5")
+    book.backfill_minhash()
+    assert book.find_duplicate_groups() == [[first, second]]
+    with pytest.raises(ValueError):
+        book.merge_mistakes(first, [other])
+
+
+def test_signature_layout():
+    signature = dedup.minhash(QUESTION)
+    assert len(signature) == dedup.NUM_PERM == dedup.BANDS * dedup.ROWS
+    assert len(dedup.band_buckets(signature)) == dedup.BANDS
+    assert dedup.unpack_signature(dedup.pack_signature(signature)) == signature
+    assert dedup.similarity(signature, dedup.minhash(SIMILAR)) >= 0.6
@@ -0,0 +1,58 @@
+import pytest
+
+from mistakebook.grading import AnswerGrader, check_answer, split_alternatives
+
+
+@pytest.mark.parametrize("user_answer, expected", [
+    ("A,C", True),
+    ("C、A", True),
+    ("ac", True),
+    ("Ａ，Ｃ", True),
+    ("A", False),
+    ("A,B,C", False),
+])
+def test_choices_ignore_order_and_separators(user_answer, expected):
+    assert check_answer("多选", user_answer, "A,C") is expected
+
+
+@pytest.mark.parametrize("user_answer, expected", [
+    ("对", True), ("√", True), ("True", True), ("错", False),
+])
+def test_judge_synonyms(user_answer, expected):
+    assert check_answer("判断", user_answer, "正确") is expected
+
+
+def test_text_ignores_whitespace_width_and_case():
+    assert check_answer("填空", " Ｈ２Ｏ ", "h2o")
+    assert check_answer("填空", "0.50", "0.5")
+    assert check_answer("填空", "50%", "0.5")
+    assert not check_answer("填空", "0.51", "0.5")
+
+
+def test_alternatives_need_the_prefix():
+    assert split_alternatives("any:1/2 || 0.5") == ["1/2", "0.5"]
+    assert check_answer("填空", "0.5", "any:1/2 || 0.5")
+    assert check_answer("单选", "B", "any:A||B")
+    # 没有前缀时 "||" 是答案的一部分
+    assert split_alternatives("a || b") == ["a || b"]
+    assert check_answer("填空", "a||b", "a || b")
+    assert not check_answer("填空", "a", "a || b")
+
+
+def test_regex_answers():
+    assert check_answer("填空", "x=3", r"re:x\s*=\s*3")
+    assert check_answer("填空", "X = 3", r"re:x\s*=\s*3")
+    assert not check_answer("填空", "x=4", r"re:x\s*=\s*3")
+    assert check_answer("填空", "x=3", r"any:re:x=3 || 三")
+
+
+def test_invalid_regex_is_compared_as_text():
+    assert not check_answer("填空", "abc", "re:[abc")
+    assert check_answer("填空", "re:[abc", "re:[abc")
+
+
+def test_grader_cache_follows_answer_changes():
+    grader = AnswerGrader()
+    assert grader.grade(1, "填空", "甲", "甲")
+    assert not grader.grade(1, "填空", "乙", "甲")
+    assert grader.grade(1, "填空", "乙", "乙")
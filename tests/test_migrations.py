@@ -0,0 +1,104 @@
+import sqlite3
+
+from mistakebook.storage import MistakeBook
+
+# 最初版本（错题本.py）的表结构，没有 user_version
+BASELINE_SCHEMA = """
+CREATE TABLE mistakes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    question TEXT NOT NULL,
+    question_type TEXT NOT NULL,
+    options TEXT,
+    wrong_answer TEXT,
+    correct_answer TEXT NOT NULL,
+    explanation TEXT,
+    tags TEXT,
+    difficulty INTEGER DEFAULT 3,
+    add_date TEXT NOT NULL,
+    last_review TEXT,
+    review_count INTEGER DEFAULT 0,
+    correct_count INTEGER DEFAULT 0
+);
+CREATE TABLE reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mistake_id INTEGER NOT NULL,
+    review_date TEXT NOT NULL,
+    result BOOLEAN NOT NULL,
+    user_answer TEXT,
+    FOREIGN KEY (mistake_id) REFERENCES mistakes(id)
+);
+"""
+
+
+def create_baseline(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO mistakes (subject, question, question_type, options, wrong_answer, correct_answer,"
+        " explanation, tags, difficulty, add_date, last_review, review_count, correct_count)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("数学", "下列函数中是奇函数的是", "单选", str({"A": "x^2", "B": "x^3"}), "A", "B",
+             "奇函数满足f(-x)=-f(x)", "函数,奇偶性", 2, "2024-01-01 08:00:00",
+             "2024-01-03 08:00:00", 2, 1),
+            ("物理", "光在真空中的传播速度约为多少", "填空", None, "", "3e8",
+             "", "光学", 3, "2024-01-02 08:00:00", None, 0, 0),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO reviews (mistake_id, review_date, result, user_answer) VALUES (?, ?, ?, ?)",
+        [(1, "2024-01-02 08:00:00", 0, "A"), (1, "2024-01-03 08:00:00", 1, "B")],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_migrate_baseline_database(tmp_path):
+    path = str(tmp_path / "mistakes.db")
+    create_baseline(path)
+    book = MistakeBook(path)
+    try:
+        book.cursor.execute("PRAGMA user_version")
+        assert book.cursor.fetchone()[0] == 14
+
+        mistakes = {m.id: m for m in book.get_mistakes()}
+        assert set(mistakes) == {1, 2}
+        assert book.get_options(mistakes[1]) == {"A": "x^2", "B": "x^3"}
+        assert book.get_options(mistakes[2]) is None
+        # 选项已转换为JSON
+        book.cursor.execute("SELECT options FROM mistakes WHERE id=1")
+        assert book.cursor.fetchone()[0].startswith("{\"")
+
+        assert book.get_subjects() == ["数学", "物理"]
+        assert book.get_tags() == ["光学", "函数", "奇偶性"]
+        assert [m.id for m in book.get_mistakes(tag="奇偶性")] == [1]
+        assert [r[3] for r in book.get_reviews(1)] == [1, 0]
+        # 复习记录回放出了调度状态，未复习的题从添加时起到期
+        assert mistakes[1].due_date > "2024-01-03"
+        assert mistakes[2].due_date == "2024-01-02 08:00:00"
+        # 复习统计表由已有的复习记录汇总得到
+        dashboard = book.get_dashboard()
+        assert dashboard["total_reviews"] == 2
+        assert dashboard["subjects"] == [("数学", "单选", 2, 1)]
+        if book.fts_enabled:
+            assert [m.id for m in book.search_mistakes("奇函数")] == [1]
+        # 迁移只登记待计算的签名，由 backfill_minhash 补算
+        assert book.backfill_minhash() == 2
+    finally:
+        book.close()
+
+
+def test_migrations_run_once(tmp_path):
+    path = str(tmp_path / "mistakes.db")
+    create_baseline(path)
+    MistakeBook(path).close()
+    book = MistakeBook(path)
+    try:
+        book.cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='mistakes'")
+        indexes = {row[0] for row in book.cursor.fetchall()}
+        assert {"idx_mistakes_order", "idx_mistakes_subject_order", "idx_mistakes_type_order"} <= indexes
+        assert "idx_mistakes_subject_type_order" not in indexes
+        assert book.count_mistakes() == 2
+    finally:
+        book.close()
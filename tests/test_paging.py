@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from mistakebook.models import LIST_COLUMNS
+from mistakebook.remote import encode_json
+
+
+@pytest.fixture
+def paged_book(book):
+    """每科 15 道题，添加时间和复习时间有大量相同值，部分题目未复习"""
+    ids = book.add_mistakes_bulk([
+        {"subject": subject, "question_type": "选择" if i % 2 else "解答",
+         "question": f"{subject}第{i}题", "correct_answer": "A", "difficulty": i % 5 + 1}
+        for subject in ("数学", "物理")
+        for i in range(15)
+    ])
+    for n, mistake_id in enumerate(ids):
+        add_date = f"2024-01-0{n % 3 + 1} 08:00:00"
+        last_review = None if n % 4 == 0 else f"2024-02-0{n % 5 + 1} 09:00:00"
+        book.cursor.execute(
+            "UPDATE mistakes SET add_date=?, last_review=? WHERE id=?",
+            (add_date, last_review, mistake_id),
+        )
+    book.conn.commit()
+    return book
+
+
+def page_through(book, after_of, limit=4, **filters):
+    pages = []
+    after = None
+    while True:
+        page = book.get_mistakes_page(after=after, limit=limit, columns=LIST_COLUMNS, **filters)
+        pages.append(page)
+        if len(page) < limit:
+            return [mistake.id for page in pages for mistake in page]
+        after = after_of(page[-1])
+
+
+AFTER_FORMS = {
+    "tuple": lambda m: (m.last_review, m.add_date, m.id),
+    "mistake": lambda m: m,
+    # 远程客户端经过JSON传输后得到的字典
+    "dict": lambda m: json.loads(encode_json(m)),
+}
+
+
+@pytest.mark.parametrize("form", AFTER_FORMS)
+def test_pages_match_full_list(paged_book, form):
+    expected = [m.id for m in paged_book.get_mistakes(columns=LIST_COLUMNS)]
+    ids = page_through(paged_book, AFTER_FORMS[form])
+    assert ids == expected
+    assert len(set(ids)) == 30
+
+
+@pytest.mark.parametrize("filters", [
+    {"subject": "数学"},
+    {"question_type": "选择"},
+    {"subject": "物理", "difficulty": 2},
+])
+def test_pages_with_filters(paged_book, filters):
+    expected = [m.id for m in paged_book.get_mistakes(columns=LIST_COLUMNS, **filters)]
+    assert expected
+    assert page_through(paged_book, AFTER_FORMS["tuple"], limit=3, **filters) == expected
+
+
+def test_page_after_last_row_is_empty(paged_book):
+    last = paged_book.get_mistakes(columns=LIST_COLUMNS)[-1]
+    assert paged_book.get_mistakes_page(after=last) == []
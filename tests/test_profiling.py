@@ -0,0 +1,28 @@
+import threading
+
+from mistakebook.profiling import Profiler, profile_book
+from mistakebook.remote import MistakeBookClient, MistakeBookServer
+
+
+def test_profile_local_book(book):
+    profiler = Profiler()
+    profile_book(book, profiler)
+    book.add_mistake("数学", "填空", "1+1=?", None, "2")
+    assert len(book.get_mistakes()) == 1
+    assert "MistakeBook.get_mistakes" in profiler.report()
+
+
+def test_profile_remote_client(tmp_path):
+    server = MistakeBookServer(("127.0.0.1", 0), str(tmp_path / "mistakes.db"), 1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        profiler = Profiler()
+        client = profile_book(MistakeBookClient(f"http://127.0.0.1:{server.server_address[1]}"), profiler)
+        client.add_mistake("数学", "填空", "1+1=?", None, "2")
+        assert client.get_subjects() == ["数学"]
+        report = profiler.report()
+        assert "MistakeBookClient.get_subjects" in report
+        assert "MistakeBookClient.add_mistake" in report
+    finally:
+        server.shutdown()
+        server.server_close()
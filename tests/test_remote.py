@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from mistakebook.models import LIST_COLUMNS
+from mistakebook.remote import MistakeBookClient, MistakeBookServer, RemoteError, serve
+from mistakebook.storage import MistakeBook
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = MistakeBookServer(("127.0.0.1", 0), str(tmp_path / "mistakes.db"), 1, token="secret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_is_required(server):
+    with pytest.raises(RemoteError) as error:
+        MistakeBookClient(server).get_subjects()
+    assert error.value.error_type == "Unauthorized"
+    with pytest.raises(RemoteError):
+        MistakeBookClient(server, token="wrong").get_metrics()
+
+    client = MistakeBookClient(server, token="secret")
+    mistake_id = client.add_mistake("数学", "填空", "1+1=?", None, "2")
+    assert client.get_mistake_by_id(mistake_id).question == "1+1=?"
+    assert client.get_subjects() == ["数学"]
+
+
+def test_unknown_method_is_404_but_errors_inside_are_not(server, monkeypatch):
+    client = MistakeBookClient(server, token="secret")
+    with pytest.raises(RemoteError) as error:
+        client.call("conn")
+    assert str(error.value) == "不支持的方法: conn"
+
+    def broken(self):
+        raise AttributeError("内部错误")
+
+    monkeypatch.setattr(MistakeBook, "get_tags", broken)
+    with pytest.raises(RemoteError) as error:
+        client.get_tags()
+    assert str(error.value) == "内部错误"
+    assert client.get_metrics()["get_tags"]["errors"] == 1
+
+
+def test_paging_with_a_remote_mistake(server):
+    client = MistakeBookClient(server, token="secret")
+    client.add_mistakes_bulk([
+        {"subject": "数学", "question_type": "填空", "question": f"题目{i}", "correct_answer": "1"}
+        for i in range(7)
+    ])
+    first = client.get_mistakes_page(limit=5, columns=LIST_COLUMNS)
+    rest = client.get_mistakes_page(after=first[-1], limit=5, columns=LIST_COLUMNS)
+    assert [m.id for m in first + rest] == [m.id for m in client.get_mistakes()]
+
+
+def test_serve_refuses_public_address_without_token(tmp_path):
+    with pytest.raises(ValueError):
+        serve(str(tmp_path / "mistakes.db"), host="0.0.0.0", port=0)
@@ -0,0 +1,24 @@
+from mistakebook.models import LIST_COLUMNS
+
+
+def add_questions(book, count, subject="数学"):
+    return book.add_mistakes_bulk([
+        {"subject": subject, "question_type": "解答", "question": f"第{i}题 函数求值",
+         "correct_answer": str(i)}
+        for i in range(count)
+    ])
+
+
+def test_search_respects_limit(book):
+    add_questions(book, 30)
+    assert len(book.search_mistakes("函数求值", limit=10)) == 10
+    # 短关键词走 LIKE
+    assert len(book.search_mistakes("函数", limit=10)) == 10
+
+
+def test_empty_keyword_respects_limit(book):
+    add_questions(book, 30)
+    assert len(book.search_mistakes("", limit=10)) == 10
+    assert len(book.search_mistakes("  ", limit=10, columns=LIST_COLUMNS)) == 10
+    assert len(book.get_mistakes()) == 30
+    assert len(book.get_mistakes(limit=5)) == 5